@@ -0,0 +1,123 @@
+import hashlib
+from typing import Dict, List, Optional, Set
+from ast1 import (
+    Node,
+    Program,
+    LetStatement,
+    AssignStatement,
+    ReturnStatement,
+    ExpressionStatement,
+    Identifier,
+    FunctionLiteral,
+)
+from visitor import NodeVisitor, walk, iter_child_nodes
+
+def binding_counts(program: Program) -> Dict[str, int]:
+    """Count how often each name is bound anywhere, by manifest, transmute or as a parameter"""
+    counts: Dict[str, int] = {}
+    for node in walk(program):
+        names = []
+        if isinstance(node, (LetStatement, AssignStatement)) and node.name is not None:
+            names = [node.name.value]
+        elif isinstance(node, FunctionLiteral):
+            names = [param.value for param in node.parameters or []]
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+def local_names(program: Program) -> Set[str]:
+    """
+    Names bound inside some rune, as parameters or by manifest within its body.
+    Such names may shadow a global at a use site, so passes that move code
+    between scopes must treat them as unsafe.
+    """
+    names: Set[str] = set()
+    for node in walk(program):
+        if not isinstance(node, FunctionLiteral):
+            continue
+        names.update(param.value for param in node.parameters or [])
+        if node.body is None:
+            continue
+        for inner in walk(node.body):
+            if isinstance(inner, LetStatement) and inner.name is not None:
+                names.add(inner.name.value)
+    return names
+
+def free_identifiers(node: Node, bound: Optional[Set[str]] = None) -> Set[str]:
+    """Identifiers referenced within a tree that are not bound inside it"""
+    bound = set(bound or ())
+    for inner in walk(node):
+        if isinstance(inner, FunctionLiteral):
+            bound.update(param.value for param in inner.parameters or [])
+        elif isinstance(inner, LetStatement) and inner.name is not None:
+            bound.add(inner.name.value)
+    free: Set[str] = set()
+    for inner in walk(node):
+        if isinstance(inner, LetStatement):
+            continue
+        if isinstance(inner, Identifier) and inner.value not in bound:
+            free.add(inner.value)
+    return free
+
+class _ManifestCollector(NodeVisitor):
+    def __init__(self):
+        self.names: Set[str] = set()
+
+    def visit_FunctionLiteral(self, node: FunctionLiteral):
+        return False
+
+    def visit_LetStatement(self, node: LetStatement):
+        if node.name is not None:
+            self.names.add(node.name.value)
+
+def manifested_names(root: Optional[Node]) -> Set[str]:
+    """Names bound by manifest in the scope of root, not counting nested runes"""
+    collector = _ManifestCollector()
+    if root is not None:
+        collector.visit(root)
+    return collector.names
+
+def top_level_runes(program: Program) -> Dict[str, int]:
+    """
+    Map each name bound to a rune literal by a top-level manifest to the
+    index of its defining statement. Names bound more than once anywhere
+    in the program are left out, since their binding can change at run time.
+    """
+    counts = binding_counts(program)
+    runes: Dict[str, int] = {}
+    for index, stmt in enumerate(program.statements):
+        if (isinstance(stmt, LetStatement)
+                and stmt.name is not None
+                and isinstance(stmt.value, FunctionLiteral)
+                and stmt.value.body is not None
+                and counts.get(stmt.name.value) == 1):
+            runes[stmt.name.value] = index
+    return runes
+
+def body_expression(fn: FunctionLiteral) -> Optional[Node]:
+    """The expression a single-statement rune body evaluates to, if it has one"""
+    statements: List = fn.body.statements if fn.body is not None else []
+    if len(statements) != 1:
+        return None
+    stmt = statements[0]
+    if isinstance(stmt, ReturnStatement):
+        return stmt.return_value
+    if isinstance(stmt, ExpressionStatement):
+        return stmt.expression
+    return None
+
+def structural_hash(node: Node) -> str:
+    """
+    Hash the shape of a tree: node classes, names, literal values and
+    operators, in pre-order with each node's arity. Trees that differ only
+    in token positions or object identity hash alike.
+    """
+    digest = hashlib.sha256()
+    for inner in walk(node):
+        children = list(iter_child_nodes(inner))
+        attributes = [type(inner).__name__, len(children)]
+        for field in ("value", "operator"):
+            if hasattr(inner, field) and not isinstance(getattr(inner, field), Node):
+                attributes.append(getattr(inner, field))
+        digest.update(repr(attributes).encode())
+    return digest.hexdigest()
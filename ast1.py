@@ -138,6 +138,26 @@ class LetStatement(Statement):
         s += " seal"
         return s
 
+class AssignStatement(Statement):
+    """Represents rebinding a name that is already manifest"""
+    def __init__(self, token: Token, name: Identifier, value: Optional[Expression]):
+        self.token = token  # The 'transmute' token
+        self.name = name
+        self.value = value
+
+    def statement_node(self):
+        pass
+
+    def token_literal(self) -> str:
+        return self.token.literal
+
+    def string(self) -> str:
+        s = f"{self.token_literal()} {self.name.string()} with "
+        if self.value:
+            s += self.value.string()
+        s += " seal"
+        return s
+
 class ReturnStatement(Statement):
     """Represents a return statement"""
     def __init__(self, token: Token, return_value: Optional[Expression]):
@@ -187,12 +207,29 @@ class BlockStatement(Statement):
     def string(self) -> str:
         return f"unfold {' '.join(stmt.string() for stmt in self.statements)} fold"
 
+class WhileStatement(Statement):
+    """Represents a loop that runs its body while its condition holds"""
+    def __init__(self, token: Token, condition: Expression, body: BlockStatement):
+        self.token = token  # The 'whilst' token
+        self.condition = condition
+        self.body = body
+
+    def statement_node(self):
+        pass
+
+    def token_literal(self) -> str:
+        return self.token.literal
+
+    def string(self) -> str:
+        return f"whilst {self.condition.string()} {self.body.string()}"
+
 class PrefixExpression(Expression):
     """Represents a prefix expression (e.g., !true, -5)"""
     def __init__(self, token: Token, operator: str, right: Expression):
         self.token = token  # The prefix token (!, -)
         self.operator = operator
         self.right = right
+        self.operand_type: Optional[str] = None  # Proven type of right, set by type inference
 
     def expression_node(self):
         pass
@@ -211,6 +248,7 @@ class InfixExpression(Expression):
         self.left = left
         self.operator = operator
         self.right = right
+        self.operand_type: Optional[str] = None  # Proven type of both operands, set by type inference
 
     def expression_node(self):
         pass
@@ -292,6 +330,58 @@ class CallExpression(Expression):
         args = " knot ".join(arg.string() for arg in self.arguments)
         return f"{self.function.string()}({args})"
     
+class ArrayLiteral(Expression):
+    """Represents a codex literal"""
+    def __init__(self, token: Token, elements: List[Expression]):
+        self.token = token  # The '[' token
+        self.elements = elements
+
+    def expression_node(self):
+        pass
+
+    def token_literal(self) -> str:
+        return self.token.literal
+
+    def string(self) -> str:
+        elements = " knot ".join(element.string() for element in self.elements)
+        return f"[{elements}]"
+
+class IndexExpression(Expression):
+    """Represents indexing into a codex"""
+    def __init__(self, token: Token, left: Expression, index: Optional[Expression]):
+        self.token = token  # The '[' token
+        self.left = left
+        self.index = index
+
+    def expression_node(self):
+        pass
+
+    def token_literal(self) -> str:
+        return self.token.literal
+
+    def string(self) -> str:
+        return f"({self.left.string()}[{self.index.string()}])"
+
+class HashLiteral(Expression):
+    """Represents a tome literal, its keys and values alternating in entries"""
+    def __init__(self, token: Token, entries: List[Expression]):
+        self.token = token  # The 'tome' token
+        self.entries = entries
+
+    @property
+    def pairs(self) -> List[tuple]:
+        return list(zip(self.entries[::2], self.entries[1::2]))
+
+    def expression_node(self):
+        pass
+
+    def token_literal(self) -> str:
+        return self.token.literal
+
+    def string(self) -> str:
+        pairs = " knot ".join(f"{key.string()} binds {value.string()}" for key, value in self.pairs)
+        return f"tome({pairs})"
+
 class GroupedExpression(Expression):
     def __init__(self, token: Token, expression: Optional[Expression] = None):
         super().__init__(token)
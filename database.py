@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Tuple
+from object import (
+    Object,
+    Integer,
+    String,
+    Hash,
+    Bytes,
+    Stream,
+    Error,
+    hash_key,
+    INTEGER_OBJ,
+    STRING_OBJ,
+    BOOLEAN_OBJ,
+    NULL_OBJ,
+    BYTES_OBJ,
+    ARRAY_OBJ,
+    HASH_OBJ,
+    PACKED_MIN,
+    PACKED_MAX,
+)
+from hamt import HAMT
+from eval import VOID
+
+# Idle connections kept open for each database
+POOL_SIZE = 4
+
+# Rows fetched from SQLite at a time as a query's stream is read
+ROW_BATCH = 256
+
+class ConnectionPool:
+    """
+    Open connections to SQLite files, kept for reuse once a statement is
+    done with them, so that many small queries do not reopen the file and
+    each connection's cache of prepared statements is used again.
+    """
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self.idle: Dict[Tuple[int, str], List[sqlite3.Connection]] = {}
+        self.opened = 0
+
+    def acquire(self, path: str) -> sqlite3.Connection:
+        # a connection must not cross a fork, so each process keeps its own
+        idle = self.idle.get((os.getpid(), path))
+        if idle:
+            return idle.pop()
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None, cached_statements=256)
+        self.opened += 1
+        return connection
+
+    def release(self, path: str, connection: sqlite3.Connection):
+        if connection.in_transaction:
+            connection.rollback()
+        idle = self.idle.setdefault((os.getpid(), path), [])
+        if len(idle) < self.size:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self):
+        for connections in self.idle.values():
+            for connection in connections:
+                connection.close()
+        self.idle.clear()
+
+POOL = ConnectionPool()
+
+def to_parameter(value: Object):
+    """A value as SQLite takes it, raising ValueError if it cannot be bound"""
+    kind = value.type()
+    if kind == INTEGER_OBJ and type(value.value) is int and not PACKED_MIN <= value.value <= PACKED_MAX:
+        raise ValueError(f"cannot bind {value.value}, beyond SQLite's 64-bit integers")
+    if kind in (INTEGER_OBJ, STRING_OBJ, BOOLEAN_OBJ):
+        return value.value
+    if kind == NULL_OBJ:
+        return None
+    if kind == BYTES_OBJ:
+        return bytes(value.view)
+    raise ValueError(f"cannot bind a {kind} to a statement")
+
+def to_parameters(params: Object):
+    """The codex of a statement's ? parameters as a tuple, or the tome of its :named ones as a dict"""
+    if params.type() == ARRAY_OBJ:
+        return tuple(map(to_parameter, params.elements()))
+    if params.type() == HASH_OBJ:
+        named = {}
+        for _, (key, value) in params.pairs.items():
+            if key.type() != STRING_OBJ:
+                raise ValueError(f"parameter names must be SCROLL, got {key.type()}")
+            named[key.value] = to_parameter(value)
+        return named
+    raise ValueError(f"parameters must be a CODEX or TOME, got {params.type()}")
+
+def to_object(value: Any) -> Object:
+    if value is None:
+        return VOID
+    if type(value) is str:
+        return String(value)
+    if type(value) is bytes:
+        return Bytes(value)
+    return Integer(value)
+
+def rows(path: str, sql: str, params) -> Iterator[Object]:
+    """Each row of a query as a tome from column name to value, fetched a batch at a time"""
+    connection = POOL.acquire(path)
+    try:
+        try:
+            cursor = connection.execute(sql, params)
+        except sqlite3.Error as e:
+            yield Error(f"`query` failed: {e}")
+            return
+        if cursor.description is None:
+            return
+        names = [String(column[0]) for column in cursor.description]
+        keys = [(hash_key(name), name) for name in names]
+        while True:
+            try:
+                batch = cursor.fetchmany(ROW_BATCH)
+            except sqlite3.Error as e:
+                yield Error(f"`query` failed: {e}")
+                return
+            if not batch:
+                return
+            for row in batch:
+                pairs = HAMT()
+                for (filed, name), value in zip(keys, row):
+                    pairs = pairs.set(filed, (name, to_object(value)))
+                yield Hash(pairs)
+    finally:
+        POOL.release(path, connection)
+
+def query(path: str, sql: str, params: Object = None) -> Object:
+    """
+    A stream of the rows of a query, run afresh on every pass over it. Rows
+    are fetched as the stream is read, so a query over many rows never
+    holds them all.
+    """
+    try:
+        bound = to_parameters(params) if params is not None else ()
+    except ValueError as e:
+        return Error(f"`query` {e}")
+    return Stream(lambda: rows(path, sql, bound))
+
+def execute(path: str, sql: str, params: Object = None) -> Object:
+    """Run one statement, giving the number of rows it changed"""
+    try:
+        bound = to_parameters(params) if params is not None else ()
+    except ValueError as e:
+        return Error(f"`execute` {e}")
+    connection = POOL.acquire(path)
+    try:
+        return Integer(max(connection.execute(sql, bound).rowcount, 0))
+    except sqlite3.Error as e:
+        return Error(f"`execute` failed: {e}")
+    finally:
+        POOL.release(path, connection)
+
+def batch_parameters(batch: Object) -> Iterator:
+    """The parameters of each statement of a batch: the rows of a table, or each codex or tome of a codex"""
+    if batch.type() == ARRAY_OBJ:
+        return map(to_parameters, batch.elements())
+    # a table's packed columns are bound from their raw values, with no NUMBER made per cell
+    columns = []
+    for column in batch.columns.values():
+        columns.append(column.items[:len(column)] if column.packed else map(to_parameter, column.elements()))
+    return zip(*columns)
+
+def execute_many(path: str, sql: str, batch: Object) -> Object:
+    """
+    Run one statement for every row of a batch in a single transaction,
+    giving the number of rows changed. A mishap undoes the whole batch.
+    """
+    connection = POOL.acquire(path)
+    try:
+        connection.execute("BEGIN")
+        changed = connection.executemany(sql, batch_parameters(batch)).rowcount
+        connection.execute("COMMIT")
+        return Integer(max(changed, 0))
+    except ValueError as e:
+        return Error(f"`executemany` {e}")
+    except sqlite3.Error as e:
+        return Error(f"`executemany` failed: {e}")
+    finally:
+        POOL.release(path, connection)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from object import Error, Stream
+from database import POOL
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(POOL.close)
+        self.env = Environment()
+        self.run_script(f'manifest db with "{os.path.join(directory.name, "shop.db")}" seal')
+        self.run_script('execute(db knot "CREATE TABLE fruit (name TEXT, qty INTEGER, price REAL, note BLOB)")')
+
+    def run_script(self, source: str):
+        return Eval(Parser(Lexer(source)).parse_program(), self.env)
+
+    def test_statements_and_queries(self):
+        tests = [
+            ('executemany(db knot "INSERT INTO fruit (name, qty, price) VALUES (?, ?, ?)" knot [["apple" knot 3 knot 1 divide 2] knot ["pear" knot 10 knot 2]])', "2"),
+            ('executemany(db knot "INSERT INTO fruit (name, qty) VALUES (?, ?)" knot table(tome("a" binds ["fig" knot "kiwi"] knot "b" binds [7 knot 1])))', "2"),
+            ('execute(db knot "UPDATE fruit SET qty = qty + 1 WHERE qty > ?" knot [5])', "2"),
+            ('codex(query(db knot "SELECT name, qty, price FROM fruit WHERE qty > ? ORDER BY qty" knot [2]))',
+             "[tome(name binds apple knot price binds 0.5 knot qty binds 3) knot tome(name binds fig knot price binds void knot qty binds 8) knot tome(name binds pear knot price binds 2.0 knot qty binds 11)]"),
+            ('codex(query(db knot "SELECT qty FROM fruit WHERE name = :name" knot tome("name" binds "kiwi")))', "[tome(qty binds 1)]"),
+            ('execute(db knot "INSERT INTO fruit (name, note) VALUES (?, ?)" knot ["blob" knot slice(mapfile(db) knot 0 knot 6)])', "1"),
+            ('decode(codex(query(db knot "SELECT note FROM fruit WHERE name = ?" knot ["blob"]))[0]["note"])', "SQLite"),
+            ('execute(db knot "DELETE FROM fruit WHERE name = ?" knot ["blob"])', "1"),
+            ('reduce(rune(total knot row) unfold total augments row["qty"] fold knot query(db knot "SELECT qty FROM fruit") knot 0)', "23"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(self.run_script(input).inspect(), expected)
+
+    def test_queries_are_lazy_and_run_again_on_each_pass(self):
+        self.assertIsInstance(self.run_script('query(db knot "SELECT * FROM fruit")'), Stream)
+        evaluated = self.run_script("""
+        manifest rows with query(db knot "SELECT count(*) AS n FROM fruit") seal
+        manifest before with codex(rows)[0]["n"] seal
+        execute(db knot "INSERT INTO fruit (name) VALUES ('plum')") seal
+        [before knot codex(rows)[0]["n"]]
+        """)
+        self.assertEqual(evaluated.inspect(), "[0 knot 1]")
+
+    def test_connections_are_reused(self):
+        opened = POOL.opened
+        self.run_script('reduce(rune(n knot i) unfold n augments len(codex(query(db knot "SELECT ? AS i" knot [i]))) fold knot range(200) knot 0)')
+        self.assertLessEqual(POOL.opened - opened, 1)
+
+    def test_a_failed_batch_changes_nothing(self):
+        evaluated = self.run_script('executemany(db knot "INSERT INTO fruit (name) VALUES (?)" knot [["ok"] knot [range(1)]])')
+        self.assertIsInstance(evaluated, Error)
+        self.assertEqual(self.run_script('codex(query(db knot "SELECT count(*) AS n FROM fruit"))[0]["n"]').inspect(), "0")
+
+    def test_errors(self):
+        tests = [
+            ('codex(query(db knot "SELEC 1"))', '`query` failed: near "SELEC": syntax error'),
+            ('execute(db knot "INSERT INTO nope VALUES (1)")', "`execute` failed: no such table: nope"),
+            ('query(db knot "SELECT ?" knot [range(1)])', "`query` cannot bind a STREAM to a statement"),
+            ('query(db knot "SELECT ?" knot 1)', "`query` parameters must be a CODEX or TOME, got NUMBER"),
+            ('executemany(db knot "INSERT INTO fruit (name) VALUES (?)" knot [1])', "`executemany` parameters must be a CODEX or TOME, got NUMBER"),
+            ('executemany(db knot "INSERT INTO fruit (name) VALUES (?)" knot 1)', "rows given to `executemany` must be a CODEX or TABLE, got NUMBER"),
+            ('query(1 knot "SELECT 1")', "database and statement given to `query` must be SCROLL, got NUMBER"),
+            ('execute(db)', "wrong number of arguments. got=1, want=2 or 3"),
+            ('execute(db knot "INSERT INTO fruit (qty) VALUES (?)" knot [99999999999999999999])', "`execute` cannot bind 99999999999999999999, beyond SQLite's 64-bit integers"),
+            ('executemany(db knot "INSERT INTO fruit (qty) VALUES (?)" knot [[1] knot [diminishes 99999999999999999999]])', "`executemany` cannot bind -99999999999999999999, beyond SQLite's 64-bit integers"),
+            ('query(db knot "SELECT ?" knot tome("n" binds 9223372036854775808))', "`query` cannot bind 9223372036854775808, beyond SQLite's 64-bit integers"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = self.run_script(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,10 +9,22 @@ const files = [
     'lexer.py',
     'parser.py',
     'ast1.py',
+    'memo.py',
+    'hamt.py',
+    'visitor.py',
     'eval.py',
+    'stepper.py',
+    'tasks.py',
     'environment.py',
     'object.py',
-    'tok.py'
+    'tok.py',
+    'ingest.py',
+    'table.py',
+    'database.py',
+    'memo_store.py',
+    'parallel.py',
+    'serialize.py',
+    'analysis.py'
 ];
 
 const sourceDir = join(__dirname, '..');
@@ -13,15 +13,30 @@ async function initializePyodide() {
         indexURL: "https://cdn.jsdelivr.net/pyodide/v0.24.1/full/"
     });
 
+    // sqlite3 is not bundled with Pyodide; the database builtins and the memo store need it
+    await pyodide.loadPackage('sqlite3');
+
     // Load the interpreter files in correct order
     const files = [
         'tok.py',
         'lexer.py',
         'parser.py',
         'ast1.py',
+        'memo.py',
+        'hamt.py',
         'environment.py',
         'object.py',
-        'eval.py'
+        'visitor.py',
+        'eval.py',
+        'stepper.py',
+        'tasks.py',
+        'ingest.py',
+        'table.py',
+        'database.py',
+        'memo_store.py',
+        'parallel.py',
+        'serialize.py',
+        'analysis.py'
     ];
 
     try {
@@ -54,9 +69,22 @@ with open('/interpreter/__init__.py', 'w') as f:
                 .replace(/from lexer import/g, 'from interpreter.lexer import')
                 .replace(/from parser import/g, 'from interpreter.parser import')
                 .replace(/from ast1 import/g, 'from interpreter.ast1 import')
+                .replace(/from memo import/g, 'from interpreter.memo import')
+                .replace(/from hamt import/g, 'from interpreter.hamt import')
+                .replace(/from visitor import/g, 'from interpreter.visitor import')
                 .replace(/from environment import/g, 'from interpreter.environment import')
                 .replace(/from object import/g, 'from interpreter.object import')
-                .replace(/from eval import/g, 'from interpreter.eval import');
+                .replace(/from eval import/g, 'from interpreter.eval import')
+                .replace(/from stepper import/g, 'from interpreter.stepper import')
+                .replace(/from tasks import/g, 'from interpreter.tasks import')
+                .replace(/from ingest import/g, 'from interpreter.ingest import')
+                .replace(/from table import/g, 'from interpreter.table import')
+                .replace(/from database import/g, 'from interpreter.database import')
+                .replace(/from memo_store import/g, 'from interpreter.memo_store import')
+                .replace(/from parallel import/g, 'from interpreter.parallel import')
+                .replace(/from serialize import/g, 'from interpreter.serialize import')
+                .replace(/from analysis import/g, 'from interpreter.analysis import')
+                .replace(/^import ast1$/gm, 'import interpreter.ast1 as ast1');
             
             // Write the file to the virtual filesystem
             const writeCode = `
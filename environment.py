@@ -24,3 +24,13 @@ class Environment:
     def set(self, name: str, val: Object) -> Object:
         self.store[name] = val
         return val
+
+    def assign(self, name: str, val: Object) -> bool:
+        """Rebind name in the nearest scope that holds it, if any does"""
+        env = self
+        while env is not None:
+            if name in env.store:
+                env.store[name] = val
+                return True
+            env = env.outer
+        return False
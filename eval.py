@@ -1,6 +1,20 @@
 from object import *
 from ast1 import *
 from environment import Environment
+from memo import LRUCache, DEFAULT_MEMO_SIZE, memo_key
+from hamt import HAMT
+from visitor import walk
+import operator as op
+from array import array
+from itertools import islice
+from typing import Tuple
+from weakref import WeakKeyDictionary
+import mmap
+import os
+import re
+import subprocess
+import sys
+import time
 
 # Esoteric operator mappings
 OPERATOR_MAP = {
@@ -15,6 +29,21 @@ OPERATOR_MAP = {
     "diverges": "!="
 }
 
+# Element-wise operations on vectors and matrices; numpy overloads the standard operators
+ELEMENTWISE_OPERATORS = {
+    "augments": op.add,
+    "diminishes": op.sub,
+    "conjoins": op.mul,
+    "divide": op.truediv,
+    "descends": op.lt,
+    "ascends": op.gt,
+    "mirrors": op.eq,
+    "diverges": op.ne,
+}
+
+# Value types held in numpy arrays
+NUMPY_TYPES = (VECTOR_OBJ, MATRIX_OBJ)
+
 # instead of creating new instance every time using singletons
 VERITY = Boolean(True)
 FALLACY = Boolean(False)
@@ -24,50 +53,83 @@ def is_mishap(obj: Object) -> bool:
     return obj is not None and obj.type() == ERROR_OBJ
 
 def Eval(node: Node, env: Environment) -> Object:
-    if isinstance(node, Program):
+    # exact type checks: nodes derive from abc.ABC, whose isinstance is slow
+    node_type = type(node)
+    if node_type is Program:
         return eval_program(node, env)
-    elif isinstance(node, ExpressionStatement):
+    elif node_type is ExpressionStatement:
         return Eval(node.expression, env)
-    elif isinstance(node, IntegerLiteral):
+    elif node_type is IntegerLiteral:
         return Integer(node.value)
-    elif isinstance(node, BooleanLiteral):
+    elif node_type is BooleanLiteral:
         return VERITY if node.value else FALLACY
-    elif isinstance(node, StringLiteral):
+    elif node_type is StringLiteral:
         return String(node.value)
-    elif isinstance(node, PrefixExpression):
+    elif node_type is PrefixExpression:
         right = Eval(node.right, env)
         if is_mishap(right):
             return right
+        # operand type proven by type inference, no need to check it again
+        if node.operand_type == INTEGER_OBJ and node.operator == "diminishes":
+            return Integer(-right.value)
         return eval_prefix_expression(node.operator, right, env)
-    elif isinstance(node, InfixExpression):
+    elif node_type is InfixExpression:
         left = Eval(node.left, env)
         if is_mishap(left):
             return left
         right = Eval(node.right, env)
         if is_mishap(right):
             return right
+        # operand types proven by type inference, no need to check them again
+        if node.operand_type == INTEGER_OBJ:
+            return eval_integer_infix_expression(node.operator, left, right)
+        elif node.operand_type == STRING_OBJ:
+            return eval_string_infix_expression(node.operator, left, right)
         return eval_infix_expression(node.operator, left, right)
-    elif isinstance(node, BlockStatement):
+    elif node_type is BlockStatement:
         return eval_block_statement(node, env)
-    elif isinstance(node, IfExpression):
+    elif node_type is IfExpression:
         return eval_if_expression(node, env)
-    elif isinstance(node, ReturnStatement):
+    elif node_type is ReturnStatement:
         val = Eval(node.return_value, env)
         if is_mishap(val):
             return val
         return ReturnValue(val)
-    elif isinstance(node, LetStatement):
+    elif node_type is LetStatement:
         val = Eval(node.value, env)
         if is_mishap(val):
             return val
         env.set(node.name.value, val)
-    elif isinstance(node, Identifier):
+    elif node_type is AssignStatement:
+        val = Eval(node.value, env)
+        if is_mishap(val):
+            return val
+        if not env.assign(node.name.value, val):
+            return Error(f"cannot transmute unmanifested name: {node.name.value}")
+    elif node_type is WhileStatement:
+        return eval_while_statement(node, env)
+    elif node_type is Identifier:
         return eval_identifier(node, env)
-    elif isinstance(node, FunctionLiteral):
+    elif node_type is FunctionLiteral:
         params = node.parameters
         body = node.body
         return Function(params, body, env)
-    elif isinstance(node, CallExpression):
+    elif node_type is ArrayLiteral:
+        elements = eval_expressions(node.elements, env)
+        if elements and is_mishap(elements[0]):
+            return elements[0]
+        return Array(elements)
+    elif node_type is HashLiteral:
+        return eval_hash_literal(node, env)
+    elif node_type is IndexExpression:
+        left = Eval(node.left, env)
+        if is_mishap(left):
+            return left
+        index = Eval(node.index, env)
+        if is_mishap(index):
+            return index
+        return eval_index_expression(left, index)
+    elif node_type is CallExpression:
         function = Eval(node.function, env)
         if is_mishap(function):
             return function
@@ -123,6 +185,8 @@ def eval_bang_operator_expression(right: Object) -> Object:
     return FALLACY
 
 def eval_minus_prefix_operator_expression(right: Object) -> Object:
+    if right.type() in NUMPY_TYPES and right.values.dtype != bool:
+        return type(right)(-right.values)
     if right.type() != INTEGER_OBJ:
         return Error(f"unknown operator: diminishes {right.type()}")
     value = right.value
@@ -130,6 +194,8 @@ def eval_minus_prefix_operator_expression(right: Object) -> Object:
 
 def eval_infix_expression(operator: str, left: Object, right: Object) -> Object:
     """Evaluate an infix expression"""
+    if left.type() in NUMPY_TYPES or right.type() in NUMPY_TYPES:
+        return eval_elementwise_infix_expression(operator, left, right)
     if left.type() != right.type():
         return Error(f"type mismatch: {left.type()} {operator} {right.type()}")
     if left.type() == INTEGER_OBJ and right.type() == INTEGER_OBJ:
@@ -142,14 +208,39 @@ def eval_infix_expression(operator: str, left: Object, right: Object) -> Object:
         return VERITY if left != right else FALLACY
     return Error(f"unknown operator: {left.type()} {operator} {right.type()}")
 
+def eval_elementwise_infix_expression(operator: str, left: Object, right: Object) -> Object:
+    """
+    Apply an operator to every element at once. A NUMBER applies to every
+    element, and a vector to every row of a matrix.
+    """
+    operands = []
+    for operand in (left, right):
+        if operand.type() in NUMPY_TYPES:
+            operands.append(operand.values)
+        elif operand.type() == INTEGER_OBJ:
+            operands.append(operand.value)
+        else:
+            return Error(f"type mismatch: {left.type()} {operator} {right.type()}")
+    operation = ELEMENTWISE_OPERATORS.get(operator)
+    truths = any(getattr(operand, "dtype", None) == bool for operand in operands)
+    if operation is None or (truths and operator not in ("mirrors", "diverges")):
+        return Error(f"unknown operator: {left.type()} {operator} {right.type()}")
+    if left.type() == right.type() == VECTOR_OBJ and len(left) != len(right):
+        return Error(f"vector lengths differ: {len(left)} and {len(right)}")
+    try:
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return numpy_to_object(operation(*operands))
+    except OverflowError:
+        return Error(f"NUMBER does not fit in a {VECTOR_OBJ if VECTOR_OBJ in (left.type(), right.type()) else MATRIX_OBJ}: "
+                     f"{left.inspect() if left.type() == INTEGER_OBJ else right.inspect()}")
+    except ValueError:
+        return Error(f"shapes differ: {shape_of(left)} and {shape_of(right)}")
+
 def eval_string_infix_expression(operator: str, left: Object, right: Object) -> Object:
     """Evaluate a string infix expression"""
     if operator != "augments":
         return Error(f"unknown operator: {left.type()} {operator} {right.type()}")
-    
-    left_val = left.value
-    right_val = right.value
-    return String(left_val + right_val)
+    return String.concat(left, right)
 
 def eval_integer_infix_expression(operator: str, left: Integer, right: Integer) -> Object:
     left_val = left.value
@@ -186,6 +277,144 @@ def eval_if_expression(node: IfExpression, env: Environment) -> Object:
         return Eval(node.alternative, env)
     return VOID
 
+# Python operations for the operators on two NUMBERs, so a loop looks each up once
+NUMBER_ARITHMETIC = {"augments": op.add, "diminishes": op.sub, "conjoins": op.mul, "divide": op.truediv}
+NUMBER_COMPARISONS = {"descends": op.lt, "ascends": op.gt, "mirrors": op.eq, "diverges": op.ne}
+
+# A loop's condition and body statements prepared as Python functions, worked out once per loop
+_prepared_loops: "WeakKeyDictionary[WhileStatement, Tuple[Callable, List[Callable]]]" = WeakKeyDictionary()
+
+def eval_while_statement(node: WhileStatement, env: Environment) -> Optional[Object]:
+    # the body runs in the enclosing environment, so an iteration allocates no scope
+    prepared = _prepared_loops.get(node)
+    if prepared is None:
+        prepared = (prepare(node.condition), [prepare(statement) for statement in node.body.statements])
+        _prepared_loops[node] = prepared
+    condition, body = prepared
+    while True:
+        test = condition(env)
+        if test is not VERITY:
+            if is_mishap(test):
+                return test
+            if not is_truthy(test):
+                return None
+        for statement in body:
+            result = statement(env)
+            if result is not None and (result.type() == RETURN_VALUE_OBJ or result.type() == ERROR_OBJ):
+                return result
+
+def prepare(node: Node) -> Callable[[Environment], Optional[Object]]:
+    """
+    A function evaluating node as Eval does, with what to do for each kind
+    of node settled once instead of on every pass through a loop. Names,
+    literals, operators, bindings and whence get functions of their own,
+    and operators on two NUMBERs skip the checks for other types; any other
+    node is handed to Eval.
+    """
+    node_type = type(node)
+    if node_type is ExpressionStatement:
+        return prepare(node.expression)
+    if node_type is IntegerLiteral:
+        constant = Integer(node.value)  # NUMBERs never change, so one serves every pass
+        return lambda env: constant
+    if node_type is BooleanLiteral:
+        truth = VERITY if node.value else FALLACY
+        return lambda env: truth
+    if node_type is Identifier:
+        name = node.value
+
+        def identifier(env: Environment) -> Object:
+            val = env.store.get(name)
+            return val if val is not None else eval_identifier(node, env)
+        return identifier
+    if node_type is InfixExpression:
+        return prepare_infix(node)
+    if node_type is PrefixExpression:
+        right_code, operator = prepare(node.right), node.operator
+
+        def prefix(env: Environment) -> Object:
+            right = right_code(env)
+            if type(right) is Integer and operator == "diminishes":
+                return Integer(-right.value)
+            if is_mishap(right):
+                return right
+            return eval_prefix_expression(operator, right, env)
+        return prefix
+    if node_type is AssignStatement or node_type is LetStatement:
+        value_code, name, assigns = prepare(node.value), node.name.value, node_type is AssignStatement
+
+        def binding(env: Environment) -> Optional[Object]:
+            val = value_code(env)
+            if type(val) is not Integer and is_mishap(val):
+                return val
+            if not assigns:
+                env.set(name, val)
+            elif not env.assign(name, val):
+                return Error(f"cannot transmute unmanifested name: {name}")
+            return None
+        return binding
+    if node_type is IfExpression:
+        condition_code = prepare(node.condition)
+        consequence = prepare_block(node.consequence)
+        alternative = prepare_block(node.alternative) if node.alternative else None
+
+        def whence(env: Environment) -> Object:
+            condition = condition_code(env)
+            if is_mishap(condition):
+                return condition
+            if is_truthy(condition):
+                return consequence(env)
+            elif alternative is not None:
+                return alternative(env)
+            return VOID
+        return whence
+    return lambda env: Eval(node, env)
+
+def prepare_infix(node: InfixExpression) -> Callable[[Environment], Object]:
+    left_code, right_code, operator = prepare(node.left), prepare(node.right), node.operator
+    arithmetic, comparison = NUMBER_ARITHMETIC.get(operator), NUMBER_COMPARISONS.get(operator)
+    if type(node.right) is IntegerLiteral and (arithmetic or comparison) is not None:
+        # a NUMBER on the right, as in i descends 1000 or i augments 1, is read once
+        number = node.right.value
+
+        def with_number(env: Environment) -> Object:
+            left = left_code(env)
+            if type(left) is Integer:
+                if comparison is not None:
+                    return VERITY if comparison(left.value, number) else FALLACY
+                return Integer(arithmetic(left.value, number))
+            if is_mishap(left):
+                return left
+            return eval_infix_expression(operator, left, Integer(number))
+        return with_number
+
+    def infix(env: Environment) -> Object:
+        left = left_code(env)
+        if type(left) is not Integer and is_mishap(left):
+            return left
+        right = right_code(env)
+        if type(left) is Integer and type(right) is Integer:
+            if comparison is not None:
+                return VERITY if comparison(left.value, right.value) else FALLACY
+            if arithmetic is not None:
+                return Integer(arithmetic(left.value, right.value))
+        if is_mishap(right):
+            return right
+        return eval_infix_expression(operator, left, right)
+    return infix
+
+def prepare_block(block: BlockStatement) -> Callable[[Environment], Object]:
+    statements = [prepare(statement) for statement in block.statements]
+
+    def run_block(env: Environment) -> Object:
+        result = None
+        for statement in statements:
+            result = statement(env)
+            if result is not None and (result.type() == RETURN_VALUE_OBJ or result.type() == ERROR_OBJ):
+                return result
+        return result
+    return run_block
+
 def is_truthy(obj: Object) -> bool:
     if obj == VERITY:
         return True
@@ -195,11 +424,1055 @@ def is_truthy(obj: Object) -> bool:
         return False
     return True
 
+def eval_hash_literal(node: HashLiteral, env: Environment) -> Object:
+    pairs = HAMT()
+    for key_node, value_node in node.pairs:
+        key = Eval(key_node, env)
+        if is_mishap(key):
+            return key
+        filed = hash_key(key)
+        if filed is None:
+            return Error(f"unusable as tome key: {key.type()}")
+        value = Eval(value_node, env)
+        if is_mishap(value):
+            return value
+        pairs = pairs.set(filed, (key, value))
+    return Hash(pairs)
+
+def eval_hash_index_expression(tome: Hash, key: Object, default: Object) -> Object:
+    filed = hash_key(key)
+    if filed is None:
+        return Error(f"unusable as tome key: {key.type()}")
+    pair = tome.pairs.get(filed)
+    return default if pair is None else pair[1]
+
+def eval_index_expression(left: Object, index: Object) -> Object:
+    if left.type() == HASH_OBJ:
+        return eval_hash_index_expression(left, index, VOID)
+    if left.type() == TABLE_OBJ and index.type() == STRING_OBJ:
+        return left.columns.get(index.value, VOID)
+    if left.type() == MATCH_OBJ and index.type() in (INTEGER_OBJ, STRING_OBJ):
+        return eval_match_index_expression(left, index)
+    if left.type() not in (ARRAY_OBJ, BYTES_OBJ) + NUMPY_TYPES or index.type() != INTEGER_OBJ:
+        return Error(f"index operator not supported: {left.type()}[{index.type()}]")
+    position = index.value
+    if position != int(position):
+        return Error(f"codex index must be a whole NUMBER, got {index.inspect()}")
+    position = int(position)
+    if position < 0 or position >= len(left):
+        return VOID
+    if left.type() in NUMPY_TYPES:
+        return numpy_to_object(left.values[position])
+    return left.at(position)
+
+def eval_match_index_expression(match: Match, index: Object) -> Object:
+    """A group of a match, by number or name, or VOID if there is none or it matched nothing"""
+    group = index.value
+    if index.type() == INTEGER_OBJ:
+        if group != int(group):
+            return Error(f"match index must be a whole NUMBER, got {index.inspect()}")
+        group = int(group)
+    try:
+        text = match.match.group(group)
+    except IndexError:
+        return VOID
+    return String(text) if text is not None else VOID
+
+def numpy_to_object(value) -> Object:
+    """Wrap a numpy result as a MATRIX, VECTOR, TRUTH or NUMBER by its dimensions"""
+    if numpy.ndim(value) == 2:
+        return Matrix(value)
+    if numpy.ndim(value) == 1:
+        return Vector(value)
+    value = value.item() if isinstance(value, numpy.generic) else value
+    if isinstance(value, bool):
+        return VERITY if value else FALLACY
+    return Integer(value)
+
+def shape_of(obj: Object) -> str:
+    if obj.type() in NUMPY_TYPES:
+        return "x".join(str(size) for size in obj.values.shape)
+    return obj.type()
+
 def eval_identifier(node: Identifier, env: Environment) -> Object:
     val, exists = env.get(node.value)
-    if not exists:
-        return Error(f"identifier not found: {node.value}")
-    return val
+    if exists:
+        return val
+    builtin = BUILTINS.get(node.value)
+    if builtin is not None:
+        return builtin
+    return Error(f"identifier not found: {node.value}")
+
+def builtin_memoize(*args: Object) -> Object:
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+    fn = args[0]
+    if not isinstance(fn, (Function, Builtin, Memoized)):
+        return Error(f"argument to `memoize` must be RITUAL, got {fn.type()}")
+    size = DEFAULT_MEMO_SIZE
+    if len(args) == 2:
+        if args[1].type() != INTEGER_OBJ or args[1].value < 0:
+            return Error(f"memo size must be a NUMBER of at least 0, got {args[1].inspect()}")
+        size = int(args[1].value)
+    return Memoized(fn, LRUCache(size))
+
+def builtin_persist(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[1].type() != STRING_OBJ:
+        return Error(f"memo store path must be SCROLL, got {args[1].type()}")
+    memoized = builtin_memoize(args[0], *args[2:])
+    if is_mishap(memoized):
+        return memoized
+    # imported here so that interpreters built without sqlite3 still load
+    try:
+        import sqlite3
+        from memo_store import SqliteMemoStore
+    except ImportError:
+        return Error("persist is not available: sqlite3 is missing")
+    try:
+        memoized.store = SqliteMemoStore(args[1].value)
+        memoized.store.connect()
+    except sqlite3.Error as e:
+        return Error(f"cannot open memo store {args[1].value}: {e}")
+    return memoized
+
+def builtin_memostats(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if not isinstance(args[0], Memoized):
+        return Error(f"argument to `memostats` must be a memoized RITUAL, got {args[0].inspect()}")
+    stats = args[0].cache.stats()
+    if args[0].store is not None:
+        stats += " knot " + args[0].store.stats()
+    return String(stats)
+
+def builtin_len(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() in (STRING_OBJ, ARRAY_OBJ, HASH_OBJ, BYTES_OBJ, TABLE_OBJ, MATCH_OBJ) + NUMPY_TYPES:
+        return Integer(len(args[0]))
+    return Error(f"argument to `len` not supported, got {args[0].type()}")
+
+def builtin_push(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[0].type() != ARRAY_OBJ:
+        return Error(f"argument to `push` must be CODEX, got {args[0].type()}")
+    return args[0].push(args[1])
+
+def builtin_concat(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    for arg in args:
+        if arg.type() != ARRAY_OBJ:
+            return Error(f"arguments to `concat` must be CODEX, got {arg.type()}")
+    return args[0].concat(args[1])
+
+def codex_to_numpy(codex: Array, name: str):
+    """The elements of a codex as a 1-D numpy array, or a MISHAP saying why not"""
+    if codex.packed:
+        # the slice is a private copy, so the result shares nothing with the codex
+        return numpy.frombuffer(codex.items[:len(codex)], dtype=numpy.int64)
+    elements = codex.elements()
+    element_type = elements[0].type()
+    for element in elements:
+        if element.type() not in (INTEGER_OBJ, BOOLEAN_OBJ) or element.type() != element_type:
+            return Error(f"{name} elements must all be NUMBER or all be TRUTH, got {element.type()}")
+    try:
+        return numpy.array([element.value for element in elements])
+    except OverflowError:
+        return Error(f"{name} elements must fit in 64 bits")
+
+def builtin_lookup(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[0].type() != HASH_OBJ:
+        return Error(f"argument to `lookup` must be TOME, got {args[0].type()}")
+    return eval_hash_index_expression(args[0], args[1], args[2] if len(args) == 3 else VOID)
+
+def builtin_insert(*args: Object) -> Object:
+    if len(args) != 3:
+        return Error(f"wrong number of arguments. got={len(args)}, want=3")
+    if args[0].type() != HASH_OBJ:
+        return Error(f"argument to `insert` must be TOME, got {args[0].type()}")
+    filed = hash_key(args[1])
+    if filed is None:
+        return Error(f"unusable as tome key: {args[1].type()}")
+    return Hash(args[0].pairs.set(filed, (args[1], args[2])))
+
+def builtin_delete(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[0].type() != HASH_OBJ:
+        return Error(f"argument to `delete` must be TOME, got {args[0].type()}")
+    filed = hash_key(args[1])
+    if filed is None:
+        return Error(f"unusable as tome key: {args[1].type()}")
+    pairs = args[0].pairs.delete(filed)
+    return args[0] if pairs is args[0].pairs else Hash(pairs)
+
+def builtin_vector(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if numpy is None:
+        return Error("vectors are not available: numpy is missing")
+    if args[0].type() != ARRAY_OBJ:
+        return Error(f"argument to `vector` must be CODEX, got {args[0].type()}")
+    values = codex_to_numpy(args[0], "vector")
+    if isinstance(values, Error):
+        return values
+    return Vector(values)
+
+def builtin_matrix(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if numpy is None:
+        return Error("matrices are not available: numpy is missing")
+    if args[0].type() != ARRAY_OBJ or len(args[0]) == 0:
+        return Error(f"argument to `matrix` must be a CODEX of rows, got {args[0].inspect()}")
+    rows = []
+    for row in args[0].elements():
+        if row.type() == VECTOR_OBJ:
+            rows.append(row.values)
+        elif row.type() == ARRAY_OBJ:
+            values = codex_to_numpy(row, "matrix")
+            if isinstance(values, Error):
+                return values
+            rows.append(values)
+        else:
+            return Error(f"matrix rows must be CODEX or VECTOR, got {row.type()}")
+        if len(rows[-1]) != len(rows[0]):
+            return Error(f"matrix rows must have the same length, got {len(rows[0])} and {len(rows[-1])}")
+        if (rows[-1].dtype == bool) != (rows[0].dtype == bool):
+            return Error("matrix rows must all hold NUMBERs or all hold TRUTHs")
+    return Matrix(numpy.stack(rows))
+
+def builtin_matmul(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    for arg in args:
+        if arg.type() not in NUMPY_TYPES or arg.values.dtype == bool:
+            return Error(f"arguments to `matmul` must be VECTOR or MATRIX of NUMBERs, got {arg.type()}")
+    try:
+        return numpy_to_object(numpy.matmul(args[0].values, args[1].values))
+    except ValueError:
+        return Error(f"matmul shapes do not align: {shape_of(args[0])} and {shape_of(args[1])}")
+
+def builtin_transpose(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != MATRIX_OBJ:
+        return Error(f"argument to `transpose` must be MATRIX, got {args[0].type()}")
+    return Matrix(args[0].values.T)
+
+def matrix_slice(name: str, axis: int) -> Builtin:
+    """A builtin taking the rows or columns of a matrix from start up to stop"""
+    def builtin(*args: Object) -> Object:
+        if len(args) != 3:
+            return Error(f"wrong number of arguments. got={len(args)}, want=3")
+        if args[0].type() != MATRIX_OBJ:
+            return Error(f"argument to `{name}` must be MATRIX, got {args[0].type()}")
+        for bound in args[1:]:
+            if bound.type() != INTEGER_OBJ or bound.value != int(bound.value):
+                return Error(f"bounds of `{name}` must be whole NUMBERs, got {bound.inspect()}")
+        selected = slice(int(args[1].value), int(args[2].value))
+        return Matrix(args[0].values[selected] if axis == 0 else args[0].values[:, selected])
+    return Builtin(name, builtin)
+
+def numpy_reduction(name: str) -> Builtin:
+    """A builtin reducing a vector or matrix, whole or along one axis, by the numpy method of that name"""
+    def builtin(*args: Object) -> Object:
+        if len(args) not in (1, 2):
+            return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+        target = args[0]
+        if target.type() not in NUMPY_TYPES:
+            return Error(f"argument to `{name}` must be VECTOR or MATRIX, got {target.type()}")
+        axis = None
+        if len(args) == 2:
+            axis = whole_number(args[1], name)
+            if isinstance(axis, Error):
+                return axis
+            dimensions = target.values.ndim
+            if axis not in range(dimensions):
+                return Error(f"axis of `{name}` must be a NUMBER below {dimensions}, got {args[1].inspect()}")
+        if target.values.size == 0 and name != "sum":
+            return Error(f"`{name}` of an empty {target.type()}")
+        return numpy_to_object(getattr(target.values, name)(axis=axis))
+    return Builtin(name, builtin)
+
+def builtin_shape(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() not in NUMPY_TYPES:
+        return Error(f"argument to `shape` must be VECTOR or MATRIX, got {args[0].type()}")
+    return Array(Integer(size) for size in args[0].values.shape)
+
+def rune_caller(fn: Object, arity: int, name: str):
+    """
+    A Python function applying fn to arity arguments, for builtins that call
+    a rune once per element: what kind of ritual fn is gets settled here,
+    once, rather than on every call. A MISHAP if fn cannot be called so.
+    """
+    if isinstance(fn, Function):
+        if len(fn.parameters) != arity:
+            return Error(f"rune given to `{name}` takes wrong number of arguments. got={len(fn.parameters)}, want={arity}")
+        names = [param.value for param in fn.parameters]
+        body, outer = fn.body, fn.env
+        if any(type(node) is FunctionLiteral for node in walk(body)):
+            # a rune made in the body may keep its frame, so each call needs its own
+            def call(*args: Object) -> Object:
+                result = Eval(body, Environment(dict(zip(names, args)), outer))
+                return result.value if type(result) is ReturnValue else result
+            return call
+        return prepared_call(names, body, outer)
+    if isinstance(fn, Memoized):
+        return lambda *args: apply_memoized(fn, list(args))
+    if isinstance(fn, Builtin):
+        if fn.name in BLOCKING_BUILTINS:
+            return lambda *args: apply_function(fn, list(args))
+        return fn.fn
+    return Error(f"argument to `{name}` must be RITUAL, got {fn.type()}")
+
+def prepared_call(names: List[str], body: BlockStatement, outer: Environment):
+    """
+    Call a rune in one frame reused for every call, its parameters rebound
+    each time. A call that arrives while the frame is in use, through the
+    rune consuming its own stream, gets a fresh frame instead.
+    """
+    frame = Environment(outer=outer)
+    store = frame.store
+    busy = False
+
+    def call(*args: Object) -> Object:
+        nonlocal busy
+        if busy:
+            result = Eval(body, Environment(dict(zip(names, args)), outer))
+            return result.value if type(result) is ReturnValue else result
+        busy = True
+        try:
+            # names manifest by the last call must not leak into this one
+            if len(store) != len(names):
+                store.clear()
+            for param, arg in zip(names, args):
+                store[param] = arg
+            result = Eval(body, frame)
+        finally:
+            busy = False
+        return result.value if type(result) is ReturnValue else result
+    return call
+
+def whole_number(obj: Object, name: str):
+    """The int a NUMBER argument stands for, or a MISHAP if it is not whole"""
+    if obj.type() != INTEGER_OBJ:
+        return Error(f"arguments to `{name}` must be NUMBER, got {obj.type()}")
+    if obj.value != int(obj.value):
+        return Error(f"arguments to `{name}` must be whole NUMBERs, got {obj.inspect()}")
+    return int(obj.value)
+
+def builtin_range(*args: Object) -> Object:
+    if len(args) not in (1, 2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1, 2 or 3")
+    bounds = []
+    for arg in args:
+        bound = whole_number(arg, "range")
+        if isinstance(bound, Error):
+            return bound
+        bounds.append(bound)
+    if len(bounds) == 3 and bounds[2] == 0:
+        return Error("`range` step must not be 0")
+    numbers = range(*bounds)
+    return Stream(lambda: map(Integer, numbers))
+
+def builtin_map(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[1].type() not in (ARRAY_OBJ, STREAM_OBJ):
+        return Error(f"argument to `map` must be CODEX or STREAM, got {args[1].type()}")
+    call = rune_caller(args[0], 1, "map")
+    if isinstance(call, Error):
+        return call
+    source = args[1]
+    if source.type() == ARRAY_OBJ:
+        results = []
+        for element in source.elements():
+            result = call(element)
+            if is_mishap(result):
+                return result
+            results.append(result)
+        return Array(results)
+
+    def mapped() -> Iterator[Object]:
+        for element in source:
+            if is_mishap(element):
+                yield element
+                return
+            yield call(element)
+    return Stream(mapped)
+
+def builtin_filter(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[1].type() == TABLE_OBJ:
+        from table import filter_rows
+        return filter_rows(args[0], args[1])
+    if args[1].type() not in (ARRAY_OBJ, STREAM_OBJ):
+        return Error(f"argument to `filter` must be CODEX, STREAM or TABLE, got {args[1].type()}")
+    call = rune_caller(args[0], 1, "filter")
+    if isinstance(call, Error):
+        return call
+    source = args[1]
+    if source.type() == ARRAY_OBJ:
+        kept = []
+        for element in source.elements():
+            keep = call(element)
+            if is_mishap(keep):
+                return keep
+            if is_truthy(keep):
+                kept.append(element)
+        return Array(kept)
+
+    def filtered() -> Iterator[Object]:
+        for element in source:
+            if is_mishap(element):
+                yield element
+                return
+            keep = call(element)
+            if is_mishap(keep):
+                yield keep
+                return
+            if is_truthy(keep):
+                yield element
+    return Stream(filtered)
+
+def builtin_take(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[0].type() != STREAM_OBJ:
+        return Error(f"argument to `take` must be STREAM, got {args[0].type()}")
+    count = whole_number(args[1], "take")
+    if isinstance(count, Error):
+        return count
+    source = args[0]
+    return Stream(lambda: islice(source, max(count, 0)))
+
+def builtin_reduce(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[1].type() not in (ARRAY_OBJ, STREAM_OBJ):
+        return Error(f"argument to `reduce` must be CODEX or STREAM, got {args[1].type()}")
+    call = rune_caller(args[0], 2, "reduce")
+    if isinstance(call, Error):
+        return call
+    elements = iter(args[1].elements() if args[1].type() == ARRAY_OBJ else args[1])
+    if len(args) == 3:
+        result = args[2]
+    else:
+        result = next(elements, None)
+        if result is None:
+            return Error(f"`reduce` of an empty {args[1].type()} needs an initial value")
+    if is_mishap(result):
+        return result
+    for element in elements:
+        if is_mishap(element):
+            return element
+        result = call(result, element)
+        if is_mishap(result):
+            return result
+    return result
+
+def builtin_pmap(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[1].type() not in (ARRAY_OBJ, STREAM_OBJ):
+        return Error(f"argument to `pmap` must be CODEX or STREAM, got {args[1].type()}")
+    call = rune_caller(args[0], 1, "pmap")
+    if isinstance(call, Error):
+        return call
+    workers = None
+    if len(args) == 3:
+        workers = whole_number(args[2], "pmap")
+        if isinstance(workers, Error):
+            return workers
+        if workers < 1:
+            return Error(f"`pmap` needs at least 1 worker, got {workers}")
+    if args[1].type() == ARRAY_OBJ:
+        elements = args[1].elements()
+    else:
+        elements = []
+        for element in args[1]:
+            if is_mishap(element):
+                return element
+            elements.append(element)
+    # imported here so that interpreters on platforms without processes still load
+    try:
+        from parallel import parallel_map
+    except ImportError as e:
+        return Error(f"pmap is not available: {e}")
+    return parallel_map(args[0], elements, workers)
+
+def builtin_channel(*args: Object) -> Object:
+    if len(args) > 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=0 or 1")
+    capacity = 1
+    if args:
+        capacity = whole_number(args[0], "channel")
+        if isinstance(capacity, Error):
+            return capacity
+        if capacity < 1:
+            return Error(f"`channel` capacity must be at least 1, got {capacity}")
+    return Channel(capacity)
+
+def builtin_send(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[0].type() != CHANNEL_OBJ:
+        return Error(f"argument to `send` must be CHANNEL, got {args[0].type()}")
+    channel = args[0]
+    if channel.closed:
+        return Error("send on a closed channel")
+    if len(channel.buffer) >= channel.capacity:
+        return Blocked("send", lambda: len(channel.buffer) < channel.capacity or channel.closed)
+    channel.buffer.append(args[1])
+    return VOID
+
+def builtin_receive(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != CHANNEL_OBJ:
+        return Error(f"argument to `receive` must be CHANNEL, got {args[0].type()}")
+    channel = args[0]
+    if channel.buffer:
+        return channel.buffer.popleft()
+    if channel.closed:
+        return VOID
+    return Blocked("receive", lambda: bool(channel.buffer) or channel.closed)
+
+def builtin_drained(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != CHANNEL_OBJ:
+        return Error(f"argument to `drained` must be CHANNEL, got {args[0].type()}")
+    channel = args[0]
+    # whether a receive would find nothing ever again, so wait for it to be known
+    if not channel.buffer and not channel.closed:
+        return Blocked("drained", lambda: bool(channel.buffer) or channel.closed)
+    return FALLACY if channel.buffer else VERITY
+
+def builtin_close(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != CHANNEL_OBJ:
+        return Error(f"argument to `close` must be CHANNEL, got {args[0].type()}")
+    args[0].closed = True
+    return VOID
+
+def builtin_spawn(*args: Object) -> Object:
+    if not args:
+        return Error("wrong number of arguments. got=0, want=at least 1")
+    if not isinstance(args[0], (Function, Builtin, Memoized)):
+        return Error(f"argument to `spawn` must be RITUAL, got {args[0].type()}")
+    from tasks import current_scheduler
+    return current_scheduler().spawn(args[0], list(args[1:]))
+
+def builtin_join(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != TASK_OBJ:
+        return Error(f"argument to `join` must be TASK, got {args[0].type()}")
+    task = args[0]
+    if not task.done:
+        return Blocked("join", lambda: task.done)
+    return task.result if task.result is not None else VOID
+
+# Builtins that may return Blocked, and so must be called through apply_function
+BLOCKING_BUILTINS = ("send", "receive", "drained", "join")
+
+def io_mishap(name: str, path: str, e: Exception) -> Error:
+    reason = e.strerror if isinstance(e, OSError) and e.strerror else str(e)
+    return Error(f"`{name}` cannot use {path}: {reason}")
+
+def builtin_read_file(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != STRING_OBJ:
+        return Error(f"argument to `read_file` must be SCROLL, got {args[0].type()}")
+    path = args[0].value
+    try:
+        with open(path, encoding="utf-8") as file:
+            return String(file.read())
+    except (OSError, UnicodeDecodeError) as e:
+        return io_mishap("read_file", path, e)
+
+def builtin_write_file(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    for arg in args:
+        if arg.type() != STRING_OBJ:
+            return Error(f"arguments to `write_file` must be SCROLL, got {arg.type()}")
+    path = args[0].value
+    try:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(args[1].value)
+    except OSError as e:
+        return io_mishap("write_file", path, e)
+    return VOID
+
+def sleep_seconds(args: Tuple[Object, ...]):
+    """The seconds sleep(milliseconds) asks for, or a mishap"""
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    milliseconds = whole_number(args[0], "sleep")
+    if isinstance(milliseconds, Error):
+        return milliseconds
+    if milliseconds < 0:
+        return Error(f"`sleep` time must not be negative, got {milliseconds}")
+    return milliseconds / 1000
+
+def builtin_sleep(*args: Object) -> Object:
+    seconds = sleep_seconds(args)
+    if isinstance(seconds, Error):
+        return seconds
+    time.sleep(seconds)
+    return VOID
+
+def command_line(args: Tuple[Object, ...]):
+    """The program and arguments run(...) asks for, or a mishap"""
+    if not args:
+        return Error("wrong number of arguments. got=0, want=at least 1")
+    for arg in args:
+        if arg.type() != STRING_OBJ:
+            return Error(f"arguments to `run` must be SCROLL, got {arg.type()}")
+    return [arg.value for arg in args]
+
+def command_output(argv: List[str], status: int, out: bytes, err: bytes) -> Object:
+    if status != 0:
+        message = err.decode("utf-8", "replace").strip()
+        return Error(f"`run` of {argv[0]} exited with status {status}" + (f": {message}" if message else ""))
+    return String(out.decode("utf-8", "replace"))
+
+def builtin_run(*args: Object) -> Object:
+    argv = command_line(args)
+    if isinstance(argv, Error):
+        return argv
+    try:
+        done = subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True)
+    except OSError as e:
+        return io_mishap("run", argv[0], e)
+    return command_output(argv, done.returncode, done.stdout, done.stderr)
+
+def builtin_mapfile(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != STRING_OBJ:
+        return Error(f"argument to `mapfile` must be SCROLL, got {args[0].type()}")
+    path = args[0].value
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return Bytes(b"")  # an empty file cannot be mapped
+            # the mapping outlives the file object, and the OS pages it in as it is read
+            return Bytes(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError) as e:
+        return io_mishap("mapfile", path, e)
+
+def builtin_slice(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[0].type() != BYTES_OBJ:
+        return Error(f"argument to `slice` must be BYTES, got {args[0].type()}")
+    data = args[0]
+    bounds = [len(data)] * 2
+    for position, arg in enumerate(args[1:]):
+        bounds[position] = whole_number(arg, "slice")
+        if isinstance(bounds[position], Error):
+            return bounds[position]
+    # counted as Python counts slices, from the end when negative
+    start, end, _ = slice(*bounds).indices(len(data))
+    return data.slice(start, end)
+
+def builtin_find(*args: Object) -> Object:
+    if len(args) not in (2, 3):
+        return Error(f"wrong number of arguments. got={len(args)}, want=2 or 3")
+    if args[0].type() != BYTES_OBJ:
+        return Error(f"argument to `find` must be BYTES, got {args[0].type()}")
+    needle = args[1]
+    if needle.type() == STRING_OBJ:
+        needle = needle.value.encode("utf-8")
+    elif needle.type() == BYTES_OBJ:
+        needle = needle.view
+    else:
+        return Error(f"`find` looks for a SCROLL or BYTES, got {needle.type()}")
+    start = 0
+    if len(args) == 3:
+        start = whole_number(args[2], "find")
+        if isinstance(start, Error):
+            return start
+    return Integer(args[0].find(needle, min(max(start, 0), len(args[0]))))
+
+# Bytes read from a file at a time by `lines`, so that a line costs no system call
+LINE_BUFFER = 1 << 20
+
+def text_lines(file) -> Iterator[Object]:
+    """Each line of a text file as a SCROLL, without its line ending"""
+    try:
+        for line in file:
+            yield String(line[:-1] if line.endswith("\n") else line)
+    except UnicodeDecodeError as e:
+        yield Error(f"`lines` found bytes that are not UTF-8: {e.reason}")
+
+def file_lines(path: str) -> Iterator[Object]:
+    with open(path, encoding="utf-8", buffering=LINE_BUFFER) as file:
+        yield from text_lines(file)
+
+def builtin_lines(*args: Object) -> Object:
+    if len(args) > 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=0 or 1")
+    if not args:
+        # standard input can only be read once, so later passes carry on where the last stopped
+        return Stream(lambda: text_lines(sys.stdin))
+    if args[0].type() == BYTES_OBJ:
+        return Stream(args[0].lines)
+    if args[0].type() != STRING_OBJ:
+        return Error(f"argument to `lines` must be SCROLL or BYTES, got {args[0].type()}")
+    path = args[0].value
+    try:
+        # opened now only so that a missing file is a mishap here rather than partway through
+        open(path, "rb").close()
+    except OSError as e:
+        return io_mishap("lines", path, e)
+    return Stream(lambda: file_lines(path))
+
+def builtin_decode(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != BYTES_OBJ:
+        return Error(f"argument to `decode` must be BYTES, got {args[0].type()}")
+    try:
+        return String(str(args[0].view, "utf-8"))
+    except UnicodeDecodeError as e:
+        return Error(f"`decode` found bytes that are not UTF-8 at {e.start}")
+
+def builtin_read_csv(*args: Object) -> Object:
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+    for arg in args:
+        if arg.type() != STRING_OBJ:
+            return Error(f"arguments to `read_csv` must be SCROLL, got {arg.type()}")
+    delimiter = args[1].value if len(args) == 2 else ","
+    if len(delimiter) != 1:
+        return Error(f"`read_csv` delimiter must be one character, got {delimiter!r}")
+    # imported here, since ingest builds on this module
+    from ingest import read_csv
+    return read_csv(args[0].value, delimiter)
+
+def builtin_read_jsonl(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != STRING_OBJ:
+        return Error(f"argument to `read_jsonl` must be SCROLL, got {args[0].type()}")
+    from ingest import read_jsonl
+    return read_jsonl(args[0].value)
+
+def builtin_table(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != HASH_OBJ:
+        return Error(f"argument to `table` must be TOME, got {args[0].type()}")
+    # imported here, since table builds on this module
+    from table import make_table
+    return make_table(args[0])
+
+def column_names(names: Object, name: str):
+    """The SCROLLs of a codex as Python strings, or a mishap"""
+    if names.type() != ARRAY_OBJ:
+        return Error(f"columns given to `{name}` must be a CODEX of SCROLLs, got {names.type()}")
+    elements = names.elements()
+    for element in elements:
+        if element.type() != STRING_OBJ:
+            return Error(f"columns given to `{name}` must be a CODEX of SCROLLs, got {element.type()}")
+    return [element.value for element in elements]
+
+def builtin_select(*args: Object) -> Object:
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+    if args[0].type() != TABLE_OBJ:
+        return Error(f"argument to `select` must be TABLE, got {args[0].type()}")
+    names = column_names(args[1], "select")
+    if isinstance(names, Error):
+        return names
+    from table import select
+    return select(args[0], names)
+
+def builtin_group(*args: Object) -> Object:
+    if len(args) not in (3, 4):
+        return Error(f"wrong number of arguments. got={len(args)}, want=3 or 4")
+    if args[0].type() != TABLE_OBJ:
+        return Error(f"argument to `group` must be TABLE, got {args[0].type()}")
+    for arg in args[1:]:
+        if arg.type() != STRING_OBJ:
+            return Error(f"arguments to `group` after the TABLE must be SCROLL, got {arg.type()}")
+    from table import group_rows, AGGREGATES
+    how = args[2].value
+    if how not in AGGREGATES:
+        return Error(f"`group` can count, sum, min or max, not {how}")
+    if how == "count" and len(args) == 4:
+        return Error("`group` counts rows, not the values of a column")
+    if how != "count" and len(args) == 3:
+        return Error(f"`group` needs the column to {how}")
+    return group_rows(args[0], args[1].value, how, args[3].value if len(args) == 4 else None)
+
+def statement_arguments(args: Tuple[Object, ...], name: str, batch: bool):
+    """A mishap if the path, SQL and parameters given to a database builtin are not as it takes them"""
+    if len(args) not in ((3,) if batch else (2, 3)):
+        return Error(f"wrong number of arguments. got={len(args)}, want={3 if batch else '2 or 3'}")
+    for arg in args[:2]:
+        if arg.type() != STRING_OBJ:
+            return Error(f"database and statement given to `{name}` must be SCROLL, got {arg.type()}")
+    if batch and args[2].type() not in (ARRAY_OBJ, TABLE_OBJ):
+        return Error(f"rows given to `{name}` must be a CODEX or TABLE, got {args[2].type()}")
+    return None
+
+def builtin_query(*args: Object) -> Object:
+    mishap = statement_arguments(args, "query", False)
+    if mishap is not None:
+        return mishap
+    # imported here, since database builds on this module
+    from database import query
+    return query(args[0].value, args[1].value, *args[2:])
+
+def builtin_execute(*args: Object) -> Object:
+    mishap = statement_arguments(args, "execute", False)
+    if mishap is not None:
+        return mishap
+    from database import execute
+    return execute(args[0].value, args[1].value, *args[2:])
+
+def builtin_executemany(*args: Object) -> Object:
+    mishap = statement_arguments(args, "executemany", True)
+    if mishap is not None:
+        return mishap
+    from database import execute_many
+    return execute_many(args[0].value, args[1].value, args[2])
+
+# Compiled patterns kept at once, keyed by pattern and flags
+PATTERN_CACHE_SIZE = 256
+
+PATTERNS = LRUCache(PATTERN_CACHE_SIZE)
+
+PATTERN_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+
+def compiled_pattern(pattern: Object, flags: Optional[Object], name: str):
+    """The compiled pattern, made once for each pattern and flags however often it is used, or a mishap"""
+    if pattern.type() != STRING_OBJ:
+        return Error(f"pattern given to `{name}` must be SCROLL, got {pattern.type()}")
+    letters = ""
+    if flags is not None:
+        if flags.type() != STRING_OBJ:
+            return Error(f"flags given to `{name}` must be SCROLL, got {flags.type()}")
+        letters = flags.value
+    key = (pattern.value, letters)
+    compiled, found = PATTERNS.get(key)
+    if found:
+        return compiled
+    bits = 0
+    for letter in letters:
+        if letter not in PATTERN_FLAGS:
+            return Error(f"flags given to `{name}` are letters of imsx, got {letter}")
+        bits |= PATTERN_FLAGS[letter]
+    try:
+        compiled = re.compile(pattern.value, bits)
+    except re.error as e:
+        return Error(f"pattern given to `{name}` is not valid: {e}")
+    PATTERNS.put(key, compiled)
+    return compiled
+
+def pattern_arguments(args: Tuple[Object, ...], name: str, count: int):
+    """The compiled pattern and subject text of a regex builtin taking count arguments and then flags, or a mishap"""
+    if len(args) not in (count, count + 1):
+        return Error(f"wrong number of arguments. got={len(args)}, want={count} or {count + 1}")
+    if args[1].type() != STRING_OBJ:
+        return Error(f"argument to `{name}` must be SCROLL, got {args[1].type()}")
+    compiled = compiled_pattern(args[0], args[count] if len(args) > count else None, name)
+    if isinstance(compiled, Error):
+        return compiled
+    return compiled, args[1].value
+
+def regex_search(name: str, method: str) -> Builtin:
+    """A builtin giving the MATCH of the compiled pattern's method of that name, or VOID if none"""
+    def builtin(*args: Object) -> Object:
+        arguments = pattern_arguments(args, name, 2)
+        if isinstance(arguments, Error):
+            return arguments
+        compiled, text = arguments
+        found = getattr(compiled, method)(text)
+        return Match(found) if found is not None else VOID
+    return Builtin(name, builtin)
+
+def builtin_findall(*args: Object) -> Object:
+    arguments = pattern_arguments(args, "findall", 2)
+    if isinstance(arguments, Error):
+        return arguments
+    compiled, text = arguments
+    return Stream(lambda: map(Match, compiled.finditer(text)))
+
+def builtin_replace(*args: Object) -> Object:
+    arguments = pattern_arguments(args, "replace", 3)
+    if isinstance(arguments, Error):
+        return arguments
+    compiled, text = arguments
+    replacement = args[2]
+    if replacement.type() == STRING_OBJ:
+        try:
+            return String(compiled.sub(replacement.value, text))
+        except re.error as e:
+            return Error(f"replacement given to `replace` is not valid: {e}")
+    if not isinstance(replacement, (Function, Memoized, Builtin)):
+        return Error(f"replacement given to `replace` must be SCROLL or RITUAL, got {replacement.type()}")
+    call = rune_caller(replacement, 1, "replace")
+    if isinstance(call, Error):
+        return call
+    mishaps = []
+
+    def substitute(found: "re.Match") -> str:
+        if mishaps:
+            return ""
+        result = call(Match(found))
+        if result.type() != STRING_OBJ:
+            mishaps.append(result if is_mishap(result) else Error(f"rune given to `replace` must give SCROLL, got {result.type()}"))
+            return ""
+        return result.value
+    replaced = compiled.sub(substitute, text)
+    return mishaps[0] if mishaps else String(replaced)
+
+def builtin_span(*args: Object) -> Object:
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+    if args[0].type() != MATCH_OBJ:
+        return Error(f"argument to `span` must be MATCH, got {args[0].type()}")
+    group = 0
+    if len(args) == 2:
+        group = args[1].value if args[1].type() == STRING_OBJ else whole_number(args[1], "span")
+        if isinstance(group, Error):
+            return group
+    try:
+        start, end = args[0].match.span(group)
+    except IndexError:
+        return VOID
+    return Array.from_items(array("q", (start, end)))
+
+# Builtins that have a version for an event loop to await, used when one drives the evaluation
+AWAITABLE_BUILTINS = ("read_file", "write_file", "sleep", "run")
+
+# Types whose values sort by their Python value
+SORTABLE_TYPES = (INTEGER_OBJ, STRING_OBJ)
+
+def builtin_sort(*args: Object) -> Object:
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+    if args[0].type() == TABLE_OBJ:
+        if len(args) != 2 or args[1].type() != STRING_OBJ:
+            return Error("a TABLE is sorted by the name of one of its columns")
+        from table import sort_rows
+        return sort_rows(args[0], args[1].value)
+    if args[0].type() != ARRAY_OBJ:
+        return Error(f"argument to `sort` must be CODEX or TABLE, got {args[0].type()}")
+    codex = args[0]
+    if codex.packed and len(args) == 1:
+        return Array.from_items(array("q", sorted(codex.items[:len(codex)])))
+    elements = codex.elements()
+    keys = elements
+    if len(args) == 2:
+        call = rune_caller(args[1], 1, "sort")
+        if isinstance(call, Error):
+            return call
+        # the rune runs once per element, not once per comparison
+        keys = []
+        for element in elements:
+            key = call(element)
+            if is_mishap(key):
+                return key
+            keys.append(key)
+    if keys:
+        key_type = keys[0].type()
+        for key in keys:
+            if key.type() not in SORTABLE_TYPES or key.type() != key_type:
+                return Error(f"`sort` keys must all be NUMBER or all be SCROLL, got {key.type()}")
+    values = [key.value for key in keys]
+    order = sorted(range(len(elements)), key=values.__getitem__)
+    return Array([elements[position] for position in order])
+
+def builtin_codex(*args: Object) -> Object:
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+    if args[0].type() != STREAM_OBJ:
+        return Error(f"argument to `codex` must be STREAM, got {args[0].type()}")
+    elements = []
+    for element in args[0]:
+        if is_mishap(element):
+            return element
+        elements.append(element)
+    return Array(elements)
+
+BUILTINS = {
+    "len": Builtin("len", builtin_len),
+    "push": Builtin("push", builtin_push),
+    "concat": Builtin("concat", builtin_concat),
+    "lookup": Builtin("lookup", builtin_lookup),
+    "insert": Builtin("insert", builtin_insert),
+    "delete": Builtin("delete", builtin_delete),
+    "vector": Builtin("vector", builtin_vector),
+    "matrix": Builtin("matrix", builtin_matrix),
+    "matmul": Builtin("matmul", builtin_matmul),
+    "transpose": Builtin("transpose", builtin_transpose),
+    "rows": matrix_slice("rows", 0),
+    "columns": matrix_slice("columns", 1),
+    "sum": numpy_reduction("sum"),
+    "mean": numpy_reduction("mean"),
+    "min": numpy_reduction("min"),
+    "max": numpy_reduction("max"),
+    "shape": Builtin("shape", builtin_shape),
+    "range": Builtin("range", builtin_range),
+    "map": Builtin("map", builtin_map),
+    "filter": Builtin("filter", builtin_filter),
+    "take": Builtin("take", builtin_take),
+    "reduce": Builtin("reduce", builtin_reduce),
+    "sort": Builtin("sort", builtin_sort),
+    "pmap": Builtin("pmap", builtin_pmap),
+    "channel": Builtin("channel", builtin_channel),
+    "send": Builtin("send", builtin_send),
+    "receive": Builtin("receive", builtin_receive),
+    "drained": Builtin("drained", builtin_drained),
+    "close": Builtin("close", builtin_close),
+    "spawn": Builtin("spawn", builtin_spawn),
+    "join": Builtin("join", builtin_join),
+    "read_file": Builtin("read_file", builtin_read_file),
+    "write_file": Builtin("write_file", builtin_write_file),
+    "sleep": Builtin("sleep", builtin_sleep),
+    "run": Builtin("run", builtin_run),
+    "mapfile": Builtin("mapfile", builtin_mapfile),
+    "slice": Builtin("slice", builtin_slice),
+    "find": Builtin("find", builtin_find),
+    "lines": Builtin("lines", builtin_lines),
+    "decode": Builtin("decode", builtin_decode),
+    "read_csv": Builtin("read_csv", builtin_read_csv),
+    "read_jsonl": Builtin("read_jsonl", builtin_read_jsonl),
+    "table": Builtin("table", builtin_table),
+    "select": Builtin("select", builtin_select),
+    "group": Builtin("group", builtin_group),
+    "query": Builtin("query", builtin_query),
+    "execute": Builtin("execute", builtin_execute),
+    "executemany": Builtin("executemany", builtin_executemany),
+    "match": regex_search("match", "match"),
+    "search": regex_search("search", "search"),
+    "findall": Builtin("findall", builtin_findall),
+    "replace": Builtin("replace", builtin_replace),
+    "span": Builtin("span", builtin_span),
+    "codex": Builtin("codex", builtin_codex),
+    "memoize": Builtin("memoize", builtin_memoize),
+    "persist": Builtin("persist", builtin_persist),
+    "memostats": Builtin("memostats", builtin_memostats),
+}
 
 def eval_expressions(exps: List[Expression], env: Environment) -> List[Object]:
     result = []
@@ -215,8 +1488,84 @@ def apply_function(fn: Object, args: List[Object]) -> Object:
         extended_env = extend_function_env(fn, args)
         evaluated = Eval(fn.body, extended_env)
         return unwrap_return_value(evaluated)
+    elif isinstance(fn, Memoized):
+        return apply_memoized(fn, args)
+    elif isinstance(fn, Builtin):
+        result = fn.fn(*args)
+        if type(result) is Blocked:
+            return wait_for(fn, args, result)
+        return result
     return Error(f"not a ritual: {fn.type()}")
 
+class Blocked:
+    """
+    What a builtin gives instead of a result when it has to wait, such as
+    receive on an empty channel. The call is made again once ready() holds.
+    """
+    __slots__ = ("name", "ready")
+
+    def __init__(self, name: str, ready: Callable[[], bool]):
+        self.name = name
+        self.ready = ready
+
+    def deadlock(self) -> Error:
+        return Error(f"deadlock: `{self.name}` waits on tasks that are all waiting")
+
+class Awaiting:
+    """
+    What the stepper pauses with at a call to one of AWAITABLE_BUILTINS, for
+    whoever drives it to await the call on its event loop, or to make it
+    there and then if nothing awaits, and send back the result.
+    """
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Builtin, args: List[Object]):
+        self.fn = fn
+        self.args = args
+
+def wait_for(fn: Builtin, args: List[Object], blocked: Blocked) -> Object:
+    """Run spawned tasks until a blocked builtin call can go ahead, then make it"""
+    from tasks import current_scheduler
+    scheduler = current_scheduler()
+    while type(blocked) is Blocked:
+        if not scheduler.run_until(blocked.ready):
+            return blocked.deadlock()
+        blocked = fn.fn(*args)
+    return blocked
+
+def apply_memoized(fn: Memoized, args: List[Object]) -> Object:
+    key = memo_key(args)
+    if key is None:
+        fn.cache.bypasses += 1
+        return apply_function(fn.fn, args)
+    result, found = fn.cache.get(key)
+    if found:
+        return result
+    if fn.store is not None and fn.fingerprint is None:
+        from memo_store import rune_fingerprint
+        fn.fingerprint = rune_fingerprint(fn) or ""
+    if fn.fingerprint:
+        stored = fn.store.get(fn.fingerprint, key)
+        if stored is not None:
+            result = restore_value(*stored)
+            fn.cache.put(key, result)
+            return result
+    result = apply_function(fn.fn, args)
+    # mishaps are not remembered, so that a later call reports them afresh
+    if not is_mishap(result):
+        fn.cache.put(key, result)
+        if fn.fingerprint:
+            fn.store.put(fn.fingerprint, key, result)
+    return result
+
+def restore_value(object_type: ObjectType, value) -> Object:
+    """Rebuild a NUMBER, SCROLL or TRUTH from its type and Python value"""
+    if object_type == BOOLEAN_OBJ:
+        return VERITY if value else FALLACY
+    if object_type == STRING_OBJ:
+        return String(value)
+    return Integer(value)
+
 def extend_function_env(fn: Function, args: List[Object]) -> Environment:
     env = Environment.new_enclosed_environment(fn.env)
     for param_idx, param in enumerate(fn.parameters):
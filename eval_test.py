@@ -1,8 +1,16 @@
-from object import Integer, Boolean, Null, Error, Function, String
+from object import Integer, Boolean, Null, Error, Function, String, Array, Vector, Matrix, Hash, Stream, numpy
+import io
+import mmap
+import os
+import tempfile
+import time
 import unittest
+from unittest import mock
 from lexer import Lexer
 from parser import Parser
+import eval as eval_module
 from eval import Eval
+from memo import LRUCache
 from environment import Environment
 
 def test_eval(input):
@@ -256,5 +264,612 @@ class TestObject(unittest.TestCase):
         if evaluated.value != "Hello World!":
             self.fail(f"String has wrong value. got={evaluated.value}")
 
+    def test_long_string_concatenation(self):
+        input_code = """
+        manifest prefix with "" seal
+        manifest line with "" seal
+        manifest i with 0 seal
+        whilst (i descends 3000) unfold
+            transmute line with line augments "ab" seal
+            whence (i mirrors 1000) unfold transmute prefix with line seal fold
+            transmute i with i augments 1 seal
+        fold
+        manifest whole with "<" augments line augments ">" seal
+        [len(prefix) knot len(whole) knot tome(whole binds 1)["<" augments line augments ">"]]
+        """
+        self.assertEqual(test_eval(input_code).inspect(), "[2002 knot 6002 knot 1]")
+        self.assertEqual(test_eval(input_code + " seal whole").value, "<" + "ab" * 3000 + ">")
+        self.assertEqual(test_eval(input_code + " seal prefix").value, "ab" * 1001)
+
+    def test_builtin_shadowing(self):
+        evaluated = test_eval("manifest memoize with 5 seal memoize seal")
+        test_integer_object(self, evaluated, Integer(5))
+
+    def test_memoize(self):
+        input = """
+        manifest fib with memoize(rune(n) unfold
+            whence (n descends 2) unfold yield n seal fold
+            yield fib(n diminishes 1) augments fib(n diminishes 2) seal
+        fold) seal
+        fib(90) seal
+        """
+        evaluated = test_eval(input)
+        test_integer_object(self, evaluated, Integer(2880067194370816120))
+
+        tests = [
+            ("manifest f with memoize(rune(x) unfold x fold knot 2) seal f(1) seal f(2) seal f(1) seal f(3) seal f(2) seal memostats(f)",
+             "hits 1 knot misses 4 knot bypasses 0 knot evictions 2 knot size 2/2"),
+            ("manifest f with memoize(rune(x) unfold x fold) seal f(f) seal f(rune() unfold 1 fold) seal memostats(f)",
+             "hits 0 knot misses 0 knot bypasses 2 knot evictions 0 knot size 0/128"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, String)
+                self.assertEqual(evaluated.value, expected)
+
+    def test_memoize_tells_whole_from_fractional_numbers(self):
+        evaluated = test_eval("manifest f with memoize(rune(x) unfold x fold) seal f(2) seal f(1 augments 1 divide 1)")
+        self.assertEqual(evaluated.inspect(), "2.0")
+
+    def test_memoize_does_not_remember_mishaps(self):
+        env = Environment()
+        for input in ['manifest f with memoize(rune(x) unfold x augments 1 fold) seal', 'f("a")', 'f("a")']:
+            evaluated = Eval(Parser(Lexer(input)).parse_program(), env)
+        self.assertIsInstance(evaluated, Error)
+        evaluated = Eval(Parser(Lexer("memostats(f)")).parse_program(), env)
+        self.assertEqual(evaluated.value, "hits 0 knot misses 2 knot bypasses 0 knot evictions 0 knot size 0/128")
+
+    def test_memoize_errors(self):
+        tests = [
+            ("memoize(1)", "argument to `memoize` must be RITUAL, got NUMBER"),
+            ("memoize()", "wrong number of arguments. got=0, want=1 or 2"),
+            ("memoize(rune(x) unfold x fold knot verity)", "memo size must be a NUMBER of at least 0, got verity"),
+            ("memostats(rune(x) unfold x fold)", "argument to `memostats` must be a memoized RITUAL, got rune(x) unfold ... fold"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    def test_while_loops(self):
+        tests = [
+            ("manifest i with 0 seal whilst (i descends 10) unfold transmute i with i augments 1 seal fold i", 10),
+            ("manifest i with 0 seal manifest s with 0 seal whilst (i descends 5) unfold transmute i with i augments 1 seal transmute s with s augments i seal fold s", 15),
+            ("manifest i with 5 seal whilst (fallacy) unfold transmute i with 0 seal fold i", 5),
+            ("manifest f with rune(n) unfold whilst (verity) unfold whence (n ascends 3) unfold yield n seal fold transmute n with n augments 1 seal fold fold seal f(0)", 4),
+            ("manifest n with 0 seal manifest bump with rune() unfold transmute n with n augments 1 seal fold seal bump() seal bump() seal n", 2),
+            ("manifest n with 1 seal manifest f with rune() unfold manifest n with 5 seal transmute n with 6 seal n fold seal f() augments n", 7),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                test_integer_object(self, test_eval(input), Integer(expected))
+
+    def test_while_loop_needs_no_recursion(self):
+        input = "manifest i with 0 seal whilst (i descends 100000) unfold transmute i with i augments 1 seal fold i"
+        test_integer_object(self, test_eval(input), Integer(100000))
+
+    def test_while_loop_iterations_skip_eval(self):
+        input = """
+        manifest i with 0 seal
+        manifest total with 0 seal
+        whilst (i descends 100000) unfold
+            transmute total with total augments i seal
+            whence (i mirrors 7) unfold transmute total with total diminishes 7 seal fold
+            transmute i with i augments 1 seal
+        fold
+        total
+        """
+        with mock.patch("eval.Eval", wraps=eval_module.Eval) as evaluate:
+            started = time.perf_counter()
+            test_integer_object(self, evaluate(Parser(Lexer(input)).parse_program(), Environment()), Integer(4999949993))
+            elapsed = time.perf_counter() - started
+        # the loop's nodes are prepared once, so iterations never go back through Eval
+        self.assertLess(evaluate.call_count, 20)
+        self.assertLess(elapsed, 5.0)
+
+    def test_while_and_assign_errors(self):
+        tests = [
+            ("transmute x with 5 seal", "cannot transmute unmanifested name: x"),
+            ("whilst (nope) unfold 1 fold", "identifier not found: nope"),
+            ("manifest i with 0 seal whilst (verity) unfold i augments verity seal fold", "type mismatch: NUMBER augments TRUTH"),
+            ("manifest f with rune() unfold transmute y with 1 seal fold seal f()", "cannot transmute unmanifested name: y"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    def test_array_literals(self):
+        evaluated = test_eval("[1 knot 2 conjoins 2 knot 3 augments 3]")
+        self.assertIsInstance(evaluated, Array)
+        self.assertTrue(evaluated.packed)
+        self.assertEqual(evaluated.inspect(), "[1 knot 4 knot 6]")
+
+        evaluated = test_eval('[1 knot "two" knot verity]')
+        self.assertFalse(evaluated.packed)
+        self.assertEqual(evaluated.inspect(), "[1 knot two knot verity]")
+
+    def test_array_index_expressions(self):
+        tests = [
+            ("[1 knot 2 knot 3][0]", 1),
+            ("[1 knot 2 knot 3][1 augments 1]", 3),
+            ("manifest i with 0 seal [1][i]", 1),
+            ("manifest xs with [1 knot 2 knot 3] seal xs[0] augments xs[2]", 4),
+            ("[1 knot 2 knot 3][4 divide 2]", 3),
+            ("[1 knot 2 knot 3][3]", None),
+            ("[1 knot 2 knot 3][diminishes 1]", None),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                if expected is None:
+                    test_null_object(self, evaluated)
+                else:
+                    test_integer_object(self, evaluated, Integer(expected))
+
+    def test_array_builtins(self):
+        tests = [
+            ('len("")', "0"),
+            ('len("four")', "4"),
+            ("len([1 knot 2])", "2"),
+            ("push([1 knot 2] knot 3)", "[1 knot 2 knot 3]"),
+            ('push([1] knot "x")', "[1 knot x]"),
+            ('concat([1] knot ["x" knot 2])', "[1 knot x knot 2]"),
+            ("manifest a with [1] seal manifest b with push(a knot 2) seal manifest c with push(a knot 3) seal [a knot b knot c]",
+             "[[1] knot [1 knot 2] knot [1 knot 3]]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_pushing_numbers_stays_packed(self):
+        input = """
+        manifest xs with [] seal
+        manifest i with 0 seal
+        whilst (i descends 1000) unfold transmute xs with push(xs knot i conjoins i) seal transmute i with i augments 1 seal fold
+        xs
+        """
+        evaluated = test_eval(input)
+        self.assertTrue(evaluated.packed)
+        self.assertEqual(len(evaluated), 1000)
+        self.assertEqual(evaluated.at(999).value, 998001)
+
+    def test_array_errors(self):
+        tests = [
+            ("len(1)", "argument to `len` not supported, got NUMBER"),
+            ('len("one" knot "two")', "wrong number of arguments. got=2, want=1"),
+            ("push(1 knot 1)", "argument to `push` must be CODEX, got NUMBER"),
+            ("concat([1] knot 1)", "arguments to `concat` must be CODEX, got NUMBER"),
+            ('[1]["0"]', "index operator not supported: CODEX[SCROLL]"),
+            ("[1][1 divide 2]", "codex index must be a whole NUMBER, got 0.5"),
+            ("[1 knot nope]", "identifier not found: nope"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_vector_operators(self):
+        tests = [
+            ("vector([1 knot 2 knot 3])", "vector[1 knot 2 knot 3] of 3"),
+            ("vector([1 knot 2 knot 3]) augments vector([10 knot 20 knot 30])", "vector[11 knot 22 knot 33] of 3"),
+            ("vector([1 knot 2 knot 3]) conjoins 2", "vector[2 knot 4 knot 6] of 3"),
+            ("10 diminishes vector([1 knot 2 knot 3])", "vector[9 knot 8 knot 7] of 3"),
+            ("vector([1 knot 2]) divide 2", "vector[0.5 knot 1.0] of 2"),
+            ("vector([1 knot 2 knot 3]) descends 2", "vector[verity knot fallacy knot fallacy] of 3"),
+            ("vector([1 knot 2]) mirrors vector([1 knot 3])", "vector[verity knot fallacy] of 2"),
+            ("vector([verity knot fallacy]) diverges vector([verity knot verity])", "vector[fallacy knot verity] of 2"),
+            ("diminishes vector([1 knot diminishes 2])", "vector[-1 knot 2] of 2"),
+            ("vector([4 knot 5 knot 6])[2]", "6"),
+            ("(vector([4 knot 5]) ascends 4)[1]", "verity"),
+            ("len(vector([4 knot 5]))", "2"),
+            ("manifest f with rune(x) unfold x conjoins 2 augments 1 fold seal f(vector([1 knot 2]))", "vector[3 knot 5] of 2"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_vector_inspect_is_summarized(self):
+        input = "manifest xs with [] seal manifest i with 0 seal whilst (i descends 1000) unfold transmute xs with push(xs knot i) seal transmute i with i augments 1 seal fold vector(xs) augments 1"
+        self.assertEqual(test_eval(input).inspect(), "vector[1 knot 2 knot 3 knot ... knot 998 knot 999 knot 1000] of 1000")
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_vector_errors(self):
+        tests = [
+            ("vector(1)", "argument to `vector` must be CODEX, got NUMBER"),
+            ('vector([1 knot "a"])', "vector elements must all be NUMBER or all be TRUTH, got SCROLL"),
+            ("vector([1 knot verity])", "vector elements must all be NUMBER or all be TRUTH, got TRUTH"),
+            ('vector([1]) augments "a"', "type mismatch: VECTOR augments SCROLL"),
+            ("vector([1 knot 2]) augments vector([1])", "vector lengths differ: 2 and 1"),
+            ("vector([verity]) augments 1", "unknown operator: VECTOR augments NUMBER"),
+            ("vector([1]) augments 99999999999999999999999", "NUMBER does not fit in a VECTOR: 99999999999999999999999"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_matrices(self):
+        m = "matrix([[1 knot 2 knot 3] knot [4 knot 5 knot 6]])"
+        tests = [
+            (m, "matrix[[1 knot 2 knot 3] knot [4 knot 5 knot 6]] of 2x3"),
+            ("matrix([vector([1 knot 2]) knot [3 knot 4]])", "matrix[[1 knot 2] knot [3 knot 4]] of 2x2"),
+            (f"transpose({m})", "matrix[[1 knot 4] knot [2 knot 5] knot [3 knot 6]] of 3x2"),
+            (f"matmul({m} knot transpose({m}))", "matrix[[14 knot 32] knot [32 knot 77]] of 2x2"),
+            (f"matmul({m} knot vector([1 knot 0 knot 1]))", "vector[4 knot 10] of 2"),
+            ("matmul(vector([1 knot 2]) knot vector([3 knot 4]))", "11"),
+            (f"{m}[1]", "vector[4 knot 5 knot 6] of 3"),
+            (f"{m}[1][2]", "6"),
+            (f"{m} conjoins 2", "matrix[[2 knot 4 knot 6] knot [8 knot 10 knot 12]] of 2x3"),
+            (f"{m} augments vector([10 knot 20 knot 30])", "matrix[[11 knot 22 knot 33] knot [14 knot 25 knot 36]] of 2x3"),
+            (f"{m} diminishes {m}", "matrix[[0 knot 0 knot 0] knot [0 knot 0 knot 0]] of 2x3"),
+            (f"{m} ascends 3", "matrix[[fallacy knot fallacy knot fallacy] knot [verity knot verity knot verity]] of 2x3"),
+            (f"rows({m} knot 1 knot 2)", "matrix[[4 knot 5 knot 6]] of 1x3"),
+            (f"columns({m} knot 0 knot 2)", "matrix[[1 knot 2] knot [4 knot 5]] of 2x2"),
+            (f"shape({m})", "[2 knot 3]"),
+            (f"len({m})", "2"),
+            (f"sum({m})", "21"),
+            (f"sum({m} knot 0)", "vector[5 knot 7 knot 9] of 3"),
+            (f"sum({m} knot 1 divide 1)", "vector[6 knot 15] of 2"),
+            (f"mean({m} knot 1)", "vector[2.0 knot 5.0] of 2"),
+            (f"min({m})", "1"),
+            ("max(vector([3 knot 9 knot 4]))", "9"),
+            ("sum(vector([verity knot fallacy knot verity]))", "2"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_matrix_errors(self):
+        m = "matrix([[1 knot 2 knot 3] knot [4 knot 5 knot 6]])"
+        tests = [
+            ("matrix([])", "argument to `matrix` must be a CODEX of rows, got []"),
+            ("matrix([[1 knot 2] knot [3]])", "matrix rows must have the same length, got 2 and 1"),
+            ("matrix([1 knot 2])", "matrix rows must be CODEX or VECTOR, got NUMBER"),
+            ("matrix([[1] knot [verity]])", "matrix rows must all hold NUMBERs or all hold TRUTHs"),
+            (f"matmul({m} knot {m})", "matmul shapes do not align: 2x3 and 2x3"),
+            (f"{m} augments vector([1 knot 2])", "shapes differ: 2x3 and 2"),
+            ("transpose(vector([1]))", "argument to `transpose` must be MATRIX, got VECTOR"),
+            (f"sum({m} knot 2)", "axis of `sum` must be a NUMBER below 2, got 2"),
+            (f"sum({m} knot 1 divide 2)", "arguments to `sum` must be whole NUMBERs, got 0.5"),
+            (f"rows({m} knot 0 knot verity)", "bounds of `rows` must be whole NUMBERs, got verity"),
+            (f"min(rows({m} knot 0 knot 0))", "`min` of an empty MATRIX"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    def test_hash_literals(self):
+        input = """
+        manifest two with 2 seal
+        tome("one" binds 10 diminishes 9 knot two binds 1 augments 1 knot "thr" augments "ee" binds 6 divide 2 knot 4 binds 4 knot verity binds 5 knot fallacy binds 6)
+        """
+        evaluated = test_eval(input)
+        self.assertIsInstance(evaluated, Hash)
+        self.assertEqual(len(evaluated), 6)
+        self.assertEqual(evaluated.inspect(),
+                         "tome(2 binds 2 knot 4 binds 4 knot one binds 1 knot three binds 3.0 knot fallacy binds 6 knot verity binds 5)")
+
+    def test_hash_index_expressions(self):
+        tests = [
+            ('tome("foo" binds 5)["foo"]', 5),
+            ('tome("foo" binds 5)["bar"]', None),
+            ('manifest key with "foo" seal tome("foo" binds 5)[key]', 5),
+            ('tome()["foo"]', None),
+            ("tome(5 binds 5)[5]", 5),
+            ("tome(verity binds 5)[verity]", 5),
+            ("tome(1 binds 5)[verity]", None),
+            ("tome(2 binds 5)[4 divide 2]", 5),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                if expected is None:
+                    test_null_object(self, evaluated)
+                else:
+                    test_integer_object(self, evaluated, Integer(expected))
+
+    def test_hash_builtins(self):
+        tests = [
+            ('insert(tome(1 binds "a") knot 2 knot "b")', "tome(1 binds a knot 2 binds b)"),
+            ('insert(tome(1 binds "a") knot 1 knot "b")', "tome(1 binds b)"),
+            ('delete(tome(1 binds "a" knot 2 binds "b") knot 1)', "tome(2 binds b)"),
+            ('delete(tome(1 binds "a") knot 3)', "tome(1 binds a)"),
+            ('lookup(tome(1 binds "a") knot 1)', "a"),
+            ('lookup(tome(1 binds "a") knot 2)', "void"),
+            ('lookup(tome(1 binds "a") knot 2 knot "none")', "none"),
+            ('len(tome(1 binds "a" knot 2 binds "b"))', "2"),
+            ('manifest t with tome(1 binds "a") seal manifest u with insert(t knot 2 knot "b") seal [t knot u]',
+             "[tome(1 binds a) knot tome(1 binds a knot 2 binds b)]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_hash_built_in_a_loop(self):
+        input = """
+        manifest squares with tome() seal
+        manifest i with 0 seal
+        whilst (i descends 2000) unfold transmute squares with insert(squares knot i knot i conjoins i) seal transmute i with i augments 1 seal fold
+        [len(squares) knot squares[1999] knot lookup(delete(squares knot 7) knot 7 knot diminishes 1)]
+        """
+        self.assertEqual(test_eval(input).inspect(), "[2000 knot 3996001 knot -1]")
+
+    def test_hash_errors(self):
+        tests = [
+            ("tome([1] binds 1)", "unusable as tome key: CODEX"),
+            ("tome(1 binds 1)[rune(x) unfold x fold]", "unusable as tome key: RITUAL"),
+            ("insert(tome() knot tome() knot 1)", "unusable as tome key: TOME"),
+            ("insert([1] knot 1 knot 1)", "argument to `insert` must be TOME, got CODEX"),
+            ("delete(tome() knot [1])", "unusable as tome key: CODEX"),
+            ("lookup(tome())", "wrong number of arguments. got=1, want=2 or 3"),
+            ("tome(1 binds nope)", "identifier not found: nope"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    def test_streams(self):
+        tests = [
+            ("codex(range(4))", "[0 knot 1 knot 2 knot 3]"),
+            ("codex(range(2 knot 5))", "[2 knot 3 knot 4]"),
+            ("codex(range(10 knot 0 knot diminishes 3))", "[10 knot 7 knot 4 knot 1]"),
+            ("codex(range(0))", "[]"),
+            ("codex(range(6 divide 2))", "[0 knot 1 knot 2]"),
+            ("codex(map(rune(x) unfold x conjoins x fold knot range(4)))", "[0 knot 1 knot 4 knot 9]"),
+            ("codex(filter(rune(x) unfold x ascends 1 fold knot range(4)))", "[2 knot 3]"),
+            ("codex(take(range(100) knot 2))", "[0 knot 1]"),
+            ("codex(take(range(2) knot 5))", "[0 knot 1]"),
+            ("reduce(rune(a knot b) unfold a augments b fold knot range(5))", "10"),
+            ("reduce(rune(a knot b) unfold a augments b fold knot range(0) knot 7)", "7"),
+            ('reduce(rune(s knot x) unfold s augments "x" fold knot range(3) knot "")', "xxx"),
+            ("codex(map(len knot map(rune(n) unfold codex(range(n)) fold knot range(3))))", "[0 knot 1 knot 2]"),
+            ("codex(map(memoize(rune(x) unfold x augments 1 fold) knot range(2)))", "[1 knot 2]"),
+            ("manifest s with map(rune(x) unfold x augments 1 fold knot range(2)) seal [codex(s) knot codex(s)]",
+             "[[1 knot 2] knot [1 knot 2]]"),
+            ("range(3)", "stream"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_streams_are_lazy(self):
+        input = """
+        manifest calls with 0 seal
+        manifest s with map(rune(x) unfold transmute calls with calls augments 1 seal x fold knot range(1000000)) seal
+        manifest before with calls seal
+        manifest first with codex(take(filter(rune(x) unfold x ascends 2 fold knot s) knot 2)) seal
+        [before knot first knot calls]
+        """
+        self.assertEqual(test_eval(input).inspect(), "[0 knot [3 knot 4] knot 5]")
+        self.assertIsInstance(test_eval("map(rune(x) unfold nope fold knot range(3))"), Stream)
+
+    def test_stream_errors(self):
+        tests = [
+            ("codex(map(rune(x) unfold x augments nope fold knot range(3)))", "identifier not found: nope"),
+            ("reduce(rune(a knot b) unfold a augments b fold knot map(rune(x) unfold nope fold knot range(3)))",
+             "identifier not found: nope"),
+            ("codex(filter(rune(x) unfold nope fold knot range(3)))", "identifier not found: nope"),
+            ("map(rune(a knot b) unfold a fold knot range(3))",
+             "rune given to `map` takes wrong number of arguments. got=2, want=1"),
+            ("map(1 knot range(3))", "argument to `map` must be RITUAL, got NUMBER"),
+            ("map(rune(x) unfold x fold knot 1)", "argument to `map` must be CODEX or STREAM, got NUMBER"),
+            ("range(1 divide 2)", "arguments to `range` must be whole NUMBERs, got 0.5"),
+            ('range("3")', "arguments to `range` must be NUMBER, got SCROLL"),
+            ("range(1 knot 2 knot 0)", "`range` step must not be 0"),
+            ("reduce(rune(a knot b) unfold a fold knot range(0))", "`reduce` of an empty STREAM needs an initial value"),
+            ("take(range(3))", "wrong number of arguments. got=1, want=2"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+    def test_codex_higher_order_builtins(self):
+        tests = [
+            ("map(rune(x) unfold x conjoins 2 fold knot [1 knot 2 knot 3])", "[2 knot 4 knot 6]"),
+            ('map(len knot ["a" knot "bc"])', "[1 knot 2]"),
+            ("map(rune(x) unfold x fold knot [])", "[]"),
+            ("filter(rune(x) unfold x ascends 1 fold knot [1 knot 2 knot 3])", "[2 knot 3]"),
+            ("reduce(rune(a knot b) unfold a conjoins b fold knot [1 knot 2 knot 3 knot 4])", "24"),
+            ("reduce(rune(a knot b) unfold push(a knot b conjoins b) fold knot [1 knot 2] knot [])", "[1 knot 4]"),
+            ("sort([3 knot 1 knot 2])", "[1 knot 2 knot 3]"),
+            ('sort(["pear" knot "fig" knot "apple"])', "[apple knot fig knot pear]"),
+            ('sort(["pear" knot "fig" knot "apple"] knot len)', "[fig knot pear knot apple]"),
+            ("sort([[1 knot 1] knot [2] knot [3 knot 3 knot 3]] knot rune(c) unfold diminishes len(c) fold)",
+             "[[3 knot 3 knot 3] knot [1 knot 1] knot [2]]"),
+            ('sort([1 knot 2 knot 3 knot 4] knot rune(x) unfold x mirrors 2 fold)', "MISHAP: `sort` keys must all be NUMBER or all be SCROLL, got TRUTH"),
+            ("sort([])", "[]"),
+            ("manifest f with rune(x) unfold rune() unfold x fold fold seal map(rune(g) unfold g() fold knot map(f knot [1 knot 2]))",
+             "[1 knot 2]"),
+            ("manifest f with rune(x) unfold manifest y with x conjoins 10 seal y fold seal map(f knot [1 knot 2])", "[10 knot 20]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_sort_calls_key_rune_once_per_element(self):
+        input = """
+        manifest calls with 0 seal
+        manifest key with rune(s) unfold transmute calls with calls augments 1 seal len(s) fold seal
+        manifest sorted with sort(["ccc" knot "a" knot "bb" knot "dddd" knot "" knot "ee"] knot key) seal
+        [sorted knot calls]
+        """
+        self.assertEqual(test_eval(input).inspect(), "[[ knot a knot bb knot ee knot ccc knot dddd] knot 6]")
+
+    def test_rune_consuming_its_own_stream(self):
+        input = """
+        manifest add with rune(a knot b) unfold a augments b fold seal
+        manifest s with map(rune(n) unfold whence (n mirrors 0) unfold 0 fold elsewise unfold reduce(add knot take(s knot n) knot 0) augments n fold fold knot range(5)) seal
+        codex(s)
+        """
+        self.assertEqual(test_eval(input).inspect(), "[0 knot 1 knot 3 knot 7 knot 15]")
+
+class TestMappedFiles(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "app.log")
+        with open(self.path, "wb") as file:
+            file.write("INFO start\r\nWARN disk\nINFO héllo\n\nWARN end".encode("utf-8"))
+        self.empty = os.path.join(directory.name, "empty.log")
+        open(self.empty, "wb").close()
+
+    def run_on_log(self, input: str):
+        return test_eval(f'manifest log with mapfile("{self.path}") seal ' + input)
+
+    def test_mapped_files(self):
+        tests = [
+            ("log", "bytes of 43"),
+            ("len(log)", "43"),
+            ("log[0]", "73"),
+            ("log[43]", "void"),
+            ("decode(slice(log knot 5 knot 10))", "start"),
+            ("decode(slice(log knot diminishes 3))", "end"),
+            ("slice(log knot 10 knot 5)", "bytes of 0"),
+            ('find(log knot "WARN")', "12"),
+            ('find(log knot "WARN" knot 13)', "35"),
+            ('find(log knot "ERROR")', "-1"),
+            ('find(log knot "WARN" knot 99999999999999999999)', "-1"),
+            ('find(log knot "INFO" knot diminishes 99999999999999999999)', "0"),
+            ("slice(log knot 99999999999999999999)", "bytes of 0"),
+            ('find(log knot slice(log knot 0 knot 4) knot 1)', "22"),
+            ("codex(map(decode knot lines(log)))", "[INFO start knot WARN disk knot INFO héllo knot  knot WARN end]"),
+            ('len(codex(filter(rune(line) unfold find(line knot "WARN") mirrors 0 fold knot lines(log))))', "2"),
+            ("decode(log[0])", "MISHAP: argument to `decode` must be BYTES, got NUMBER"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(self.run_on_log(input).inspect(), expected)
+
+    def test_slices_and_lines_share_the_mapping(self):
+        log, tail, first = self.run_on_log("[log knot slice(log knot 1) knot codex(lines(log))[0]]").elements()
+        self.assertIsInstance(log.buffer, mmap.mmap)
+        self.assertIs(tail.buffer, log.buffer)
+        self.assertIs(first.buffer, log.buffer)
+
+    def test_mapped_file_errors(self):
+        self.assertEqual(test_eval(f'codex(lines(mapfile("{self.empty}")))').inspect(), "[]")
+        missing = self.path + ".missing"
+        tests = [
+            (f'mapfile("{missing}")', f"`mapfile` cannot use {missing}: No such file or directory"),
+            ("mapfile(1)", "argument to `mapfile` must be SCROLL, got NUMBER"),
+            ("decode(slice(log knot 28 knot 29))", "`decode` found bytes that are not UTF-8 at 0"),
+            ("find(log knot 1)", "`find` looks for a SCROLL or BYTES, got NUMBER"),
+            ('slice("abc" knot 1)', "argument to `slice` must be BYTES, got SCROLL"),
+            ("slice(log knot 1 divide 2)", "arguments to `slice` must be whole NUMBERs, got 0.5"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = self.run_on_log(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+class TestLines(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "sales.txt")
+        with open(self.path, "w", encoding="utf-8", newline="") as file:
+            file.write("12\r\n30\n\n8")
+
+    def test_file_lines(self):
+        tests = [
+            (f'codex(lines("{self.path}"))', "[12 knot 30 knot  knot 8]"),
+            (f'manifest s with lines("{self.path}") seal [len(codex(s)) knot len(codex(s))]', "[4 knot 4]"),
+            (f'reduce(rune(total knot line) unfold total augments len(line) fold knot lines("{self.path}") knot 0)', "5"),
+            (f'codex(take(filter(rune(line) unfold len(line) mirrors 2 fold knot lines("{self.path}")) knot 1))', "[12]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_stdin_lines(self):
+        with mock.patch("sys.stdin", io.StringIO("a\nbb\nccc\n")):
+            evaluated = test_eval("manifest s with lines() seal [codex(take(s knot 1)) knot codex(s)]")
+        self.assertEqual(evaluated.inspect(), "[[a] knot [bb knot ccc]]")
+
+    def test_lines_errors(self):
+        with open(self.path, "wb") as file:
+            file.write(b"ok\n\xff\n")
+        missing = self.path + ".missing"
+        tests = [
+            (f'codex(lines("{self.path}"))', "`lines` found bytes that are not UTF-8: invalid start byte"),
+            (f'lines("{missing}")', f"`lines` cannot use {missing}: No such file or directory"),
+            ("lines(1)", "argument to `lines` must be SCROLL or BYTES, got NUMBER"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = test_eval(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+class TestPatterns(unittest.TestCase):
+    def test_patterns(self):
+        tests = [
+            (r'search("(\d+)-(?P<b>\d+)" knot "ab 12-34 cd")', "match(12-34 at 3)"),
+            (r'search("(\d+)-(?P<b>\d+)" knot "ab 12-34 cd")[1]', "12"),
+            (r'search("(\d+)-(?P<b>\d+)" knot "ab 12-34 cd")["b"]', "34"),
+            (r'search("(\d+)-(?P<b>\d+)" knot "ab 12-34 cd")[3]', "void"),
+            (r'search("(a)|b" knot "b")[1]', "void"),
+            (r'len(search("(\d+)-(?P<b>\d+)" knot "ab 12-34 cd"))', "3"),
+            (r'span(search("(\d+)-(\d+)" knot "ab 12-34 cd") knot 2)', "[6 knot 8]"),
+            ('match("b" knot "abc")', "void"),
+            ('match("a" knot "abc")', "match(a at 0)"),
+            ('search("A" knot "xa" knot "i")', "match(a at 1)"),
+            ('search("A" knot "xa")', "void"),
+            (r'codex(findall("\d" knot "a1b2c3"))', "[match(1 at 1) knot match(2 at 3) knot match(3 at 5)]"),
+            (r'codex(map(rune(m) unfold m[0] fold knot findall("\w+" knot "to be")))', "[to knot be]"),
+            (r'replace("\d" knot "a1b2" knot "#")', "a#b#"),
+            (r'replace("(\d)" knot "a1b2" knot "<\1>")', "a<1>b<2>"),
+            (r'replace("(\d)" knot "a1b2" knot rune(m) unfold m[1] augments m[1] fold)', "a11b22"),
+            ('search("(" knot "x")', "MISHAP: pattern given to `search` is not valid: missing ), unterminated subpattern at position 0"),
+            ('search("a" knot "a" knot "q")', "MISHAP: flags given to `search` are letters of imsx, got q"),
+            ('search(1 knot "a")', "MISHAP: pattern given to `search` must be SCROLL, got NUMBER"),
+            ('findall("a" knot 1)', "MISHAP: argument to `findall` must be SCROLL, got NUMBER"),
+            ('match("a")', "MISHAP: wrong number of arguments. got=1, want=2 or 3"),
+            (r'replace("\d" knot "a1" knot rune(m) unfold 3 fold)', "MISHAP: rune given to `replace` must give SCROLL, got NUMBER"),
+            (r'replace("\d" knot "a1" knot 3)', "MISHAP: replacement given to `replace` must be SCROLL or RITUAL, got NUMBER"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(test_eval(input).inspect(), expected)
+
+    def test_patterns_compile_once(self):
+        patterns = LRUCache(2)
+        with mock.patch("eval.PATTERNS", patterns):
+            found = test_eval(r"""
+                manifest digits with rune(s) unfold len(codex(findall("\d" knot s))) fold seal
+                manifest i with 0 seal
+                manifest total with 0 seal
+                whilst (i descends 1000) unfold
+                    transmute total with total augments digits("a1b22") seal
+                    transmute i with i augments 1 seal
+                fold
+                total
+            """)
+        self.assertEqual(found.inspect(), "3000")
+        self.assertEqual((patterns.misses, patterns.hits), (1, 999))
+
+    def test_patterns_evicted(self):
+        patterns = LRUCache(2)
+        with mock.patch("eval.PATTERNS", patterns):
+            test_eval('[search("a" knot "a") knot search("b" knot "b") knot search("a" knot "a" knot "i") knot search("a" knot "a")]')
+        self.assertEqual((patterns.misses, patterns.evictions), (4, 2))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,182 @@
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+# Hash bits consumed per level of the trie, giving 32 children per node
+BITS = 5
+MASK = (1 << BITS) - 1
+HASH_BITS = 64
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, hash: int, key: Hashable, value: Any):
+        self.hash = hash
+        self.key = key
+        self.value = value
+
+class _Collision:
+    """Leaves whose keys differ but whose hashes are equal in every bit"""
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash: int, leaves: Tuple[_Leaf, ...]):
+        self.hash = hash
+        self.leaves = leaves
+
+class _Node:
+    """
+    An interior node holding only the children whose bit is set in bitmap.
+    Its list of children is never changed once the node is built.
+    """
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap: int, children: list):
+        self.bitmap = bitmap
+        self.children = children
+
+def _hash(key: Hashable) -> int:
+    return hash(key) & ((1 << HASH_BITS) - 1)
+
+class HAMT:
+    """
+    A persistent hash array mapped trie. Updates return a new trie that
+    shares every node off the path to the changed key with the old one,
+    so both stay valid and an update costs O(log32 n) rather than a copy.
+    """
+    __slots__ = ("root", "size")
+
+    def __init__(self, root=None, size: int = 0):
+        self.root = root
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        h = _hash(key)
+        node = self.root
+        shift = 0
+        while True:
+            kind = type(node)
+            if kind is _Node:
+                bit = 1 << ((h >> shift) & MASK)
+                if not node.bitmap & bit:
+                    return default
+                node = node.children[(node.bitmap & (bit - 1)).bit_count()]
+                shift += BITS
+            elif kind is _Leaf:
+                return node.value if node.hash == h and node.key == key else default
+            elif kind is _Collision:
+                for leaf in node.leaves:
+                    if leaf.key == key:
+                        return leaf.value
+                return default
+            else:
+                return default
+
+    def set(self, key: Hashable, value: Any) -> "HAMT":
+        root, added = _set(self.root, 0, _hash(key), key, value)
+        if root is self.root:
+            return self
+        return HAMT(root, self.size + added)
+
+    def delete(self, key: Hashable) -> "HAMT":
+        root, removed = _delete(self.root, 0, _hash(key), key)
+        if not removed:
+            return self
+        return HAMT(root, self.size - 1)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            kind = type(node)
+            if kind is _Node:
+                stack.extend(node.children)
+            elif kind is _Leaf:
+                yield node.key, node.value
+            else:
+                for leaf in node.leaves:
+                    yield leaf.key, leaf.value
+
+def _set(node, shift: int, h: int, key: Hashable, value: Any) -> Tuple[Any, bool]:
+    """The node with key set to value, and whether the key is new"""
+    if node is None:
+        return _Leaf(h, key, value), True
+    kind = type(node)
+    if kind is _Node:
+        bit = 1 << ((h >> shift) & MASK)
+        index = (node.bitmap & (bit - 1)).bit_count()
+        children = node.children
+        if not node.bitmap & bit:
+            children = children.copy()
+            children.insert(index, _Leaf(h, key, value))
+            return _Node(node.bitmap | bit, children), True
+        child, added = _set(children[index], shift + BITS, h, key, value)
+        if child is children[index]:
+            return node, False
+        children = children.copy()
+        children[index] = child
+        return _Node(node.bitmap, children), added
+    if kind is _Leaf:
+        if node.hash == h and node.key == key:
+            if node.value is value:
+                return node, False
+            return _Leaf(h, key, value), False
+        return _merge(node, _Leaf(h, key, value), shift), True
+    # a collision
+    if node.hash != h:
+        return _merge(node, _Leaf(h, key, value), shift), True
+    for index, leaf in enumerate(node.leaves):
+        if leaf.key == key:
+            leaves = node.leaves[:index] + (_Leaf(h, key, value),) + node.leaves[index + 1:]
+            return _Collision(h, leaves), False
+    return _Collision(h, node.leaves + (_Leaf(h, key, value),)), True
+
+def _merge(existing, leaf: _Leaf, shift: int):
+    """A subtree holding an existing leaf or collision and a leaf with a different key"""
+    if existing.hash == leaf.hash:
+        return _Collision(leaf.hash, (existing, leaf))
+    old_fragment = (existing.hash >> shift) & MASK
+    new_fragment = (leaf.hash >> shift) & MASK
+    if old_fragment == new_fragment:
+        return _Node(1 << old_fragment, [_merge(existing, leaf, shift + BITS)])
+    children = [existing, leaf] if old_fragment < new_fragment else [leaf, existing]
+    return _Node((1 << old_fragment) | (1 << new_fragment), children)
+
+def _delete(node, shift: int, h: int, key: Hashable) -> Tuple[Optional[Any], bool]:
+    """The node without key, and whether the key was there"""
+    if node is None:
+        return None, False
+    kind = type(node)
+    if kind is _Leaf:
+        if node.hash == h and node.key == key:
+            return None, True
+        return node, False
+    if kind is _Collision:
+        leaves = tuple(leaf for leaf in node.leaves if leaf.key != key)
+        if len(leaves) == len(node.leaves):
+            return node, False
+        return (leaves[0] if len(leaves) == 1 else _Collision(h, leaves)), True
+    bit = 1 << ((h >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node, False
+    index = (node.bitmap & (bit - 1)).bit_count()
+    child, removed = _delete(node.children[index], shift + BITS, h, key)
+    if not removed:
+        return node, False
+    children = node.children.copy()
+    if child is None:
+        bitmap = node.bitmap & ~bit
+        del children[index]
+        if not children:
+            return None, True
+    else:
+        bitmap = node.bitmap
+        children[index] = child
+    # a lone leaf needs no node of its own and can sit higher in the trie
+    if len(children) == 1 and type(children[0]) is not _Node:
+        return children[0], True
+    return _Node(bitmap, children), True
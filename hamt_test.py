@@ -0,0 +1,56 @@
+import random
+import unittest
+from hamt import HAMT
+
+class Colliding:
+    """A key whose hash always collides with other instances"""
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and other.name == self.name
+
+class TestHAMT(unittest.TestCase):
+    def test_matches_a_dict(self):
+        rng = random.Random(7)
+        trie, expected = HAMT(), {}
+        for _ in range(20000):
+            key = rng.randrange(3000)
+            if rng.random() < 0.3:
+                trie = trie.delete(key)
+                expected.pop(key, None)
+            else:
+                trie = trie.set(key, key * 2)
+                expected[key] = key * 2
+        self.assertEqual(len(trie), len(expected))
+        self.assertEqual(dict(trie.items()), expected)
+        for key in range(3000):
+            self.assertEqual(trie.get(key), expected.get(key))
+
+    def test_updates_share_and_do_not_mutate(self):
+        empty = HAMT()
+        one = empty.set("a", 1)
+        two = one.set("b", 2)
+        replaced = two.set("a", 10)
+        self.assertEqual((len(empty), len(one), len(two), len(replaced)), (0, 1, 2, 2))
+        self.assertEqual((one.get("a"), two.get("a"), replaced.get("a")), (1, 1, 10))
+        self.assertNotIn("b", one)
+        self.assertIs(two.delete("missing"), two)
+        self.assertEqual(dict(two.delete("a").items()), {"b": 2})
+        self.assertEqual(dict(two.items()), {"a": 1, "b": 2})
+
+    def test_colliding_hashes(self):
+        trie = HAMT().set(42, "int")
+        for name in "abc":
+            trie = trie.set(Colliding(name), name)
+        self.assertEqual(len(trie), 4)
+        self.assertEqual([trie.get(Colliding(name)) for name in "abcd"], ["a", "b", "c", None])
+        self.assertEqual(trie.get(42), "int")
+        trie = trie.delete(Colliding("b")).delete(Colliding("a"))
+        self.assertEqual((len(trie), trie.get(Colliding("c")), trie.get(42)), (2, "c", "int"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import csv
+import gc
+import json
+from contextlib import contextmanager
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from object import Object, Integer, String, Array, Hash, Error, hash_key
+from hamt import HAMT
+from eval import VERITY, FALLACY, VOID, io_mishap, LINE_BUFFER
+
+def shared(cells: Sequence[str], make: Callable[[str], Object]) -> Array:
+    """A codex of make(cell) for every cell, one value made per distinct cell, since values never change"""
+    made = {cell: make(cell) for cell in set(cells)}
+    return Array.from_items(list(map(made.__getitem__, cells)))
+
+def number_column(cells: Sequence[str]) -> Optional[Array]:
+    """The cells as a codex of NUMBERs, packed when all are whole, or None if some are not numbers"""
+    try:
+        whole = list(map(int, cells))
+    except ValueError:
+        whole = None
+    if whole is not None:
+        try:
+            return Array.from_items(array("q", whole))
+        except OverflowError:
+            return Array.from_items([Integer(value) for value in whole])
+    try:
+        return shared(cells, lambda cell: Integer(float(cell)))
+    except ValueError:
+        return None
+
+def text_column(cells: Sequence[str]) -> Array:
+    return shared(cells, String)
+
+def to_object(value: Any) -> Object:
+    """A value decoded from JSON as the value it reads as"""
+    if value is None:
+        return VOID
+    if value is True:
+        return VERITY
+    if value is False:
+        return FALLACY
+    if isinstance(value, (int, float)):
+        return Integer(value)
+    if isinstance(value, str):
+        return String(value)
+    if isinstance(value, list):
+        return Array([to_object(item) for item in value])
+    pairs = HAMT()
+    for key, item in value.items():
+        name = String(key)
+        pairs = pairs.set(hash_key(name), (name, to_object(item)))
+    return Hash(pairs)
+
+def value_column(values: List[Any]) -> Array:
+    if all(type(value) is int for value in values):
+        try:
+            return Array.from_items(array("q", values))
+        except OverflowError:
+            pass
+    return Array([to_object(value) for value in values])
+
+@contextmanager
+def collection_paused() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while a file's values are made. They
+    hold no cycles, but making millions of them would otherwise set it off
+    over and over, each time walking everything made so far.
+    """
+    paused = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if paused:
+            gc.enable()
+
+def columns_tome(columns: Dict[str, Array]) -> Hash:
+    pairs = HAMT()
+    for name, column in columns.items():
+        key = String(name)
+        pairs = pairs.set(hash_key(key), (key, column))
+    return Hash(pairs)
+
+@collection_paused()
+def read_csv(path: str, delimiter: str = ",") -> Object:
+    """
+    The columns of a CSV file with a header row, as a tome from each name to
+    a codex. A column whose every cell is a number becomes NUMBERs, packed
+    64-bit when all are whole, and any other column SCROLLs. Cells are
+    gathered by column, not made into one value per row.
+    """
+    try:
+        with open(path, encoding="utf-8", newline="", buffering=LINE_BUFFER) as file:
+            rows = list(csv.reader(file, delimiter=delimiter))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return io_mishap("read_csv", path, e)
+    if not rows:
+        return columns_tome({})
+    names, rows = rows[0], rows[1:]
+    for line, row in enumerate(rows, 2):
+        if len(row) != len(names):
+            return Error(f"`read_csv` line {line} of {path} has {len(row)} fields, want {len(names)}")
+    columns = {}
+    for name, cells in zip(names, zip(*rows) if rows else [()] * len(names)):
+        column = number_column(cells)
+        columns[name] = column if column is not None else text_column(cells)
+    return columns_tome(columns)
+
+@collection_paused()
+def read_jsonl(path: str) -> Object:
+    """
+    The columns of a file holding a JSON object on each line, as read_csv
+    gives them. Every key met becomes a column, VOID in rows without it.
+    """
+    columns: Dict[str, List[Any]] = {}
+    count = 0
+    try:
+        with open(path, encoding="utf-8", buffering=LINE_BUFFER) as file:
+            for line, text in enumerate(file, 1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text.rstrip("\r\n"))
+                except json.JSONDecodeError as e:
+                    return Error(f"`read_jsonl` line {line} of {path} is not JSON: {e.msg} at column {e.colno}")
+                if not isinstance(row, dict):
+                    return Error(f"`read_jsonl` line {line} of {path} is not an object")
+                for name, value in row.items():
+                    column = columns.get(name)
+                    if column is None:
+                        column = columns[name] = [None] * count
+                    column.append(value)
+                count += 1
+                for column in columns.values():
+                    if len(column) < count:
+                        column.append(None)
+    except (OSError, UnicodeDecodeError) as e:
+        return io_mishap("read_jsonl", path, e)
+    return columns_tome({name: value_column(values) for name, values in columns.items()})
@@ -0,0 +1,82 @@
+import gc
+import os
+import tempfile
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from object import Error
+
+def run(source: str):
+    return Eval(Parser(Lexer(source)).parse_program(), Environment())
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def test_csv_columns(self):
+        path = self.write("fruit.csv", 'name,qty,price,big\napple,3,1.5,99999999999999999999\npear,10,2,1\n"fig, dried",7,0.25,2\n')
+        tests = [
+            ("name", "[apple knot pear knot fig, dried]"),
+            ("qty", "[3 knot 10 knot 7]"),
+            ("price", "[1.5 knot 2.0 knot 0.25]"),
+            ("big", "[99999999999999999999 knot 1 knot 2]"),
+        ]
+        for (column, expected) in tests:
+            with self.subTest(column=column):
+                self.assertEqual(run(f'read_csv("{path}")["{column}"]').inspect(), expected)
+        self.assertTrue(run(f'read_csv("{path}")["qty"]').packed)
+        self.assertEqual(run(f'reduce(rune(a knot b) unfold a augments b fold knot read_csv("{path}")["qty"])').inspect(), "20")
+        self.assertTrue(gc.isenabled())
+
+    def test_csv_delimiters_and_empty_files(self):
+        path = self.write("semi.csv", "a;b\n1;x\n")
+        self.assertEqual(run(f'read_csv("{path}" knot ";")').inspect(), "tome(a binds [1] knot b binds [x])")
+        path = self.write("header.csv", "a,b\n")
+        self.assertEqual(run(f'read_csv("{path}")').inspect(), "tome(a binds [] knot b binds [])")
+        path = self.write("empty.csv", "")
+        self.assertEqual(run(f'read_csv("{path}")').inspect(), "tome()")
+
+    def test_jsonl_columns(self):
+        path = self.write("events.jsonl", '{"id": 1, "ok": true, "tags": ["a"]}\n\n{"id": 2, "ok": false, "at": {"x": 1}}\n{"id": 3, "ok": null}\n')
+        tests = [
+            ("id", "[1 knot 2 knot 3]"),
+            ("ok", "[verity knot fallacy knot void]"),
+            ("tags", "[[a] knot void knot void]"),
+            ("at", "[void knot tome(x binds 1) knot void]"),
+        ]
+        for (column, expected) in tests:
+            with self.subTest(column=column):
+                self.assertEqual(run(f'read_jsonl("{path}")["{column}"]').inspect(), expected)
+        self.assertTrue(run(f'read_jsonl("{path}")["id"]').packed)
+
+    def test_errors(self):
+        ragged = self.write("ragged.csv", "a,b\n1,2\n3\n")
+        lists = self.write("lists.jsonl", '{"a": 1}\n[1]\n')
+        broken = self.write("broken.jsonl", '{"a": 1}\n{"a": \n')
+        missing = os.path.join(self.directory, "missing.csv")
+        tests = [
+            (f'read_csv("{ragged}")', f"`read_csv` line 3 of {ragged} has 1 fields, want 2"),
+            (f'read_jsonl("{lists}")', f"`read_jsonl` line 2 of {lists} is not an object"),
+            (f'read_jsonl("{broken}")', f"`read_jsonl` line 2 of {broken} is not JSON: Expecting value at column 7"),
+            (f'read_csv("{missing}")', f"`read_csv` cannot use {missing}: No such file or directory"),
+            (f'read_csv("{ragged}" knot ";;")', "`read_csv` delimiter must be one character, got ';;'"),
+            ("read_jsonl(1)", "argument to `read_jsonl` must be SCROLL, got NUMBER"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = run(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+if __name__ == "__main__":
+    unittest.main()
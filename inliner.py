@@ -0,0 +1,222 @@
+import copy
+from typing import Dict, List, Optional, Set, Tuple
+from ast1 import (
+    Node,
+    Program,
+    Expression,
+    ExpressionStatement,
+    BlockStatement,
+    Identifier,
+    IntegerLiteral,
+    BooleanLiteral,
+    StringLiteral,
+    PrefixExpression,
+    InfixExpression,
+    IfExpression,
+    FunctionLiteral,
+    CallExpression,
+)
+from analysis import local_names, free_identifiers, top_level_runes, body_expression
+from visitor import CHILD_FIELDS, NodeTransformer, iter_child_nodes, node_count
+
+# Largest rune body, in AST nodes, that will be substituted at a call site
+INLINE_MAX_SIZE = 16
+
+class InlineCandidate:
+    """A rune whose body may be substituted for calls to it"""
+    def __init__(self, name: str, index: int, parameters: List[str], body: Expression):
+        self.name = name
+        self.index = index  # top-level statement that defines the rune
+        self.parameters = parameters
+        self.body = body
+
+def inline_runes(program: Program, max_size: int = INLINE_MAX_SIZE) -> Program:
+    """
+    Replace calls to small, non-recursive runes with their bodies.
+
+    The program is rewritten in place and returned. A call is only inlined
+    where the runtime lookup of the callee is guaranteed to reach the
+    top-level manifest that defined it: the name is bound exactly once in
+    the whole program, never shadowed by a local, and the call sits in a
+    statement that runs after the definition.
+    """
+    candidates = find_inline_candidates(program, max_size)
+    if not candidates:
+        return program
+    for index, stmt in enumerate(program.statements):
+        visible = {name: c for name, c in candidates.items() if c.index < index}
+        if visible:
+            _CallInliner(visible).transform(stmt)
+    return program
+
+def find_inline_candidates(program: Program, max_size: int = INLINE_MAX_SIZE) -> Dict[str, InlineCandidate]:
+    """Collect the top-level runes that are safe and small enough to inline"""
+    locals_ = local_names(program)
+    candidates: Dict[str, InlineCandidate] = {}
+    for name, index in top_level_runes(program).items():
+        if name in locals_:
+            continue
+        fn = program.statements[index].value
+        params = [param.value for param in fn.parameters or []]
+        if len(set(params)) != len(params):
+            continue
+        body = body_expression(fn)
+        if body is None or node_count(body) > max_size:
+            continue
+        if not _is_inlinable_expression(body):
+            continue
+        # free names of the body must resolve to the same global at every call site
+        if free_identifiers(body, set(params)) & locals_:
+            continue
+        # snapshot the body, since the definition itself may be rewritten below
+        candidates[name] = InlineCandidate(name, index, params, copy.deepcopy(body))
+
+    # drop runes that can reach themselves, so that expansion always terminates
+    calls = {
+        name: free_identifiers(c.body, set(c.parameters)) & candidates.keys()
+        for name, c in candidates.items()
+    }
+    return {
+        name: c for name, c in candidates.items()
+        if not _reaches(name, name, calls)
+    }
+
+def _reaches(start: str, target: str, calls: Dict[str, Set[str]]) -> bool:
+    """Check whether target is reachable from start in the call graph"""
+    seen: Set[str] = set()
+    stack = list(calls.get(start, ()))
+    while stack:
+        name = stack.pop()
+        if name == target:
+            return True
+        if name not in seen:
+            seen.add(name)
+            stack.extend(calls.get(name, ()))
+    return False
+
+def _is_inlinable_expression(node: Node) -> bool:
+    """
+    Only expressions without binders or early returns can be moved into
+    another scope: no rune literals, no manifest and no yield.
+    """
+    if isinstance(node, (IntegerLiteral, BooleanLiteral, StringLiteral, Identifier)):
+        return True
+    if isinstance(node, PrefixExpression):
+        return node.right is not None and _is_inlinable_expression(node.right)
+    if isinstance(node, InfixExpression):
+        return (node.left is not None and node.right is not None
+                and _is_inlinable_expression(node.left)
+                and _is_inlinable_expression(node.right))
+    if isinstance(node, CallExpression):
+        return (node.function is not None and node.arguments is not None
+                and all(arg is not None for arg in node.arguments)
+                and all(_is_inlinable_expression(child) for child in iter_child_nodes(node)))
+    if isinstance(node, IfExpression):
+        return (node.condition is not None and node.consequence is not None
+                and _is_inlinable_expression(node.condition)
+                and _is_inlinable_block(node.consequence)
+                and (node.alternative is None or _is_inlinable_block(node.alternative)))
+    return False
+
+def _is_inlinable_block(block: BlockStatement) -> bool:
+    return all(
+        isinstance(stmt, ExpressionStatement)
+        and stmt.expression is not None
+        and _is_inlinable_expression(stmt.expression)
+        for stmt in block.statements
+    )
+
+def _is_constant(node: Node) -> bool:
+    """Arguments that can neither fail nor take time to evaluate"""
+    if isinstance(node, (IntegerLiteral, BooleanLiteral, StringLiteral)):
+        return True
+    return (isinstance(node, PrefixExpression)
+            and node.operator == "diminishes"
+            and isinstance(node.right, IntegerLiteral))
+
+def _evaluation_events(node: Node, params: Set[str], conditional: bool = False) -> List[Tuple[Optional[str], bool]]:
+    """
+    List, in evaluation order, the parameter reads (name) and the steps that
+    may raise a MISHAP (None) of an inlinable expression.
+    """
+    if isinstance(node, Identifier):
+        return [(node.value if node.value in params else None, conditional)]
+    if isinstance(node, IfExpression):
+        events = _evaluation_events(node.condition, params, conditional)
+        for block in (node.consequence, node.alternative):
+            for stmt in (block.statements if block is not None else []):
+                events += _evaluation_events(stmt.expression, params, True)
+        return events
+    events: List[Tuple[Optional[str], bool]] = []
+    for child in iter_child_nodes(node):
+        events += _evaluation_events(child, params, conditional)
+    if isinstance(node, (PrefixExpression, InfixExpression, CallExpression)):
+        events.append((None, conditional))
+    return events
+
+def _can_substitute(candidate: InlineCandidate, args: List[Expression]) -> bool:
+    """
+    A rune evaluates all of its arguments, left to right, before its body.
+    Substituting an argument for its parameter keeps that behaviour only if
+    the body reads every non-constant parameter, in argument order, before
+    doing anything that could fail. Arguments other than plain identifiers
+    are moved rather than copied, so their parameter must be read exactly once.
+    """
+    params = set(candidate.parameters)
+    events = _evaluation_events(candidate.body, params)
+    strict = [p for p, a in zip(candidate.parameters, args) if not _is_constant(a)]
+    moved = {p for p, a in zip(candidate.parameters, args)
+             if not _is_constant(a) and not isinstance(a, Identifier)}
+
+    reads: Dict[str, int] = {}
+    seen = 0
+    for name, conditional in events:
+        if name is not None:
+            reads[name] = reads.get(name, 0) + 1
+        if seen == len(strict) or (name is not None and name not in strict):
+            continue
+        if name is None or conditional:
+            return False
+        if reads[name] == 1:
+            if name != strict[seen]:
+                return False
+            seen += 1
+    return seen == len(strict) and all(reads.get(p) == 1 for p in moved)
+
+def _substitute(node: Node, bindings: Dict[str, Expression]) -> Node:
+    """Copy a rune body, replacing parameter reads with argument expressions"""
+    if isinstance(node, Identifier) and node.value in bindings:
+        arg = bindings[node.value]
+        # only identifiers and constants may be read more than once
+        return copy.deepcopy(arg) if isinstance(arg, Identifier) or _is_constant(arg) else arg
+    clone = copy.copy(node)
+    for field in CHILD_FIELDS.get(type(node), ()):
+        value = getattr(node, field)
+        if isinstance(value, list):
+            setattr(clone, field, [_substitute(child, bindings) for child in value])
+        elif value is not None:
+            setattr(clone, field, _substitute(value, bindings))
+    return clone
+
+class _CallInliner(NodeTransformer):
+    """
+    Replace calls to visible candidates with their bodies. Arguments are
+    inlined before the call that receives them, and the transformer revisits
+    each substituted body, so calls it contains are inlined in turn.
+    """
+    def __init__(self, visible: Dict[str, InlineCandidate]):
+        self.visible = visible
+
+    def transform_CallExpression(self, node: CallExpression) -> Node:
+        if not isinstance(node.function, Identifier):
+            return node
+        candidate = self.visible.get(node.function.value)
+        if candidate is None or node.arguments is None:
+            return node
+        if len(node.arguments) != len(candidate.parameters):
+            return node
+        if any(arg is None for arg in node.arguments):
+            return node
+        if not _can_substitute(candidate, node.arguments):
+            return node
+        return _substitute(candidate.body, dict(zip(candidate.parameters, node.arguments)))
@@ -0,0 +1,115 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from eval import Eval
+from environment import Environment
+from inliner import inline_runes, find_inline_candidates
+
+def parse(input):
+    l = Lexer(input)
+    p = Parser(l)
+    program = p.parse_program()
+    if p.errors:
+        raise AssertionError(f"parser errors: {p.errors}")
+    return program
+
+def run(program):
+    return Eval(program, Environment())
+
+class TestInliner(unittest.TestCase):
+    def test_inlines_small_rune(self):
+        input = """
+        manifest double with rune(x) unfold yield x conjoins 2 seal fold seal
+        double(5) seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(program.statements[1].string(), "(5 conjoins 2)")
+        self.assertEqual(run(program).value, 10)
+
+    def test_inlines_inside_rune_bodies(self):
+        input = """
+        manifest double with rune(x) unfold x conjoins 2 fold seal
+        manifest quad with rune(y) unfold double(double(y)) fold seal
+        quad(3) seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(
+            program.statements[1].string(),
+            "manifest quad with rune(y) unfold ((y conjoins 2) conjoins 2) fold seal",
+        )
+        self.assertEqual(run(program).value, 12)
+
+    def test_preserves_results(self):
+        tests = [
+            ("manifest add with rune(a knot b) unfold a augments b fold seal add(2 knot 3) seal", 5),
+            ("manifest add with rune(a knot b) unfold a augments b fold seal add(add(1 knot 2) knot 3) seal", 6),
+            ("manifest k with 7 seal manifest f with rune(a) unfold a conjoins k fold seal f(2) seal", 14),
+            ("manifest pick with rune(c knot a) unfold whence (c) unfold a fold elsewise unfold 0 fold fold seal pick(verity knot 4) seal", 4),
+            ('manifest greet with rune(n) unfold "hi " augments n fold seal greet("mystic") seal', "hi mystic"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(run(inline_runes(parse(input))).value, expected)
+                self.assertEqual(run(parse(input)).value, expected)
+
+    def test_skips_recursive_runes(self):
+        input = """
+        manifest f with rune(n) unfold whence (n descends 1) unfold 0 fold elsewise unfold f(n diminishes 1) fold fold seal
+        manifest g with rune(n) unfold h(n) fold seal
+        manifest h with rune(n) unfold g(n) fold seal
+        """
+        self.assertEqual(find_inline_candidates(parse(input)), {})
+
+    def test_guards_against_rebinding(self):
+        input = """
+        manifest double with rune(x) unfold x conjoins 2 fold seal
+        double(5) seal
+        manifest double with rune(x) unfold x fold seal
+        double(5) seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(program.statements[1].string(), "double(5)")
+        self.assertEqual(program.statements[3].string(), "double(5)")
+
+    def test_guards_against_shadowing(self):
+        input = """
+        manifest k with 2 seal
+        manifest scale with rune(x) unfold x conjoins k fold seal
+        manifest apply with rune(k) unfold scale(k) fold seal
+        apply(5) seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(program.statements[2].string(), "manifest apply with rune(k) unfold scale(k) fold seal")
+        self.assertEqual(run(program).value, 10)
+
+    def test_skips_calls_before_definition(self):
+        input = """
+        double(5) seal
+        manifest double with rune(x) unfold x conjoins 2 fold seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(program.statements[0].string(), "double(5)")
+
+    def test_keeps_argument_evaluation_order(self):
+        input = """
+        manifest sub with rune(a knot b) unfold b diminishes a fold seal
+        manifest twice with rune(a) unfold a augments a fold seal
+        sub(f(1) knot g(2)) seal
+        twice(f(1)) seal
+        twice(5) seal
+        """
+        program = inline_runes(parse(input))
+        self.assertEqual(program.statements[2].string(), "sub(f(1) knot g(2))")
+        self.assertEqual(program.statements[3].string(), "twice(f(1))")
+        self.assertEqual(program.statements[4].string(), "(5 augments 5)")
+
+    def test_size_heuristic(self):
+        input = """
+        manifest poly with rune(x) unfold x conjoins x augments x conjoins 3 augments 1 fold seal
+        poly(2) seal
+        """
+        self.assertEqual(inline_runes(parse(input), max_size=4).statements[1].string(), "poly(2)")
+        self.assertNotEqual(inline_runes(parse(input), max_size=16).statements[1].string(), "poly(2)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,10 @@ KEYWORDS = {
     'fallacy': TokenType.FALSE,
     'whence': TokenType.IF,
     'elsewise': TokenType.ELSE,
-    'yield': TokenType.RETURN
+    'yield': TokenType.RETURN,
+    'whilst': TokenType.WHILE,
+    'transmute': TokenType.REASSIGN,
+    'tome': TokenType.HASH
 }
 
 # Operator mappings for string literals
@@ -26,7 +29,8 @@ OPERATORS = {
     'knot': TokenType.COMMA,
     'seal': TokenType.SEMICOLON,
     'unfold': TokenType.LBRACE,
-    'fold': TokenType.RBRACE
+    'fold': TokenType.RBRACE,
+    'binds': TokenType.COLON
 }
 
 def lookup_ident(literal: str) -> TokenType:
@@ -126,6 +130,11 @@ class Lexer:
             token = Token(TokenType.LPAREN, self.ch)
         elif self.ch == ')':
             token = Token(TokenType.RPAREN, self.ch)
+        # Brackets enclose codices and indexes, and remain unchanged too
+        elif self.ch == '[':
+            token = Token(TokenType.LBRACKET, self.ch)
+        elif self.ch == ']':
+            token = Token(TokenType.RBRACKET, self.ch)
         elif self._is_letter(self.ch):
             # Handle identifiers, keywords, and word operators
             literal = self.read_identifier()
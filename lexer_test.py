@@ -24,6 +24,9 @@ fold
 10 diverges 9 seal
 "foobar"
 "foo bar"
+whilst transmute
+[1 knot 2]
+tome(1 binds 2)
 '''
 
         tests = [
@@ -102,6 +105,19 @@ fold
             (TokenType.SEMICOLON, "seal"),
             (TokenType.STRING, "foobar"),
             (TokenType.STRING, "foo bar"),
+            (TokenType.WHILE, "whilst"),
+            (TokenType.REASSIGN, "transmute"),
+            (TokenType.LBRACKET, "["),
+            (TokenType.INT, "1"),
+            (TokenType.COMMA, "knot"),
+            (TokenType.INT, "2"),
+            (TokenType.RBRACKET, "]"),
+            (TokenType.HASH, "tome"),
+            (TokenType.LPAREN, "("),
+            (TokenType.INT, "1"),
+            (TokenType.COLON, "binds"),
+            (TokenType.INT, "2"),
+            (TokenType.RPAREN, ")"),
             (TokenType.EOF, ""),
         ]
 
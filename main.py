@@ -1,6 +1,30 @@
-from repl import start
+import argparse
+import sys
+from repl import start, start_script
+from optimizer import PassManager, OPTIMIZATION_LEVELS
 
 def main():
-    start()
+    arg_parser = argparse.ArgumentParser(description="The WhyPY interpreter")
+    arg_parser.add_argument("script", nargs="?",
+                            help="script to run, leaving stdin for it to read with lines() (default: read the script from stdin)")
+    arg_parser.add_argument("-O", dest="level", type=int, default=0, choices=sorted(OPTIMIZATION_LEVELS),
+                            help="optimization level for scripts (default: 0)")
+    arg_parser.add_argument("--pass-report", action="store_true",
+                            help="print per-pass timing and node counts to stderr")
+    arg_parser.add_argument("--verify", action="store_true",
+                            help="check that every pass preserves results on the test corpus first")
+    args = arg_parser.parse_args()
 
-main()
+    optimizer = None
+    if args.level > 0 or args.verify or args.pass_report:
+        optimizer = PassManager(args.level, verify=args.verify)
+    if args.script is not None:
+        if not start_script(args.script, optimizer=optimizer):
+            sys.exit(1)
+    else:
+        start(optimizer=optimizer)
+    if args.pass_report and optimizer is not None:
+        print(optimizer.report(), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from object import Object
+
+# Entries a memoized rune keeps unless told otherwise
+DEFAULT_MEMO_SIZE = 128
+
+# Value types whose instances are compared by value and can key a memo
+MEMO_KEY_TYPES = ("NUMBER", "SCROLL", "TRUTH")
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry when full"""
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize  # 0 means unbounded
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0  # lookups that could not use the cache at all
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[Any, bool]:
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None, False
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value, True
+
+    def put(self, key: Hashable, value: Any):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.maxsize and len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> str:
+        bound = self.maxsize if self.maxsize else "unbounded"
+        return (f"hits {self.hits} knot misses {self.misses} knot bypasses {self.bypasses} "
+                f"knot evictions {self.evictions} knot size {len(self.entries)}/{bound}")
+
+def memo_key(args: List["Object"]) -> Optional[Tuple]:
+    """
+    Key a call by the values of its arguments, or return None when an
+    argument has no value identity (a rune, VOID, ...) and must not be cached.
+    The Python type is part of the key, since 2 and 2.0 are equal NUMBERs
+    that a rune may still treat differently.
+    """
+    key = []
+    for arg in args:
+        if arg.type() not in MEMO_KEY_TYPES:
+            return None
+        key.append((arg.type(), type(arg.value).__name__, arg.value))
+    return tuple(key)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Optional, Set, Tuple
+from object import (
+    Object,
+    Function,
+    Builtin,
+    Memoized,
+    INTEGER_OBJ,
+    STRING_OBJ,
+    BOOLEAN_OBJ,
+)
+from analysis import structural_hash, free_identifiers
+
+# Result types a persistent memo can store and restore exactly
+STORABLE_TYPES = (INTEGER_OBJ, STRING_OBJ, BOOLEAN_OBJ)
+
+class SqliteMemoStore:
+    """
+    Memoized results kept in a local SQLite file, shared by every process
+    that opens the same path and kept across restarts. Rows are keyed by
+    the rune's fingerprint, so a redefined rune never sees stale results.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def connect(self) -> sqlite3.Connection:
+        # a connection must not cross a fork, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                " rune TEXT NOT NULL, args TEXT NOT NULL, result TEXT NOT NULL,"
+                " PRIMARY KEY (rune, args))"
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, fingerprint: str, key: Tuple) -> Optional[Tuple[str, Any]]:
+        """The stored result as a (type, value) pair, or None if there is none"""
+        row = self.connect().execute(
+            "SELECT result FROM memo WHERE rune = ? AND args = ?",
+            (fingerprint, json.dumps(key)),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        object_type, value = json.loads(row[0])
+        return object_type, value
+
+    def put(self, fingerprint: str, key: Tuple, value: Object):
+        encoded = encode_result(value)
+        if encoded is None:
+            return
+        self.connect().execute(
+            "INSERT OR REPLACE INTO memo (rune, args, result) VALUES (?, ?, ?)",
+            (fingerprint, json.dumps(key), encoded),
+        )
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def stats(self) -> str:
+        return f"stored hits {self.hits} knot stored misses {self.misses}"
+
+def encode_result(value: Object) -> Optional[str]:
+    if value is None or value.type() not in STORABLE_TYPES:
+        return None
+    return json.dumps([value.type(), value.value])
+
+def rune_fingerprint(fn: Object) -> Optional[str]:
+    """
+    Hash a rune's parameters and body together with everything its body
+    reads from its closure: values of the storable types, other runes
+    (hashed the same way) and builtins by name. Returns None when the rune
+    depends on something else, since its results could then change without
+    the rune being redefined.
+    """
+    digest = hashlib.sha256()
+    if not _describe(fn, digest, set()):
+        return None
+    return digest.hexdigest()
+
+def _describe(value: Object, digest, seen: Set[int]) -> bool:
+    if id(value) in seen:
+        digest.update(b"cycle;")
+        return True
+    seen.add(id(value))
+    if isinstance(value, Memoized):
+        return _describe(value.fn, digest, seen)
+    if isinstance(value, Builtin):
+        digest.update(f"builtin {value.name};".encode())
+        return True
+    if isinstance(value, Function):
+        params = [param.value for param in value.parameters]
+        digest.update(f"rune {params} {structural_hash(value.body)};".encode())
+        for name in sorted(free_identifiers(value.body, set(params))):
+            captured, found = value.env.get(name)
+            digest.update(f"{name}=".encode())
+            if not found:
+                # resolves to a builtin, or to nothing at all, by name alone
+                digest.update(b"unbound;")
+            elif not _describe(captured, digest, seen):
+                return False
+        return True
+    if value.type() in STORABLE_TYPES:
+        digest.update(f"{value.type()} {value.value!r};".encode())
+        return True
+    return False
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from memo_store import rune_fingerprint
+
+FIB = """
+manifest fib with persist(rune(n) unfold
+    whence (n descends 2) unfold yield n seal fold
+    yield fib(n diminishes 1) augments fib(n diminishes 2) seal
+fold knot "{path}") seal
+"""
+
+def run(source: str, env: Environment):
+    return Eval(Parser(Lexer(source)).parse_program(), env)
+
+class TestMemoStore(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_results_survive_a_fresh_environment(self):
+        first = Environment()
+        run(FIB.format(path=self.path), first)
+        self.assertEqual(run("fib(20) seal", first).value, 6765)
+        self.assertIn("stored hits 0 knot stored misses 21", run("memostats(fib) seal", first).value)
+
+        second = Environment()
+        run(FIB.format(path=self.path), second)
+        self.assertEqual(run("fib(20) seal", second).value, 6765)
+        self.assertIn("stored hits 1 knot stored misses 0", run("memostats(fib) seal", second).value)
+
+    def test_stored_truths_are_the_singletons(self):
+        env = Environment()
+        source = f'manifest even with persist(rune(n) unfold n mirrors 2 fold knot "{self.path}") seal'
+        run(source, env)
+        run("even(3) seal", env)
+        env = Environment()
+        run(source, env)
+        self.assertEqual(run("negate even(3) seal", env).inspect(), "verity")
+
+    def test_fingerprint_covers_body_and_captures(self):
+        def fingerprint(source):
+            env = Environment()
+            run(source, env)
+            return rune_fingerprint(env.get("f")[0])
+
+        base = fingerprint("manifest k with 2 seal manifest f with rune(x) unfold x conjoins k fold seal")
+        self.assertEqual(base, fingerprint("manifest k with 2 seal manifest f with rune(x) unfold x conjoins k fold seal"))
+        self.assertNotEqual(base, fingerprint("manifest k with 3 seal manifest f with rune(x) unfold x conjoins k fold seal"))
+        self.assertNotEqual(base, fingerprint("manifest k with 2 seal manifest f with rune(x) unfold x augments k fold seal"))
+        self.assertNotEqual(base, fingerprint("manifest k with 2 seal manifest f with rune(y) unfold y conjoins k fold seal"))
+
+    def test_unstorable_dependencies_skip_the_store(self):
+        env = Environment()
+        run("manifest k with whence (fallacy) unfold 1 fold seal manifest f with rune(x) unfold k fold seal", env)
+        self.assertIsNone(rune_fingerprint(env.get("f")[0]))
+
+    def test_unstorable_results_and_arguments_are_not_stored(self):
+        source = f"""
+        manifest make with persist(rune(x) unfold rune(y) unfold x augments y fold fold knot "{self.path}") seal
+        manifest call with persist(rune(f) unfold f(1) fold knot "{self.path}") seal
+        """
+        env = Environment()
+        run(source, env)
+        self.assertEqual(run("make(1)(2) seal", env).value, 3)
+        self.assertEqual(run("call(rune(x) unfold x fold) seal", env).value, 1)
+        env = Environment()
+        run(source, env)
+        run("make(1) seal", env)
+        self.assertIn("stored hits 0 knot stored misses 1", run("memostats(make) seal", env).value)
+        run("call(rune(x) unfold x fold) seal", env)
+        self.assertIn("bypasses 1", run("memostats(call) seal", env).value)
+
+    def test_persist_errors(self):
+        env = Environment()
+        self.assertEqual(run("persist(rune(x) unfold x fold knot 5) seal", env).message,
+                         "memo store path must be SCROLL, got NUMBER")
+        self.assertEqual(run("persist(5 knot \"x.db\") seal", Environment()).message,
+                         "argument to `memoize` must be RITUAL, got NUMBER")
+        self.assertTrue(run('persist(rune(x) unfold x fold knot "/nonexistent/dir/x.db") seal',
+                            Environment()).message.startswith("cannot open memo store"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from memo import LRUCache, memo_key
+from object import Integer, String, Boolean, Null, Function
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), (1, True))
+        cache.put("c", 3)
+        self.assertEqual(cache.get("b"), (None, False))
+        self.assertEqual(cache.get("a"), (1, True))
+        self.assertEqual(cache.get("c"), (3, True))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (3, 1, 1, 2))
+
+    def test_unbounded(self):
+        cache = LRUCache(0)
+        for i in range(1000):
+            cache.put(i, i)
+        self.assertEqual((len(cache), cache.evictions), (1000, 0))
+        self.assertTrue(cache.stats().endswith("size 1000/unbounded"))
+
+    def test_memo_key(self):
+        self.assertEqual(
+            memo_key([Integer(1), String("a"), Boolean(True)]),
+            (("NUMBER", "int", 1), ("SCROLL", "str", "a"), ("TRUTH", "bool", True)),
+        )
+        self.assertNotEqual(memo_key([Integer(2)]), memo_key([Integer(2.0)]))
+        self.assertNotEqual(memo_key([Integer(1)]), memo_key([Boolean(True)]))
+        self.assertIsNone(memo_key([Integer(1), Null()]))
+        self.assertIsNone(memo_key([Function([], None, None)]))
+
+if __name__ == "__main__":
+    unittest.main()
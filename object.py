@@ -1,9 +1,19 @@
 import abc
-from typing import List, TYPE_CHECKING
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Union, TYPE_CHECKING
 from ast1 import Identifier, BlockStatement
+from memo import LRUCache, MEMO_KEY_TYPES
+from hamt import HAMT
+
+try:
+    import numpy
+except ImportError:  # vectors need numpy, everything else works without it
+    numpy = None
 
 # to avoid circular import
 if TYPE_CHECKING:
+    import re
     from environment import Environment
 
 ObjectType = str
@@ -15,6 +25,27 @@ RETURN_VALUE_OBJ = "YIELDED"
 ERROR_OBJ = "MISHAP"
 FUNCTION_OBJ = "RITUAL"
 STRING_OBJ = "SCROLL"
+BUILTIN_OBJ = "INCANTATION"
+ARRAY_OBJ = "CODEX"
+VECTOR_OBJ = "VECTOR"
+MATRIX_OBJ = "MATRIX"
+HASH_OBJ = "TOME"
+STREAM_OBJ = "STREAM"
+CHANNEL_OBJ = "CHANNEL"
+TASK_OBJ = "TASK"
+BYTES_OBJ = "BYTES"
+TABLE_OBJ = "TABLE"
+MATCH_OBJ = "MATCH"
+
+# Value types a tome can be keyed by, the same that can key a memo
+HASH_KEY_TYPES = MEMO_KEY_TYPES
+
+# Scrolls up to this many characters are joined outright rather than roped
+ROPE_LEAF = 256
+
+# Bounds of the signed 64-bit items a packed codex can hold
+PACKED_MIN = -2**63
+PACKED_MAX = 2**63 - 1
 
 
 class Object(abc.ABC):
@@ -28,8 +59,52 @@ class Object(abc.ABC):
 
 
 class String(Object):
+    """
+    A scroll. Augmenting one builds a rope node over both halves rather
+    than copying them, and the text is only joined, once, when read.
+    """
     def __init__(self, value: str):
-        self.value = value
+        self._value = value
+        self._left: "String" = None
+        self._right: "String" = None
+        self.length = len(value)
+
+    @classmethod
+    def concat(cls, left: "String", right: "String") -> "String":
+        if left.length + right.length <= ROPE_LEAF:
+            return cls(left.value + right.value)
+        if right.length <= ROPE_LEAF and left._value is None and left._right.length + right.length <= ROPE_LEAF:
+            # fold a short tail into the short leaf before it, keeping the rope shallow
+            return cls._node(left._left, cls(left._right.value + right.value))
+        return cls._node(left, right)
+
+    @classmethod
+    def _node(cls, left: "String", right: "String") -> "String":
+        node = cls.__new__(cls)
+        node._value = None
+        node._left = left
+        node._right = right
+        node.length = left.length + right.length
+        return node
+
+    @property
+    def value(self) -> str:
+        if self._value is None:
+            pieces = []
+            stack = [self]
+            while stack:
+                node = stack.pop()
+                if node._value is not None:
+                    pieces.append(node._value)
+                else:
+                    stack.append(node._right)
+                    stack.append(node._left)
+            self._value = "".join(pieces)
+            self._left = self._right = None
+        return self._value
+
+    def __len__(self) -> int:
+        return self.length
 
     def type(self) -> ObjectType:
         return STRING_OBJ
@@ -104,3 +179,317 @@ class Function(Object):
     def inspect(self) -> str:
         params = " knot ".join([p.string() for p in self.parameters])
         return f"rune({params}) unfold ... fold"
+
+
+class Builtin(Object):
+    def __init__(self, name: str, fn: Callable[..., Object]):
+        self.name = name
+        self.fn = fn
+
+    def type(self) -> ObjectType:
+        return BUILTIN_OBJ
+
+    def inspect(self) -> str:
+        return f"incantation {self.name}"
+
+
+class Memoized(Object):
+    def __init__(self, fn: Object, cache: LRUCache, store=None):
+        self.fn = fn
+        self.cache = cache
+        self.store = store  # persistent backend shared across processes, if any
+        self.fingerprint = None  # identifies the rune to the store, taken on first use
+
+    def type(self) -> ObjectType:
+        return FUNCTION_OBJ
+
+    def inspect(self) -> str:
+        return f"memoized {self.fn.inspect()}"
+
+
+class Array(Object):
+    """
+    An immutable sequence of values. While every element is a whole NUMBER
+    that fits in 64 bits, the values are packed into an array('q') at 8
+    bytes apiece and boxed as NUMBERs only when read.
+
+    Codices built by pushing onto one another share storage: a codex sees
+    only the first `length` items, so pushing onto the longest codex of a
+    storage appends in place instead of copying.
+    """
+    def __init__(self, elements: Iterable[Object]):
+        self.items = _pack(elements)
+        self.length = len(self.items)
+
+    @classmethod
+    def from_items(cls, items: Union[array, List[Object]], length: int = -1) -> 'Array':
+        """Wrap storage that is already packed, or known not to be packable"""
+        codex = cls.__new__(cls)
+        codex.items = items
+        codex.length = len(items) if length < 0 else length
+        return codex
+
+    @property
+    def packed(self) -> bool:
+        return isinstance(self.items, array)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def at(self, index: int) -> Object:
+        item = self.items[index]
+        return Integer(item) if self.packed else item
+
+    def elements(self) -> List[Object]:
+        if self.packed:
+            return [Integer(item) for item in self.items[:self.length]]
+        return self.items[:self.length]
+
+    def push(self, value: Object) -> 'Array':
+        if self.packed and not _packable(value):
+            return Array.from_items(self.elements() + [value])
+        items = self.items
+        if self.length != len(items):
+            # a longer codex already owns the items past our end
+            items = items[:self.length]
+        items.append(value.value if self.packed else value)
+        return Array.from_items(items, self.length + 1)
+
+    def concat(self, other: 'Array') -> 'Array':
+        if self.packed and other.packed:
+            return Array.from_items(self.items[:self.length] + other.items[:other.length])
+        # an unpacked codex always holds some element that cannot be packed
+        return Array.from_items(self.elements() + other.elements())
+
+    def type(self) -> ObjectType:
+        return ARRAY_OBJ
+
+    def inspect(self) -> str:
+        elements = " knot ".join(element.inspect() for element in self.elements())
+        return f"[{elements}]"
+
+
+def _packable(value: Object) -> bool:
+    return (isinstance(value, Integer) and type(value.value) is int
+            and PACKED_MIN <= value.value <= PACKED_MAX)
+
+def _pack(elements: Iterable[Object]) -> Union[array, List[Object]]:
+    elements = list(elements)
+    if all(_packable(element) for element in elements):
+        return array("q", [element.value for element in elements])
+    return elements
+
+
+class Hash(Object):
+    """
+    Keys bound to values in a persistent hash trie. Inserting or deleting
+    gives a new tome that shares all but O(log32 n) nodes with this one.
+    The trie maps each key's (type, value) to the key object and its value.
+    """
+    def __init__(self, pairs: HAMT):
+        self.pairs = pairs
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def type(self) -> ObjectType:
+        return HASH_OBJ
+
+    def inspect(self) -> str:
+        # sorted, since trie order follows hashes that differ between runs
+        entries = sorted(self.pairs.items(), key=lambda item: (item[0][0], item[0][1]))
+        show_pair = lambda entry: f"{entry[1][0].inspect()} binds {entry[1][1].inspect()}"
+        return f"tome({' knot '.join(_summarize(entries, show_pair))})"
+
+
+class Table(Object):
+    """
+    Named columns of equal length, each a codex, in the order they are
+    named. Builtins over a table work a column at a time.
+    """
+    def __init__(self, columns: Dict[str, Array]):
+        self.columns = columns
+        self.length = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def type(self) -> ObjectType:
+        return TABLE_OBJ
+
+    def inspect(self) -> str:
+        return f"table({' knot '.join(self.columns)}) of {self.length} rows"
+
+
+class Match(Object):
+    """
+    Where a pattern matched a scroll. It holds Python's match, so a group
+    becomes a SCROLL only when it is read.
+    """
+    def __init__(self, match: "re.Match"):
+        self.match = match
+
+    def __len__(self) -> int:
+        return self.match.re.groups + 1
+
+    def type(self) -> ObjectType:
+        return MATCH_OBJ
+
+    def inspect(self) -> str:
+        return f"match({self.match.group(0)} at {self.match.start()})"
+
+
+def hash_key(key: Object):
+    """The key a tome files a value under, or None if the type cannot key one"""
+    if key.type() not in HASH_KEY_TYPES:
+        return None
+    return (key.type(), key.value)
+
+
+class Stream(Object):
+    """
+    A lazy sequence. It holds a function that starts a fresh pass over the
+    elements, so none is computed before it is consumed, and a stream can
+    be consumed more than once.
+    """
+    def __init__(self, start: Callable[[], Iterator[Object]]):
+        self.start = start
+
+    def __iter__(self) -> Iterator[Object]:
+        return self.start()
+
+    def type(self) -> ObjectType:
+        return STREAM_OBJ
+
+    def inspect(self) -> str:
+        return "stream"
+
+
+class Bytes(Object):
+    """
+    Raw bytes, usually those of a mapped file: the span start to end of a
+    buffer. Slices and lines are spans of the same buffer, so no byte is
+    copied until the bytes are decoded to a SCROLL.
+    """
+    def __init__(self, buffer, start: int = 0, end: int = -1):
+        self.buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end < 0 else end
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self.buffer)[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def at(self, index: int) -> Object:
+        return Integer(self.buffer[self.start + index])
+
+    def slice(self, start: int, end: int) -> 'Bytes':
+        """The span from start up to end, counted from this one's start"""
+        return Bytes(self.buffer, self.start + start, self.start + max(start, end))
+
+    def find(self, needle: bytes, start: int = 0) -> int:
+        found = self.buffer.find(needle, self.start + start, self.end)
+        return found - self.start if found >= 0 else -1
+
+    def lines(self) -> Iterator['Bytes']:
+        """Each line as a span, without its line ending"""
+        buffer, position, end = self.buffer, self.start, self.end
+        while position < end:
+            newline = buffer.find(b"\n", position, end)
+            stop = end if newline < 0 else newline
+            if stop > position and buffer[stop - 1] == 13:  # \r of a \r\n ending
+                stop -= 1
+            yield Bytes(buffer, position, stop)
+            position = end if newline < 0 else newline + 1
+
+    def type(self) -> ObjectType:
+        return BYTES_OBJ
+
+    def inspect(self) -> str:
+        return f"bytes of {len(self)}"
+
+
+class Channel(Object):
+    """A queue of up to capacity values that tasks send to and receive from"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer: deque = deque()
+        self.closed = False
+
+    def type(self) -> ObjectType:
+        return CHANNEL_OBJ
+
+    def inspect(self) -> str:
+        state = "closed " if self.closed else ""
+        return f"{state}channel of {len(self.buffer)}/{self.capacity}"
+
+
+class Task(Object):
+    """A rune running on its own, a turn at a time, until it has a result"""
+    def __init__(self, steps: Iterator):
+        self.steps = steps
+        self.result: Object = None
+        self.done = False
+        self.waiting = None  # what the task is blocked on, if anything
+        self.awaited = None  # the I/O call the event loop is making for it, if any
+
+    def type(self) -> ObjectType:
+        return TASK_OBJ
+
+    def inspect(self) -> str:
+        if not self.done:
+            return "task"
+        return f"task done with {self.result.inspect() if self.result is not None else 'void'}"
+
+
+# Elements (or rows) shown from each end of a long vector before the rest is elided
+VECTOR_SHOWN = 3
+
+class Vector(Object):
+    """NUMBERs or TRUTHs held in a numpy array and operated on all at once"""
+    def __init__(self, values: "numpy.ndarray"):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def type(self) -> ObjectType:
+        return VECTOR_OBJ
+
+    def inspect(self) -> str:
+        shown = " knot ".join(_summarize(self.values, _show))
+        return f"vector[{shown}] of {len(self.values)}"
+
+
+class Matrix(Object):
+    """Rows of NUMBERs or TRUTHs held in a 2-D numpy array"""
+    def __init__(self, values: "numpy.ndarray"):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def type(self) -> ObjectType:
+        return MATRIX_OBJ
+
+    def inspect(self) -> str:
+        show_row = lambda row: "[" + " knot ".join(_summarize(row, _show)) + "]"
+        shown = " knot ".join(_summarize(self.values, show_row))
+        rows, columns = self.values.shape
+        return f"matrix[{shown}] of {rows}x{columns}"
+
+
+def _summarize(items, show: Callable) -> List[str]:
+    if len(items) <= 2 * VECTOR_SHOWN:
+        return [show(item) for item in items]
+    return ([show(item) for item in items[:VECTOR_SHOWN]] + ["..."]
+            + [show(item) for item in items[-VECTOR_SHOWN:]])
+
+
+def _show(value) -> str:
+    if isinstance(value, numpy.bool_):
+        return "verity" if value else "fallacy"
+    return str(value.item())
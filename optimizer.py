@@ -0,0 +1,159 @@
+import time
+from typing import Callable, List, Optional, Tuple
+from ast1 import Program
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from visitor import node_count
+from inliner import inline_runes
+from partial_eval import fold_pure_calls
+from type_inference import infer_types
+
+class Pass:
+    """An optimization pass that rewrites or annotates a whole program"""
+    def __init__(self, name: str, run: Callable[[Program], Program]):
+        self.name = name
+        self.run = run
+
+class PassStats:
+    """What one pass did to one program"""
+    def __init__(self, name: str, seconds: float, nodes_before: int, nodes_after: int):
+        self.name = name
+        self.seconds = seconds
+        self.nodes_before = nodes_before
+        self.nodes_after = nodes_after
+
+    def string(self) -> str:
+        return (f"{self.name:<16} {self.seconds * 1000:9.3f} ms "
+                f"{self.nodes_before:>8} -> {self.nodes_after:<8} nodes")
+
+class PassManager:
+    """
+    Run the passes of an optimization level over programs.
+
+    Passes assume they see the whole program: a name that is not bound in
+    it is treated as unknown, never as a binding made by earlier input.
+    """
+    def __init__(self, level: int = 0, verify: bool = False):
+        if level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"unknown optimization level: {level}")
+        self.level = level
+        self.verify = verify
+        self.stats: List[PassStats] = []
+        self.mishaps: List[str] = []  # MISHAPs proven before execution
+        available = {
+            "inline": inline_runes,
+            "partial-eval": fold_pure_calls,
+            "type-inference": self._infer_types,
+        }
+        self.passes = [Pass(name, available[name]) for name in OPTIMIZATION_LEVELS[level]]
+
+    def run(self, program: Program) -> Program:
+        if self.verify:
+            self.verify = False
+            failures = self.verify_corpus(VERIFY_CORPUS)
+            if failures:
+                raise AssertionError("optimization changed results:\n" + "\n".join(failures))
+        for opt_pass in self.passes:
+            before = node_count(program)
+            start = time.perf_counter()
+            program = opt_pass.run(program)
+            seconds = time.perf_counter() - start
+            self.stats.append(PassStats(opt_pass.name, seconds, before, node_count(program)))
+        return program
+
+    def report(self) -> str:
+        """Per-pass timing and node counts, one line per pass run"""
+        if not self.stats:
+            return "no passes run"
+        return "\n".join(stats.string() for stats in self.stats)
+
+    def verify_corpus(self, corpus: List[str]) -> List[str]:
+        """
+        Check each pass on its own and the level as a whole against the
+        unoptimized result of every program in the corpus.
+        """
+        failures = []
+        mishaps = list(self.mishaps)
+        for source in corpus:
+            expected = _outcome(_parse(source))
+            for opt_pass in self.passes:
+                got = _outcome(opt_pass.run(_parse(source)))
+                if got != expected:
+                    failures.append(f"{opt_pass.name}: {source.strip()!r} gave {got}, expected {expected}")
+            program = _parse(source)
+            for opt_pass in self.passes:
+                program = opt_pass.run(program)
+            got = _outcome(program)
+            if got != expected:
+                failures.append(f"-O{self.level}: {source.strip()!r} gave {got}, expected {expected}")
+        self.mishaps = mishaps
+        return failures
+
+    def _infer_types(self, program: Program) -> Program:
+        self.mishaps.extend(infer_types(program))
+        return program
+
+def _parse(source: str) -> Program:
+    parser = Parser(Lexer(source))
+    program = parser.parse_program()
+    if parser.errors:
+        raise ValueError(f"corpus program does not parse: {parser.errors}")
+    return program
+
+def _outcome(program: Program) -> Optional[Tuple[str, str]]:
+    result = Eval(program, Environment())
+    if result is None:
+        return None
+    return (result.type(), result.inspect())
+
+# Passes run at each optimization level, in order
+OPTIMIZATION_LEVELS = {
+    0: [],
+    1: ["partial-eval", "type-inference"],
+    2: ["inline", "partial-eval", "type-inference"],
+}
+
+# Programs whose results every pass must preserve in verify mode
+VERIFY_CORPUS = [
+    "5 augments 5 conjoins 2 diminishes 10 divide 2 seal",
+    "manifest a with 5 seal manifest b with a seal manifest c with a augments b augments 5 seal c seal",
+    '"Hello" augments " " augments "World!" seal',
+    "whence (1 descends 2) unfold 10 fold elsewise unfold 20 fold seal",
+    "5 augments verity seal",
+    "manifest double with rune(x) unfold yield x conjoins 2 seal fold seal double(double(5)) seal",
+    "manifest add with rune(x knot y) unfold x augments y fold seal add(5 augments 5 knot add(5 knot 5)) seal",
+    "manifest scale with rune(x) unfold x conjoins 4 fold seal manifest size with scale(1024) seal size seal",
+    """
+    manifest fib with rune(n) unfold
+        whence (n descends 2) unfold yield n seal fold
+        yield fib(n diminishes 1) augments fib(n diminishes 2) seal
+    fold seal
+    fib(12) seal
+    """,
+    """
+    manifest newAdder with rune(x) unfold rune(y) unfold x augments y fold fold seal
+    manifest addTwo with newAdder(2) seal
+    addTwo(2) seal
+    """,
+    """
+    manifest k with 2 seal
+    manifest scale with rune(x) unfold x conjoins k fold seal
+    manifest apply with rune(k) unfold scale(k) fold seal
+    apply(5) seal
+    """,
+    """
+    manifest total with rune(n) unfold
+        manifest i with 0 seal manifest sum with 0 seal
+        whilst (i descends n) unfold transmute i with i augments 1 seal transmute sum with sum augments i seal fold
+        sum
+    fold seal
+    total(100) seal
+    """,
+    "manifest i with 0 seal whilst (i descends 50) unfold transmute i with i augments 2 seal fold i seal",
+    "manifest f with rune(x) unfold x conjoins 2 augments 1 fold seal f(vector([1 knot 2]))[1] seal",
+    "manifest pick with rune(c knot a) unfold whence (c) unfold a fold fold seal pick(fallacy knot 4) seal",
+    'manifest bad with rune(x) unfold x augments "s" fold seal bad(1) seal',
+    "manifest sub with rune(a knot b) unfold b diminishes a fold seal sub(nope knot 2) seal",
+]
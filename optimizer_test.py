@@ -0,0 +1,71 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from eval import Eval
+from environment import Environment
+from optimizer import PassManager, Pass, VERIFY_CORPUS
+
+def parse(input):
+    l = Lexer(input)
+    p = Parser(l)
+    program = p.parse_program()
+    if p.errors:
+        raise AssertionError(f"parser errors: {p.errors}")
+    return program
+
+class TestOptimizer(unittest.TestCase):
+    def test_levels(self):
+        input = """
+        manifest double with rune(x) unfold yield x conjoins 2 seal fold seal
+        manifest get with rune() unfold double(double(21)) fold seal
+        get() seal
+        """
+        expected = {
+            0: ("manifest get with rune() unfold double(double(21)) fold seal", "get()"),
+            1: ("manifest get with rune() unfold double(double(21)) fold seal", "84"),
+            2: ("manifest get with rune() unfold ((21 conjoins 2) conjoins 2) fold seal", "((21 conjoins 2) conjoins 2)"),
+        }
+        for level, (definition, call) in expected.items():
+            with self.subTest(level=level):
+                manager = PassManager(level)
+                program = manager.run(parse(input))
+                self.assertEqual(program.statements[1].string(), definition)
+                self.assertEqual(program.statements[2].string(), call)
+                self.assertEqual(Eval(program, Environment()).value, 84)
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            PassManager(3)
+
+    def test_report(self):
+        manager = PassManager(2)
+        manager.run(parse("manifest add with rune(a knot b) unfold a augments b fold seal add(1 knot 2) seal"))
+        self.assertEqual([stats.name for stats in manager.stats], ["inline", "partial-eval", "type-inference"])
+        self.assertEqual([(s.nodes_before, s.nodes_after) for s in manager.stats], [(16, 15), (15, 15), (15, 15)])
+        self.assertEqual(len(manager.report().splitlines()), 3)
+
+    def test_report_without_passes(self):
+        manager = PassManager(0)
+        manager.run(parse("1 augments 2 seal"))
+        self.assertEqual(manager.report(), "no passes run")
+
+    def test_foreseen_mishaps(self):
+        manager = PassManager(1)
+        manager.run(parse('manifest s with "a" seal rune() unfold s conjoins 2 fold seal'))
+        self.assertEqual(manager.mishaps, ["type mismatch: SCROLL conjoins NUMBER"])
+
+    def test_verify(self):
+        for level in (0, 1, 2):
+            with self.subTest(level=level):
+                self.assertEqual(PassManager(level).verify_corpus(VERIFY_CORPUS), [])
+
+        manager = PassManager(1, verify=True)
+        manager.passes.append(Pass("broken", lambda program: parse("0")))
+        failures = manager.verify_corpus(VERIFY_CORPUS[:1])
+        self.assertEqual(len(failures), 2)
+        self.assertTrue(failures[0].startswith("broken: "))
+        with self.assertRaises(AssertionError):
+            manager.run(parse("1"))
+
+if __name__ == "__main__":
+    unittest.main()
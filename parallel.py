@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from object import Object, Array, Error
+from eval import is_mishap, rune_caller
+from serialize import dumps, loads
+
+# Chunks of elements per worker, so that a slow chunk does not leave the others idle
+CHUNKS_PER_WORKER = 4
+
+# The rune a worker applies, set once as the worker starts
+_call = None
+
+def _start_worker(payload: bytes):
+    global _call
+    _call = rune_caller(loads(payload), 1, "pmap")
+
+def _apply_chunk(payload: bytes) -> bytes:
+    results = []
+    for arg in loads(payload):
+        result = _call(arg)
+        results.append(result)
+        if is_mishap(result):
+            break
+    try:
+        return dumps(results)
+    except ValueError as e:
+        return dumps([Error(f"`pmap` cannot send a result back: {e}")])
+
+def parallel_map(fn: Object, elements: List[Object], workers: Optional[int] = None) -> Object:
+    """
+    Apply fn to every element in worker processes, one per core unless told
+    otherwise, each sent the rune once and then chunks of elements. Results
+    come back in order; the first MISHAP stops the rest and is returned.
+    """
+    if not elements:
+        return Array([])
+    workers = min(workers or os.cpu_count() or 1, len(elements))
+    size = max(1, -(-len(elements) // (workers * CHUNKS_PER_WORKER)))
+    try:
+        # a rune carries only what its body reads, not its whole closure
+        payload = dumps(fn, reads_only=True)
+        chunks = [dumps(elements[start:start + size]) for start in range(0, len(elements), size)]
+    except ValueError as e:
+        return Error(f"`pmap` cannot send its arguments to workers: {e}")
+    results = []
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=(payload,))
+    except (OSError, NotImplementedError) as e:
+        return Error(f"`pmap` cannot start workers: {e}")
+    try:
+        for chunk in pool.map(_apply_chunk, chunks):
+            for result in loads(chunk):
+                if is_mishap(result):
+                    return result
+                results.append(result)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return Array(results)
@@ -0,0 +1,60 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from object import Error
+
+FIB = """
+manifest fib with rune(n) unfold
+    whence (n descends 2) unfold yield n seal fold
+    yield fib(n diminishes 1) augments fib(n diminishes 2) seal
+fold seal
+"""
+
+def run(source: str, env: Environment = None):
+    return Eval(Parser(Lexer(source)).parse_program(), env or Environment())
+
+class TestParallel(unittest.TestCase):
+    def test_results_keep_their_order(self):
+        evaluated = run(FIB + "manifest base with 100 seal pmap(rune(n) unfold fib(n) augments base fold knot [15 knot 1 knot 10 knot 12 knot 2] knot 2)")
+        self.assertEqual(evaluated.inspect(), "[710 knot 101 knot 155 knot 244 knot 101]")
+
+    def test_sends_streams_builtins_and_runes(self):
+        tests = [
+            ("pmap(len knot map(rune(n) unfold codex(range(n)) fold knot range(3)) knot 2)", "[0 knot 1 knot 2]"),
+            ("pmap(rune(n) unfold n mirrors 2 fold knot range(4) knot 2)", "[fallacy knot fallacy knot verity knot fallacy]"),
+            ("manifest l with len seal pmap(rune(s) unfold l(s) fold knot [\"ab\" knot \"c\"] knot 2)", "[2 knot 1]"),
+            ("map(rune(f) unfold f(1) fold knot pmap(rune(n) unfold rune(x) unfold x augments n fold fold knot range(3) knot 2))",
+             "[1 knot 2 knot 3]"),
+            ("pmap(rune(n) unfold n fold knot [])", "[]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(run(input).inspect(), expected)
+
+    def test_truths_come_back_as_the_singletons(self):
+        evaluated = run("whence (pmap(rune(n) unfold n ascends 1 fold knot [2] knot 1)[0]) unfold 1 fold elsewise unfold 2 fold")
+        self.assertEqual(evaluated.value, 1)
+
+    def test_errors(self):
+        tests = [
+            ("pmap(rune(n) unfold whence (n mirrors 7) unfold nope fold elsewise unfold n fold fold knot range(20) knot 2)",
+             "identifier not found: nope"),
+            ("pmap(rune(n) unfold n fold knot [range(3)])",
+             "`pmap` cannot send its arguments to workers: cannot encode a STREAM"),
+            ("pmap(rune(n) unfold range(n) fold knot [1] knot 1)",
+             "`pmap` cannot send a result back: cannot encode a STREAM"),
+            ("pmap(rune(a knot b) unfold a fold knot [1])",
+             "rune given to `pmap` takes wrong number of arguments. got=2, want=1"),
+            ("pmap(rune(n) unfold n fold knot [1] knot 0)", "`pmap` needs at least 1 worker, got 0"),
+            ("pmap(rune(n) unfold n fold knot 1)", "argument to `pmap` must be CODEX or STREAM, got NUMBER"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = run(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,7 +18,12 @@ from ast1 import (
     BlockStatement, 
     FunctionLiteral, 
     CallExpression,
-    StringLiteral
+    StringLiteral,
+    WhileStatement,
+    AssignStatement,
+    ArrayLiteral,
+    IndexExpression,
+    HashLiteral
 )
 
 # Esoteric operator mappings
@@ -43,7 +48,13 @@ OPERATOR_LITERALS = {
     TokenType.FALSE: "fallacy",
     TokenType.IF: "whence",
     TokenType.ELSE: "elsewise",
-    TokenType.RETURN: "yield"
+    TokenType.RETURN: "yield",
+    TokenType.WHILE: "whilst",
+    TokenType.REASSIGN: "transmute",
+    TokenType.LBRACKET: "[",
+    TokenType.RBRACKET: "]",
+    TokenType.HASH: "tome",
+    TokenType.COLON: "binds"
 }
 
 # Precedence levels
@@ -55,6 +66,7 @@ class Precedence(Enum):
     PRODUCT = auto()     # conjoins, divide
     PREFIX = auto()      # negate, diminishes
     CALL = auto()        # function(x)
+    INDEX = auto()       # codex[index]
 
 # Precedence mapping
 PRECEDENCES = {
@@ -67,6 +79,7 @@ PRECEDENCES = {
     TokenType.SLASH: Precedence.PRODUCT,
     TokenType.ASTERISK: Precedence.PRODUCT,
     TokenType.LPAREN: Precedence.CALL,
+    TokenType.LBRACKET: Precedence.INDEX,
 }
 
 class Parser:
@@ -105,6 +118,8 @@ class Parser:
             TokenType.IF: self.parse_if_expression,
             TokenType.FUNCTION: self.parse_function_literal,
             TokenType.STRING: self.parse_string_literal,
+            TokenType.LBRACKET: self.parse_array_literal,
+            TokenType.HASH: self.parse_hash_literal,
         }
 
     def _register_infix_fns(self):
@@ -119,6 +134,7 @@ class Parser:
             TokenType.LT: self.parse_infix_expression,
             TokenType.GT: self.parse_infix_expression,
             TokenType.LPAREN: self.parse_call_expression,
+            TokenType.LBRACKET: self.parse_index_expression,
         }
 
     def next_token(self):
@@ -188,6 +204,10 @@ class Parser:
             return self.parse_let_statement()
         elif self.cur_token.type == TokenType.RETURN:
             return self.parse_return_statement()
+        elif self.cur_token.type == TokenType.REASSIGN:
+            return self.parse_assign_statement()
+        elif self.cur_token.type == TokenType.WHILE:
+            return self.parse_while_statement()
         else:
             return self.parse_expression_statement()
 
@@ -224,6 +244,69 @@ class Parser:
 
         return stmt
 
+    def parse_assign_statement(self) -> Optional[AssignStatement]:
+        """Parse a statement rebinding an existing name"""
+        stmt = AssignStatement(
+            token=self.cur_token,
+            name=None,
+            value=None
+        )
+
+        # Expect the name being rebound
+        if not self.expect_peek(TokenType.IDENT):
+            return None
+
+        stmt.name = Identifier(
+            token=self.cur_token,
+            value=self.cur_token.literal
+        )
+
+        # Expect an assignment token
+        if not self.expect_peek(TokenType.ASSIGN):
+            return None
+
+        # Parse the new value
+        self.next_token()
+        stmt.value = self.parse_expression(Precedence.LOWEST)
+
+        # Optional semicolon
+        if self.peek_token_is(TokenType.SEMICOLON):
+            self.next_token()
+
+        return stmt
+
+    def parse_while_statement(self) -> Optional[WhileStatement]:
+        """Parse a loop that repeats its body while the condition holds"""
+        stmt = WhileStatement(
+            token=self.cur_token,
+            condition=None,
+            body=None
+        )
+
+        # Expect a left parenthesis around the condition
+        if not self.expect_peek(TokenType.LPAREN):
+            return None
+
+        # Move to the condition
+        self.next_token()
+        stmt.condition = self.parse_expression(Precedence.LOWEST)
+
+        # Expect a right parenthesis after the condition
+        if not self.expect_peek(TokenType.RPAREN):
+            return None
+
+        # Expect a left brace for the body
+        if not self.expect_peek(TokenType.LBRACE):
+            return None
+
+        stmt.body = self.parse_block_statement()
+
+        # Optional semicolon
+        if self.peek_token_is(TokenType.SEMICOLON):
+            self.next_token()
+
+        return stmt
+
     def parse_return_statement(self) -> Optional[ReturnStatement]:
         """Parse a return statement"""
         stmt = ReturnStatement(
@@ -500,35 +583,103 @@ class Parser:
 
     def parse_call_arguments(self) -> Optional[List[Expression]]:
         """Parse function call arguments"""
+        return self.parse_expression_list(TokenType.RPAREN)
+
+    def parse_expression_list(self, end: TokenType) -> Optional[List[Expression]]:
+        """Parse expressions separated by knots up to the end token"""
         args: List[Expression] = []
 
-        # If immediately followed by right parenthesis, return empty list
-        if self.peek_token_is(TokenType.RPAREN):
+        # If immediately followed by the end token, return empty list
+        if self.peek_token_is(end):
             self.next_token()
             return args
 
-        # Move to the first argument
+        # Move to the first expression
         self.next_token()
         
-        # Parse the first argument
+        # Parse the first expression
         args.append(self.parse_expression(Precedence.LOWEST))
 
-        # Parse additional arguments separated by commas
+        # Parse additional expressions separated by commas
         while self.peek_token_is(TokenType.COMMA):
             # Move past the comma
             self.next_token()
-            # Move to the next argument
+            # Move to the next expression
             self.next_token()
             
-            # Parse the argument
+            # Parse the expression
             args.append(self.parse_expression(Precedence.LOWEST))
 
-        # Expect a right parenthesis at the end
-        if not self.expect_peek(TokenType.RPAREN):
+        # Expect the end token
+        if not self.expect_peek(end):
             return None
 
         return args
 
+    def parse_array_literal(self) -> Optional[ArrayLiteral]:
+        """Parse a codex literal"""
+        array = ArrayLiteral(
+            token=self.cur_token,
+            elements=[]
+        )
+
+        array.elements = self.parse_expression_list(TokenType.RBRACKET)
+        if array.elements is None:
+            return None
+
+        return array
+
+    def parse_hash_literal(self) -> Optional[HashLiteral]:
+        """Parse a tome literal of key binds value pairs"""
+        tome = HashLiteral(
+            token=self.cur_token,
+            entries=[]
+        )
+
+        # Expect a left parenthesis around the pairs
+        if not self.expect_peek(TokenType.LPAREN):
+            return None
+
+        while not self.peek_token_is(TokenType.RPAREN):
+            # Move to the key
+            self.next_token()
+            tome.entries.append(self.parse_expression(Precedence.LOWEST))
+
+            # Expect binds between key and value
+            if not self.expect_peek(TokenType.COLON):
+                return None
+
+            # Move to the value
+            self.next_token()
+            tome.entries.append(self.parse_expression(Precedence.LOWEST))
+
+            # Pairs are separated by knots
+            if not self.peek_token_is(TokenType.RPAREN) and not self.expect_peek(TokenType.COMMA):
+                return None
+
+        # Move onto the right parenthesis
+        self.next_token()
+
+        return tome
+
+    def parse_index_expression(self, left: Expression) -> Optional[IndexExpression]:
+        """Parse an index into a codex"""
+        exp = IndexExpression(
+            token=self.cur_token,
+            left=left,
+            index=None
+        )
+
+        # Move to the index
+        self.next_token()
+        exp.index = self.parse_expression(Precedence.LOWEST)
+
+        # Expect a right bracket after the index
+        if not self.expect_peek(TokenType.RBRACKET):
+            return None
+
+        return exp
+
     def parse_string_literal(self) -> StringLiteral:
         """Parse a string literal"""
         return StringLiteral(
@@ -572,6 +723,18 @@ def print_ast(program: Program):
             _print_node(node.name, new_prefix, False)
             _print_node(node.value, new_prefix, True)
         
+        elif isinstance(node, AssignStatement):
+            print(f"{prefix}{connector}AssignStatement")
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            _print_node(node.name, new_prefix, False)
+            _print_node(node.value, new_prefix, True)
+
+        elif isinstance(node, WhileStatement):
+            print(f"{prefix}{connector}WhileStatement")
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            _print_node(node.condition, new_prefix, False)
+            _print_node(node.body, new_prefix, True)
+
         elif isinstance(node, ReturnStatement):
             print(f"{prefix}{connector}ReturnStatement")
             new_prefix = prefix + ("    " if is_last else "│   ")
@@ -636,6 +799,26 @@ def print_ast(program: Program):
             for i, arg in enumerate(node.arguments):
                 _print_node(arg, args_prefix, i == len(node.arguments) - 1)
         
+        elif isinstance(node, ArrayLiteral):
+            print(f"{prefix}{connector}ArrayLiteral")
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            for i, element in enumerate(node.elements):
+                _print_node(element, new_prefix, i == len(node.elements) - 1)
+
+        elif isinstance(node, IndexExpression):
+            print(f"{prefix}{connector}IndexExpression")
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            _print_node(node.left, new_prefix, False)
+            _print_node(node.index, new_prefix, True)
+
+        elif isinstance(node, HashLiteral):
+            print(f"{prefix}{connector}HashLiteral")
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            for i, (key, value) in enumerate(node.pairs):
+                last = i == len(node.pairs) - 1
+                _print_node(key, new_prefix, False)
+                _print_node(value, new_prefix, last)
+
         elif isinstance(node, GroupedExpression):
             print(f"{prefix}{connector}GroupedExpression")
             new_prefix = prefix + ("    " if is_last else "│   ")
@@ -514,5 +514,75 @@ yield 69 seal
         if literal.value != "hello world":
             self.fail(f"literal.value not 'hello world'. got='{literal.value}'")
 
+    def test_while_and_assign_statements(self):
+        input_code = "whilst (i descends 10) unfold transmute i with i augments 1 seal fold"
+        lexer = Lexer(input_code)
+        parser = Parser(lexer)
+        program = parser.parse_program()
+        self._check_parser_errors(parser)
+
+        if len(program.statements) != 1:
+            self.fail(f"program.statements does not contain 1 statements. got={len(program.statements)}")
+
+        stmt = program.statements[0]
+        if not isinstance(stmt, WhileStatement):
+            self.fail(f"program.statements[0] is not WhileStatement. got={type(stmt)}")
+
+        self._test_infix_expression(stmt.condition, "i", "descends", 10)
+
+        if len(stmt.body.statements) != 1:
+            self.fail(f"loop body does not contain 1 statements. got={len(stmt.body.statements)}")
+
+        assign = stmt.body.statements[0]
+        if not isinstance(assign, AssignStatement):
+            self.fail(f"loop body statement is not AssignStatement. got={type(assign)}")
+
+        self._test_literal_expression(assign.name, "i")
+        self._test_infix_expression(assign.value, "i", "augments", 1)
+        self.assertEqual(program.string(), "whilst (i descends 10) unfold transmute i with (i augments 1) seal fold")
+
+    def test_array_and_index_expressions(self):
+        tests = [
+            ("[1 knot 2 conjoins 2 knot 3 augments 3]", "[1 knot (2 conjoins 2) knot (3 augments 3)]"),
+            ("[]", "[]"),
+            ("myArray[1 augments 1]", "(myArray[(1 augments 1)])"),
+            ("a conjoins [1 knot 2 knot 3 knot 4][b conjoins c] conjoins d", "((a conjoins ([1 knot 2 knot 3 knot 4][(b conjoins c)])) conjoins d)"),
+            ("add(a conjoins b[2] knot b[1])", "add((a conjoins (b[2])) knot (b[1]))"),
+        ]
+        for (input_code, expected) in tests:
+            with self.subTest(input=input_code):
+                lexer = Lexer(input_code)
+                parser = Parser(lexer)
+                program = parser.parse_program()
+                self._check_parser_errors(parser)
+                self.assertEqual(program.string(), expected)
+
+        program = Parser(Lexer("[1 knot 2][0]")).parse_program()
+        index = program.statements[0].expression
+        self.assertIsInstance(index, IndexExpression)
+        self.assertIsInstance(index.left, ArrayLiteral)
+        self.assertEqual(len(index.left.elements), 2)
+
+    def test_hash_literals(self):
+        tests = [
+            ("tome()", "tome()", 0),
+            ('tome("one" binds 1 knot "two" binds 2)', "tome(one binds 1 knot two binds 2)", 2),
+            ('tome("one" binds 0 augments 1 knot two binds 10 diminishes 8)', "tome(one binds (0 augments 1) knot two binds (10 diminishes 8))", 2),
+            ('tome(1 binds tome(verity binds [1]))[1]', "(tome(1 binds tome(verity binds [1]))[1])", None),
+        ]
+        for (input_code, expected, count) in tests:
+            with self.subTest(input=input_code):
+                parser = Parser(Lexer(input_code))
+                program = parser.parse_program()
+                self._check_parser_errors(parser)
+                self.assertEqual(program.string(), expected)
+                if count is not None:
+                    self.assertIsInstance(program.statements[0].expression, HashLiteral)
+                    self.assertEqual(len(program.statements[0].expression.pairs), count)
+
+        parser = Parser(Lexer("tome(1 2)"))
+        parser.parse_program()
+        self.assertEqual(parser.errors[0], "expected next token to be binds, got TokenType.INT instead")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
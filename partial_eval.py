@@ -0,0 +1,193 @@
+from typing import Dict, List, Optional, Set
+from tok import Token, TokenType
+from ast1 import (
+    Node,
+    Program,
+    Expression,
+    LetStatement,
+    Identifier,
+    IntegerLiteral,
+    BooleanLiteral,
+    StringLiteral,
+    PrefixExpression,
+    FunctionLiteral,
+    CallExpression,
+    IfExpression,
+)
+from analysis import binding_counts, local_names, manifested_names
+from visitor import NodeTransformer, iter_child_nodes
+from object import Object, Integer, String, Boolean, Function
+from environment import Environment
+from eval import Eval, VERITY, FALLACY, is_truthy
+from stepper import apply_steps
+
+# Rune calls and loop iterations the evaluator may make while folding one call site
+FOLD_STEP_BUDGET = 1000
+
+class BudgetExhausted(Exception):
+    """Raised when compile-time evaluation runs out of steps"""
+
+def fold_pure_calls(program: Program, budget: int = FOLD_STEP_BUDGET) -> Program:
+    """
+    Evaluate calls to pure runes with constant arguments ahead of time.
+
+    Only calls that run exactly once, in top-level statements outside any
+    rune body, are replaced. A rune is pure when every name it reads is one
+    of its own bindings, a constant or another pure rune, each bound
+    exactly once in the program by a top-level manifest that has already
+    run by the time of the call. The program is rewritten in place.
+    """
+    counts = binding_counts(program)
+    locals_ = local_names(program)
+    global_names = manifested_names(program)
+    stable = lambda name: counts.get(name) == 1 and name not in locals_
+
+    constants: Dict[str, Object] = {}
+    runes: Dict[str, FunctionLiteral] = {}
+    pure: Set[str] = set()
+    env: Optional[Environment] = None
+
+    for stmt in program.statements:
+        if env is None and pure:
+            env = _compile_time_environment(constants, runes, pure)
+        if env is not None:
+            _CallFolder(env, pure, budget).transform(stmt)
+
+        if isinstance(stmt, LetStatement) and stmt.name is not None and stable(stmt.name.value):
+            name = stmt.name.value
+            value = constant_value(stmt.value)
+            if value is not None:
+                constants[name] = value
+            elif isinstance(stmt.value, FunctionLiteral) and stmt.value.body is not None:
+                runes[name] = stmt.value
+            else:
+                continue
+            pure = pure_runes(runes, constants, global_names)
+            env = None
+    return program
+
+def pure_runes(runes: Dict[str, FunctionLiteral], constants: Dict[str, Object], global_names: Set[str]) -> Set[str]:
+    """
+    Find the runes whose result depends only on their arguments.
+
+    Every name a rune reads must be a parameter or local of the rune, a
+    constant, or a rune that is itself pure. A local read before its
+    manifest runs falls through to the globals, so locals that share a
+    name with a global do not count as the rune's own.
+    """
+    pure = set(runes)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not _reads_only(runes[name], pure | constants.keys(), global_names):
+                pure.discard(name)
+                changed = True
+    return pure
+
+def _reads_only(fn: FunctionLiteral, allowed: Set[str], global_names: Set[str]) -> bool:
+    stack = [(fn, frozenset())]
+    while stack:
+        node, own = stack.pop()
+        if isinstance(node, FunctionLiteral):
+            params = {param.value for param in node.parameters or []}
+            own = own | params | (manifested_names(node.body) - global_names)
+            stack.append((node.body, own))
+            continue
+        if isinstance(node, LetStatement):
+            stack.append((node.value, own))
+            continue
+        if isinstance(node, Identifier) and node.value not in allowed and node.value not in own:
+            return False
+        stack.extend((child, own) for child in iter_child_nodes(node) if child is not None)
+    return True
+
+def constant_value(node: Optional[Node]) -> Optional[Object]:
+    """The value of a literal expression, or None if it is not one"""
+    if isinstance(node, IntegerLiteral):
+        return Integer(node.value)
+    if isinstance(node, StringLiteral):
+        return String(node.value)
+    if isinstance(node, BooleanLiteral):
+        return VERITY if node.value else FALLACY
+    if (isinstance(node, PrefixExpression) and node.operator == "diminishes"
+            and isinstance(node.right, IntegerLiteral)):
+        return Integer(-node.right.value)
+    return None
+
+def literal_for(value: Object) -> Optional[Expression]:
+    """Build the literal expression that evaluates to a value, if there is one"""
+    if isinstance(value, Boolean):
+        literal = "verity" if value.value else "fallacy"
+        token_type = TokenType.TRUE if value.value else TokenType.FALSE
+        return BooleanLiteral(Token(token_type, literal), value.value)
+    if isinstance(value, String):
+        return StringLiteral(Token(TokenType.STRING, value.value), value.value)
+    if isinstance(value, Integer) and type(value.value) is int:
+        if value.value < 0:
+            magnitude = IntegerLiteral(Token(TokenType.INT, str(-value.value)), -value.value)
+            return PrefixExpression(Token(TokenType.MINUS, "diminishes"), "diminishes", magnitude)
+        return IntegerLiteral(Token(TokenType.INT, str(value.value)), value.value)
+    return None
+
+def evaluate_with_budget(fn: Function, args: List[Object], budget: int) -> Object:
+    """
+    Apply a rune, raising BudgetExhausted if it takes more than budget
+    steps, counted as the ticks the stepper pauses at.
+    """
+    evaluation = apply_steps(fn, args)
+    try:
+        for _ in range(budget + 1):
+            next(evaluation)
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        evaluation.close()
+    raise BudgetExhausted()
+
+def _compile_time_environment(constants: Dict[str, Object], runes: Dict[str, FunctionLiteral], pure: Set[str]) -> Environment:
+    env = Environment()
+    for name, value in constants.items():
+        env.set(name, value)
+    for name in pure:
+        env.set(name, Eval(runes[name], env))
+    return env
+
+class _CallFolder(NodeTransformer):
+    """Fold calls bottom-up, so nested calls fold first, leaving rune bodies alone"""
+    def __init__(self, env: Environment, pure: Set[str], budget: int):
+        self.env = env
+        self.pure = pure
+        self.budget = budget
+
+    def visit_FunctionLiteral(self, node: FunctionLiteral):
+        return False
+
+    def visit_IfExpression(self, node: IfExpression):
+        # only the branch that runs is folded, and only once the condition folds to a constant
+        node.condition = self.transform(node.condition)
+        condition = constant_value(node.condition)
+        if condition is not None:
+            taken = node.consequence if is_truthy(condition) else node.alternative
+            if taken is not None:
+                self.transform(taken)
+        return False
+
+    def transform_CallExpression(self, node: CallExpression) -> Expression:
+        if not isinstance(node.function, Identifier) or node.function.value not in self.pure:
+            return node
+        if node.arguments is None:
+            return node
+        args = [constant_value(arg) for arg in node.arguments]
+        if any(arg is None for arg in args):
+            return node
+        fn, _ = self.env.get(node.function.value)
+        if len(args) < len(fn.parameters):
+            return node
+        try:
+            result = evaluate_with_budget(fn, args, self.budget)
+        except Exception:
+            # out of budget, or a failure the evaluator would also hit at run time
+            return node
+        folded = literal_for(result) if result is not None else None
+        return folded if folded is not None else node
@@ -0,0 +1,133 @@
+import sys
+import unittest
+from unittest import mock
+from lexer import Lexer
+from parser import Parser
+from eval import Eval
+from environment import Environment
+from partial_eval import fold_pure_calls, pure_runes, evaluate_with_budget, BudgetExhausted
+
+def parse(input):
+    l = Lexer(input)
+    p = Parser(l)
+    program = p.parse_program()
+    if p.errors:
+        raise AssertionError(f"parser errors: {p.errors}")
+    return program
+
+def run(program):
+    return Eval(program, Environment())
+
+class TestPartialEval(unittest.TestCase):
+    def test_folds_pure_calls_with_constant_arguments(self):
+        input = """
+        manifest factor with 4 seal
+        manifest scale with rune(x) unfold yield x conjoins factor seal fold seal
+        manifest size with scale(1024) seal
+        size augments scale(diminishes 2) seal
+        """
+        program = fold_pure_calls(parse(input))
+        self.assertEqual(program.statements[2].string(), "manifest size with 4096 seal")
+        self.assertEqual(program.statements[3].string(), "(size augments (diminishes 8))")
+        self.assertEqual(run(program).value, 4088)
+
+    def test_folds_nested_and_recursive_calls(self):
+        input = """
+        manifest fact with rune(n) unfold
+            whence (n descends 2) unfold yield 1 seal fold
+            yield n conjoins fact(n diminishes 1) seal
+        fold seal
+        manifest label with rune(s) unfold "size: " augments s fold seal
+        fact(fact(3)) seal
+        label("big") seal
+        """
+        program = fold_pure_calls(parse(input))
+        self.assertEqual(program.statements[2].string(), "720")
+        self.assertEqual(program.statements[3].string(), "size: big")
+
+    def test_folds_only_branches_that_run(self):
+        input = """
+        manifest spin with rune(n) unfold spin(n augments 1) fold seal
+        manifest double with rune(x) unfold x conjoins 2 fold seal
+        manifest c with 1 seal
+        whence (fallacy) unfold spin(0) fold elsewise unfold double(4) fold seal
+        whence (double(1)) unfold double(3) fold elsewise unfold spin(0) fold seal
+        whence (c mirrors 1) unfold double(5) fold seal
+        """
+        with mock.patch("partial_eval.evaluate_with_budget", wraps=evaluate_with_budget) as evaluate:
+            program = fold_pure_calls(parse(input))
+        self.assertEqual(program.statements[3].string(), "whence fallacy unfold spin(0) fold elsewise unfold 8 fold")
+        self.assertEqual(program.statements[4].string(), "whence 2 unfold 6 fold elsewise unfold spin(0) fold")
+        self.assertEqual(program.statements[5].string(), "whence (c mirrors 1) unfold double(5) fold")
+        self.assertEqual([[arg.value for arg in call.args[1]] for call in evaluate.call_args_list], [[4], [1], [3]])
+
+    def test_leaves_calls_inside_runes(self):
+        input = """
+        manifest double with rune(x) unfold x conjoins 2 fold seal
+        manifest quad with rune(y) unfold double(2) conjoins y fold seal
+        """
+        program = fold_pure_calls(parse(input))
+        self.assertEqual(program.statements[1].string(), "manifest quad with rune(y) unfold (double(2) conjoins y) fold seal")
+
+    def test_purity(self):
+        input = """
+        manifest k with 2 seal
+        manifest j with 3 seal
+        manifest j with 4 seal
+        manifest usesConst with rune(x) unfold x conjoins k fold seal
+        manifest usesRebound with rune(x) unfold x conjoins j fold seal
+        manifest usesUnknown with rune(x) unfold x conjoins later fold seal
+        manifest usesPure with rune(x) unfold usesConst(x) fold seal
+        manifest usesImpure with rune(x) unfold usesRebound(x) fold seal
+        manifest usesLocal with rune(x) unfold manifest y with x seal y fold seal
+        """
+        self.assertEqual(
+            set(self._pure(input)),
+            {"usesConst", "usesPure", "usesLocal"},
+        )
+
+    def _pure(self, input):
+        program = parse(input)
+        runes = {
+            stmt.name.value: stmt.value for stmt in program.statements
+            if stmt.value is not None and stmt.value.token_literal() == "rune"
+        }
+        return pure_runes(runes, {"k": None}, {"k", "j"} | runes.keys())
+
+    def test_does_not_fold_mishaps(self):
+        input = """
+        manifest bad with rune(x) unfold x augments verity fold seal
+        bad(1) seal
+        """
+        program = fold_pure_calls(parse(input))
+        self.assertEqual(program.statements[1].string(), "bad(1)")
+
+    def test_step_budget(self):
+        input = """
+        manifest spin with rune(n) unfold spin(n augments 1) fold seal
+        spin(0) seal
+        """
+        program = fold_pure_calls(parse(input), budget=500)
+        self.assertEqual(program.statements[1].string(), "spin(0)")
+
+        fn = run(parse("rune(n) unfold n fold"))
+        with self.assertRaises(BudgetExhausted):
+            evaluate_with_budget(fn, [fn], budget=0)
+
+    def test_step_budget_counts_loops_without_tracing(self):
+        input = """
+        manifest forever with rune(n) unfold whilst (verity) unfold transmute n with n augments 1 seal fold fold seal
+        forever(0) seal
+        """
+        previous = sys.gettrace()
+        tracer = lambda frame, event, arg: None
+        sys.settrace(tracer)
+        try:
+            program = fold_pure_calls(parse(input), budget=50)
+            self.assertIs(sys.gettrace(), tracer)
+        finally:
+            sys.settrace(previous)
+        self.assertEqual(program.statements[1].string(), "forever(0)")
+
+if __name__ == "__main__":
+    unittest.main()
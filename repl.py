@@ -3,6 +3,8 @@ from tok import Token, TokenType
 from parser import Parser
 from eval import Eval
 from environment import Environment
+from optimizer import PassManager
+from typing import Optional
 import os
 import platform
 import sys
@@ -77,8 +79,12 @@ def read_multiline_input():
             else:
                 raise
 
-def evaluate_code(source: str, env: Environment, out_stream=sys.stdout) -> None:
-    """Evaluate a piece of code in the given environment."""
+def print_foreseen_mishaps(mishaps, out_stream=sys.stdout):
+    for msg in mishaps:
+        print(f"{YELLOW}└─ Foreseen Mishap: {msg}{RESET}", file=out_stream)
+
+def evaluate_code(source: str, env: Environment, out_stream=sys.stdout, optimizer: Optional[PassManager] = None) -> None:
+    """Evaluate a piece of code in the given environment, optimizing it first if asked."""
     if not source.strip():
         return
 
@@ -90,6 +96,10 @@ def evaluate_code(source: str, env: Environment, out_stream=sys.stdout) -> None:
         print_parser_errors(parser.errors)
         return
 
+    if optimizer is not None:
+        program = optimizer.run(program)
+        print_foreseen_mishaps(optimizer.mishaps, out_stream)
+
     evaluated = Eval(program, env)
     if evaluated is not None:
         print(f"{GREEN}└─ The runes speak: {evaluated.inspect()}{RESET}", file=out_stream)
@@ -118,20 +128,35 @@ def start_interactive(env: Environment, out_stream=sys.stdout):
             print("\nMay your code forever flow in the streams of time!", file=out_stream)
             return
 
-def start_file_mode(env: Environment, in_stream=sys.stdin, out_stream=sys.stdout):
+def start_file_mode(env: Environment, in_stream=sys.stdin, out_stream=sys.stdout, optimizer: Optional[PassManager] = None):
     """Execute code from input stream."""
     source = in_stream.read()
-    evaluate_code(source, env, out_stream)
+    evaluate_code(source, env, out_stream, optimizer)
+
+def start_script(path: str, out_stream=sys.stdout, optimizer: Optional[PassManager] = None) -> bool:
+    """Execute code from a script file, leaving standard input to the script. False if it cannot be read."""
+    try:
+        with open(path, encoding="utf-8") as script:
+            source = script.read()
+    except (OSError, UnicodeDecodeError) as e:
+        reason = e.strerror if isinstance(e, OSError) and e.strerror else str(e)
+        print(f"{RED}└─ MISHAP: cannot read script {path}: {reason}{RESET}", file=sys.stderr)
+        return False
+    evaluate_code(source, Environment(), out_stream, optimizer)
+    return True
 
-def start(in_stream=sys.stdin, out_stream=sys.stdout):
-    """Start the REPL in either interactive or file mode."""
+def start(in_stream=sys.stdin, out_stream=sys.stdout, optimizer: Optional[PassManager] = None):
+    """
+    Start the REPL in either interactive or file mode. Optimization passes
+    assume they see the whole program, so they only apply in file mode.
+    """
     env = Environment()
     
     # Check if input is coming from a terminal
     if in_stream.isatty():
         start_interactive(env, out_stream)
     else:
-        start_file_mode(env, in_stream, out_stream)
+        start_file_mode(env, in_stream, out_stream, optimizer)
 
 if __name__ == "__main__":
     start()
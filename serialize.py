@@ -0,0 +1,368 @@
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List
+import ast1
+from environment import Environment
+from hamt import HAMT
+from memo import LRUCache
+from tok import Token, TokenType
+from analysis import free_identifiers
+from object import (
+    Object,
+    Integer,
+    String,
+    Array,
+    Hash,
+    Vector,
+    Matrix,
+    Error,
+    ReturnValue,
+    Function,
+    Builtin,
+    Memoized,
+    hash_key,
+    numpy,
+)
+from eval import BUILTINS, VERITY, FALLACY, VOID
+
+# First byte of every encoding, bumped whenever the format changes
+FORMAT_VERSION = 1
+
+# One byte names what follows. Python values first, then interpreter values.
+NONE, PY_TRUE, PY_FALSE, INT, FLOAT, TEXT, LIST, REF = range(8)
+(
+    NUMBER, VERITY_TAG, FALLACY_TAG, VOID_TAG, SCROLL, CODEX, PACKED_CODEX, TOME,
+    VECTOR, MISHAP, YIELDED, RITUAL, INCANTATION, MEMOIZED, ENVIRONMENT, NODE, TOKEN,
+) = range(8, 25)
+
+_TOKEN_TYPES = list(TokenType)
+
+def dumps(value: Any, reads_only: bool = False) -> bytes:
+    """
+    Encode a value, or a list of them, to bytes. Nodes, environments, runes
+    and texts seen before are written as a reference back to the first, so
+    a shared AST or scope is written once and cycles are kept. With
+    reads_only a rune keeps just the names its body reads from its closure.
+    Raises ValueError for a value that cannot leave the process (a STREAM).
+    """
+    encoder = _Encoder(reads_only)
+    encoder.out.append(FORMAT_VERSION)
+    encoder.write(value)
+    return bytes(encoder.out)
+
+def loads(data: bytes) -> Any:
+    """Decode bytes written by dumps, raising ValueError if they are not"""
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError("not an encoded value, or one from another format version")
+    decoder = _Decoder(data)
+    try:
+        value = decoder.read()
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"corrupt encoded value: {e!r}") from None
+    if decoder.position != len(data):
+        raise ValueError("corrupt encoded value: trailing bytes")
+    return value
+
+class _Encoder:
+    def __init__(self, reads_only: bool):
+        self.out = bytearray()
+        self.reads_only = reads_only
+        self.refs: Dict[Any, int] = {}  # id of an object, or a text, to its reference
+        self.alive: List[Any] = []  # keeps referenced objects from being freed and their ids reused
+
+    def uint(self, n: int):
+        while n >= 0x80:
+            self.out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.out.append(n)
+
+    def sint(self, n: int):
+        # zigzag, so that small negative numbers stay short
+        self.uint(n << 1 if n >= 0 else ((-n) << 1) - 1)
+
+    def referenced(self, key, obj=None) -> bool:
+        """Write a reference if key was written before, else number it for later"""
+        index = self.refs.get(key)
+        if index is not None:
+            self.out.append(REF)
+            self.uint(index)
+            return True
+        self.refs[key] = len(self.refs)
+        if obj is not None:
+            self.alive.append(obj)
+        return False
+
+    def text(self, s: str):
+        if self.referenced(("text", s)):
+            return
+        data = s.encode("utf-8")
+        self.out.append(TEXT)
+        self.uint(len(data))
+        self.out += data
+
+    def write(self, value: Any):
+        kind = type(value)
+        if value is None:
+            self.out.append(NONE)
+        elif kind is bool:
+            self.out.append(PY_TRUE if value else PY_FALSE)
+        elif kind is int:
+            self.out.append(INT)
+            self.sint(value)
+        elif kind is float:
+            self.out.append(FLOAT)
+            self.out += struct.pack("<d", value)
+        elif kind is str:
+            self.text(value)
+        elif kind is list or kind is tuple:
+            self.out.append(LIST)
+            self.uint(len(value))
+            for item in value:
+                self.write(item)
+        elif value is VERITY:
+            self.out.append(VERITY_TAG)
+        elif value is FALLACY:
+            self.out.append(FALLACY_TAG)
+        elif value is VOID:
+            self.out.append(VOID_TAG)
+        elif kind is Integer:
+            self.out.append(NUMBER)
+            self.write(value.value)
+        elif kind is String:
+            self.out.append(SCROLL)
+            self.text(value.value)
+        elif kind is Array:
+            self.write_codex(value)
+        elif kind is Hash:
+            self.out.append(TOME)
+            self.uint(len(value))
+            for _, (key, item) in value.pairs.items():
+                self.write(key)
+                self.write(item)
+        elif kind is Vector or kind is Matrix:
+            values = value.values
+            self.out.append(VECTOR)
+            self.text(values.dtype.str)
+            self.write(list(values.shape))
+            data = values.tobytes()
+            self.uint(len(data))
+            self.out += data
+        elif kind is Error:
+            self.out.append(MISHAP)
+            self.text(value.message)
+        elif kind is ReturnValue:
+            self.out.append(YIELDED)
+            self.write(value.value)
+        elif kind is Builtin:
+            if BUILTINS.get(value.name) is not value:
+                raise ValueError(f"cannot encode incantation {value.name}")
+            self.out.append(INCANTATION)
+            self.text(value.name)
+        elif kind is Function:
+            self.write_function(value)
+        elif kind is Memoized:
+            if self.referenced(id(value), value):
+                return
+            self.out.append(MEMOIZED)
+            self.write(value.fn)
+            self.write(value.cache.maxsize)
+            self.write(value.store.path if value.store is not None else None)
+            self.write(value.fingerprint)
+        elif kind is Environment:
+            self.write_environment(value)
+        elif kind is Token:
+            self.out.append(TOKEN)
+            self.uint(_TOKEN_TYPES.index(value.type))
+            self.text(value.literal)
+        elif isinstance(value, ast1.Node):
+            if self.referenced(id(value), value):
+                return
+            self.out.append(NODE)
+            self.text(kind.__name__)
+            fields = vars(value)
+            self.uint(len(fields))
+            for field, item in fields.items():
+                self.text(field)
+                self.write(item)
+        elif isinstance(value, Object):
+            raise ValueError(f"cannot encode a {value.type()}")
+        else:
+            raise ValueError(f"cannot encode a Python {kind.__name__}")
+
+    def write_codex(self, codex: Array):
+        if codex.packed:
+            self.out.append(PACKED_CODEX)
+            self.uint(len(codex))
+            items = codex.items[:len(codex)]
+            if sys.byteorder == "big":
+                items.byteswap()
+            self.out += items.tobytes()
+            return
+        self.out.append(CODEX)
+        self.uint(len(codex))
+        for element in codex.elements():
+            self.write(element)
+
+    def write_function(self, fn: Function):
+        if self.referenced(id(fn), fn):
+            return
+        self.out.append(RITUAL)
+        self.write(fn.parameters)
+        self.write(fn.body)
+        if not self.reads_only:
+            self.write(fn.env)
+            return
+        # a scope of its own holding only what the body reads, whatever scope it came from
+        params = {param.value for param in fn.parameters}
+        captured = {}
+        for name in sorted(free_identifiers(fn.body, params)):
+            value, found = fn.env.get(name)
+            if found:
+                captured[name] = value
+        self.refs[("scope", id(fn))] = len(self.refs)
+        self.out.append(ENVIRONMENT)
+        self.write_store(captured)
+        self.out.append(NONE)
+
+    def write_environment(self, env: Environment):
+        if self.referenced(id(env), env):
+            return
+        self.out.append(ENVIRONMENT)
+        self.write_store(env.store)
+        self.write(env.outer)
+
+    def write_store(self, store: Dict[str, Object]):
+        self.uint(len(store))
+        for name, value in store.items():
+            self.text(name)
+            self.write(value)
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 1
+        self.refs: List[Any] = []
+
+    def uint(self) -> int:
+        n = shift = 0
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def sint(self) -> int:
+        n = self.uint()
+        return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+    def take(self, size: int) -> bytes:
+        start = self.position
+        self.position += size
+        if self.position > len(self.data):
+            raise IndexError("encoded value ends early")
+        return self.data[start:self.position]
+
+    def read(self) -> Any:
+        tag = self.data[self.position]
+        self.position += 1
+        if tag == NONE:
+            return None
+        if tag == PY_TRUE:
+            return True
+        if tag == PY_FALSE:
+            return False
+        if tag == INT:
+            return self.sint()
+        if tag == FLOAT:
+            return struct.unpack("<d", self.take(8))[0]
+        if tag == TEXT:
+            text = self.take(self.uint()).decode("utf-8")
+            self.refs.append(text)
+            return text
+        if tag == LIST:
+            return [self.read() for _ in range(self.uint())]
+        if tag == REF:
+            return self.refs[self.uint()]
+        if tag == VERITY_TAG:
+            return VERITY
+        if tag == FALLACY_TAG:
+            return FALLACY
+        if tag == VOID_TAG:
+            return VOID
+        if tag == NUMBER:
+            return Integer(self.read())
+        if tag == SCROLL:
+            return String(self.read())
+        if tag == CODEX:
+            return Array([self.read() for _ in range(self.uint())])
+        if tag == PACKED_CODEX:
+            items = array("q")
+            items.frombytes(self.take(8 * self.uint()))
+            if sys.byteorder == "big":
+                items.byteswap()
+            return Array.from_items(items)
+        if tag == TOME:
+            pairs = HAMT()
+            for _ in range(self.uint()):
+                key = self.read()
+                pairs = pairs.set(hash_key(key), (key, self.read()))
+            return Hash(pairs)
+        if tag == VECTOR:
+            if numpy is None:
+                raise ValueError("cannot decode a vector: numpy is missing")
+            dtype, shape = self.read(), self.read()
+            values = numpy.frombuffer(self.take(self.uint()), dtype=dtype).reshape(shape).copy()
+            return Matrix(values) if len(shape) == 2 else Vector(values)
+        if tag == MISHAP:
+            return Error(self.read())
+        if tag == YIELDED:
+            return ReturnValue(self.read())
+        if tag == INCANTATION:
+            return BUILTINS[self.read()]
+        if tag == RITUAL:
+            fn = Function.__new__(Function)
+            self.refs.append(fn)
+            fn.parameters = self.read()
+            fn.body = self.read()
+            fn.env = self.read()
+            return fn
+        if tag == MEMOIZED:
+            memoized = Memoized.__new__(Memoized)
+            self.refs.append(memoized)
+            memoized.fn = self.read()
+            memoized.cache = LRUCache(self.read())
+            path = self.read()
+            memoized.store = None
+            if path is not None:
+                from memo_store import SqliteMemoStore
+                memoized.store = SqliteMemoStore(path)
+            memoized.fingerprint = self.read()
+            return memoized
+        if tag == ENVIRONMENT:
+            env = Environment()
+            self.refs.append(env)
+            for _ in range(self.uint()):
+                name = self.read()
+                env.store[name] = self.read()
+            env.outer = self.read()
+            return env
+        if tag == TOKEN:
+            token_type = _TOKEN_TYPES[self.uint()]
+            return Token(token_type, self.read())
+        if tag == NODE:
+            # the node is numbered before its class name, as it was written
+            slot = len(self.refs)
+            self.refs.append(None)
+            cls = getattr(ast1, self.read(), None)
+            if not (isinstance(cls, type) and issubclass(cls, ast1.Node)):
+                raise ValueError("corrupt encoded value: unknown node")
+            node = cls.__new__(cls)
+            self.refs[slot] = node
+            for _ in range(self.uint()):
+                field = self.read()
+                setattr(node, field, self.read())
+            return node
+        raise ValueError(f"corrupt encoded value: unknown tag {tag}")
@@ -0,0 +1,102 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval, VERITY, FALLACY, VOID, BUILTINS
+from object import Integer, Function, Memoized, numpy
+from serialize import dumps, loads
+
+PROGRAM = """
+manifest base with 100 seal
+manifest fib with rune(n) unfold
+    whence (n descends 2) unfold yield n seal fold
+    yield fib(n diminishes 1) augments fib(n diminishes 2) seal
+fold seal
+manifest adder with rune(k) unfold rune(x) unfold x augments k augments base fold fold seal
+"""
+
+def run(source: str, env: Environment):
+    return Eval(Parser(Lexer(source)).parse_program(), env)
+
+class TestSerialize(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment()
+        run(PROGRAM, self.env)
+
+    def test_values_round_trip(self):
+        tests = [
+            "42",
+            "diminishes 12345678901234567890123",
+            "7 divide 2",
+            '"scrolls of héllo"',
+            "[1 knot 2 knot diminishes 3]",
+            '[1 knot "two" knot [verity]]',
+            'tome(1 binds "a" knot verity binds [1 knot 2] knot "s" binds tome())',
+            "nope",
+            "len",
+            "memoize(fib knot 16)",
+        ]
+        for input in tests:
+            with self.subTest(input=input):
+                value = run(input, self.env)
+                self.assertEqual(loads(dumps(value)).inspect(), value.inspect())
+
+    def test_singletons_stay_singletons(self):
+        for value in (VERITY, FALLACY, VOID, BUILTINS["len"]):
+            self.assertIs(loads(dumps(value)), value)
+
+    def test_packed_codex_stays_packed(self):
+        codex = loads(dumps(run("[1 knot 2 knot diminishes 3]", self.env)))
+        self.assertTrue(codex.packed)
+        self.assertEqual(codex.at(2).value, -3)
+
+    def test_runes_keep_their_closures(self):
+        env = Environment()
+        env.set("f", loads(dumps(run("fib", self.env))))
+        env.set("g", loads(dumps(run("adder(5)", self.env))))
+        env.set("m", loads(dumps(run("memoize(fib)", self.env))))
+        self.assertIsInstance(env.get("m")[0], Memoized)
+        self.assertEqual(run("[f(15) knot g(1) knot m(10)]", env).inspect(), "[610 knot 106 knot 55]")
+
+    def test_reads_only_keeps_what_the_body_reads(self):
+        full = dumps(run("adder(5)", self.env))
+        pruned = dumps(run("adder(5)", self.env), reads_only=True)
+        self.assertLess(len(pruned), len(full))
+        adder = loads(pruned)
+        self.assertEqual(sorted(adder.env.store), ["base", "k"])
+        self.assertIsNone(adder.env.outer)
+        fib = loads(dumps(run("fib", self.env), reads_only=True))
+        self.assertIs(fib.env.store["fib"], fib)
+
+    def test_shared_trees_and_scopes_are_written_once(self):
+        one, two = run("adder(1)", self.env), run("adder(2)", self.env)
+        both = dumps([one, two])
+        self.assertLess(len(both), 2 * len(dumps(one)) * 3 // 4)
+        one, two = loads(both)
+        self.assertIsInstance(one, Function)
+        self.assertIs(one.body, two.body)
+        self.assertIs(one.env.outer, two.env.outer)
+        self.assertEqual([one.env.store["k"].value, two.env.store["k"].value], [1, 2])
+
+    @unittest.skipIf(numpy is None, "vectors need numpy")
+    def test_vectors_round_trip(self):
+        for input in ("vector([1 knot 2 knot 3])", "vector([verity knot fallacy])", "matrix([[1 knot 2] knot [3 knot 4]])"):
+            with self.subTest(input=input):
+                value = run(input, self.env)
+                back = loads(dumps(value))
+                self.assertEqual(back.values.dtype, value.values.dtype)
+                self.assertEqual(back.inspect(), value.inspect())
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "cannot encode a STREAM"):
+            dumps(run("range(3)", self.env))
+        data = dumps(Integer(5))
+        with self.assertRaisesRegex(ValueError, "format version"):
+            loads(b"\x00" + data[1:])
+        with self.assertRaisesRegex(ValueError, "corrupt"):
+            loads(dumps(run("fib", self.env))[:-3])
+        with self.assertRaisesRegex(ValueError, "trailing bytes"):
+            loads(data + b"\x00")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+from typing import Generator, List, Optional, Union
+from weakref import WeakKeyDictionary
+from ast1 import *
+from object import *
+from environment import Environment
+from eval import (
+    Eval,
+    Blocked,
+    Awaiting,
+    AWAITABLE_BUILTINS,
+    VOID,
+    is_mishap,
+    is_truthy,
+    eval_prefix_expression,
+    eval_integer_infix_expression,
+    eval_string_infix_expression,
+    eval_infix_expression,
+    eval_index_expression,
+    apply_memoized,
+    extend_function_env,
+    unwrap_return_value,
+)
+from hamt import HAMT
+from visitor import walk
+
+# Yielded where the evaluator offers to let something else run
+TICK = None
+
+Steps = Generator[Union[Blocked, Awaiting, None], Optional[Object], Object]
+
+# Whether a subtree holds a call or a loop, by node, worked out once per node
+_pausable: "WeakKeyDictionary[Node, bool]" = WeakKeyDictionary()
+
+def can_pause(node: Node) -> bool:
+    known = _pausable.get(node)
+    if known is None:
+        known = any(type(inner) is CallExpression or type(inner) is WhileStatement for inner in walk(node))
+        _pausable[node] = known
+    return known
+
+def steps(node: Node, env: Environment) -> Steps:
+    """
+    Evaluate node as Eval does, as a generator that can stop partway and
+    carry on. It yields TICK at each rune call and loop iteration, where
+    something else may take a turn, a Blocked where a builtin must wait, and
+    an Awaiting at an I/O builtin, to be sent back the call's result;
+    whoever drives it resumes it once it may go on. A subtree with no call
+    or loop cannot pause, so it is handed to Eval whole.
+    """
+    if not can_pause(node):
+        return Eval(node, env)
+    node_type = type(node)
+    if node_type is Program:
+        return (yield from program_steps(node, env))
+    elif node_type is ExpressionStatement:
+        return (yield from steps(node.expression, env))
+    elif node_type is PrefixExpression:
+        right = yield from steps(node.right, env)
+        if is_mishap(right):
+            return right
+        if node.operand_type == INTEGER_OBJ and node.operator == "diminishes":
+            return Integer(-right.value)
+        return eval_prefix_expression(node.operator, right, env)
+    elif node_type is InfixExpression:
+        left = yield from steps(node.left, env)
+        if is_mishap(left):
+            return left
+        right = yield from steps(node.right, env)
+        if is_mishap(right):
+            return right
+        if node.operand_type == INTEGER_OBJ:
+            return eval_integer_infix_expression(node.operator, left, right)
+        elif node.operand_type == STRING_OBJ:
+            return eval_string_infix_expression(node.operator, left, right)
+        return eval_infix_expression(node.operator, left, right)
+    elif node_type is BlockStatement:
+        return (yield from block_steps(node, env))
+    elif node_type is IfExpression:
+        condition = yield from steps(node.condition, env)
+        if is_mishap(condition):
+            return condition
+        if is_truthy(condition):
+            return (yield from steps(node.consequence, env))
+        elif node.alternative:
+            return (yield from steps(node.alternative, env))
+        return VOID
+    elif node_type is ReturnStatement:
+        val = yield from steps(node.return_value, env)
+        if is_mishap(val):
+            return val
+        return ReturnValue(val)
+    elif node_type is LetStatement:
+        val = yield from steps(node.value, env)
+        if is_mishap(val):
+            return val
+        env.set(node.name.value, val)
+    elif node_type is AssignStatement:
+        val = yield from steps(node.value, env)
+        if is_mishap(val):
+            return val
+        if not env.assign(node.name.value, val):
+            return Error(f"cannot transmute unmanifested name: {node.name.value}")
+    elif node_type is WhileStatement:
+        return (yield from while_steps(node, env))
+    elif node_type is ArrayLiteral:
+        elements = yield from expressions_steps(node.elements, env)
+        if elements and is_mishap(elements[0]):
+            return elements[0]
+        return Array(elements)
+    elif node_type is HashLiteral:
+        return (yield from hash_literal_steps(node, env))
+    elif node_type is IndexExpression:
+        left = yield from steps(node.left, env)
+        if is_mishap(left):
+            return left
+        index = yield from steps(node.index, env)
+        if is_mishap(index):
+            return index
+        return eval_index_expression(left, index)
+    elif node_type is CallExpression:
+        function = yield from steps(node.function, env)
+        if is_mishap(function):
+            return function
+        args = yield from expressions_steps(node.arguments, env)
+        if len(args) == 1 and is_mishap(args[0]):
+            return args[0]
+        return (yield from apply_steps(function, args))
+    return Eval(node, env)
+
+def program_steps(program: Program, env: Environment) -> Steps:
+    result = None
+    for statement in program.statements:
+        result = yield from steps(statement, env)
+        if isinstance(result, ReturnValue):
+            return result.value
+        if is_mishap(result):
+            return result
+    return result
+
+def block_steps(block: BlockStatement, env: Environment) -> Steps:
+    result = None
+    for statement in block.statements:
+        result = yield from steps(statement, env)
+        if result is not None and (result.type() == RETURN_VALUE_OBJ or result.type() == ERROR_OBJ):
+            return result
+    return result
+
+def while_steps(node: WhileStatement, env: Environment) -> Steps:
+    condition, body = node.condition, node.body
+    while True:
+        test = yield from steps(condition, env)
+        if is_mishap(test):
+            return test
+        if not is_truthy(test):
+            return None
+        result = yield from block_steps(body, env)
+        if result is not None and (result.type() == RETURN_VALUE_OBJ or result.type() == ERROR_OBJ):
+            return result
+        yield TICK
+
+def expressions_steps(exps: List[Expression], env: Environment) -> Generator[Union[Blocked, Awaiting, None], Optional[Object], List[Object]]:
+    result = []
+    for exp in exps:
+        evaluated = yield from steps(exp, env)
+        if is_mishap(evaluated):
+            return [evaluated] + result
+        result.append(evaluated)
+    return result
+
+def hash_literal_steps(node: HashLiteral, env: Environment) -> Steps:
+    pairs = HAMT()
+    for key_node, value_node in node.pairs:
+        key = yield from steps(key_node, env)
+        if is_mishap(key):
+            return key
+        filed = hash_key(key)
+        if filed is None:
+            return Error(f"unusable as tome key: {key.type()}")
+        value = yield from steps(value_node, env)
+        if is_mishap(value):
+            return value
+        pairs = pairs.set(filed, (key, value))
+    return Hash(pairs)
+
+def apply_steps(fn: Object, args: List[Object]) -> Steps:
+    if isinstance(fn, Function):
+        yield TICK
+        evaluated = yield from steps(fn.body, extend_function_env(fn, args))
+        return unwrap_return_value(evaluated)
+    elif isinstance(fn, Memoized):
+        return apply_memoized(fn, args)
+    elif isinstance(fn, Builtin):
+        if fn.name in AWAITABLE_BUILTINS:
+            return (yield Awaiting(fn, args))
+        result = fn.fn(*args)
+        while type(result) is Blocked:
+            yield result
+            result = fn.fn(*args)
+        return result
+    return Error(f"not a ritual: {fn.type()}")
@@ -0,0 +1,230 @@
+from array import array
+from itertools import compress, repeat
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ast1 import (
+    Node,
+    ExpressionStatement,
+    ReturnStatement,
+    InfixExpression,
+    IndexExpression,
+    GroupedExpression,
+    Identifier,
+    StringLiteral,
+    CallExpression,
+)
+from object import (
+    Object,
+    Integer,
+    String,
+    Array,
+    Hash,
+    Table,
+    Function,
+    Error,
+    hash_key,
+    numpy,
+    INTEGER_OBJ,
+    STRING_OBJ,
+    ARRAY_OBJ,
+    PACKED_MIN,
+    PACKED_MAX,
+)
+from hamt import HAMT
+from visitor import walk
+from eval import Eval, ELEMENTWISE_OPERATORS, SORTABLE_TYPES, is_mishap, is_truthy, rune_caller
+
+# Comparisons a filter can make over a whole column, each with the one it becomes when its sides swap
+COMPARISONS = {"descends": "ascends", "ascends": "descends", "mirrors": "mirrors", "diverges": "diverges"}
+
+# What group can work out for each group of rows
+AGGREGATES = ("count", "sum", "min", "max")
+
+def make_table(tome: Hash) -> Object:
+    """A table of the codices a tome binds to SCROLL names, with its columns in name order"""
+    columns = {}
+    for _, (name, column) in sorted(tome.pairs.items(), key=lambda item: item[0]):
+        if name.type() != STRING_OBJ:
+            return Error(f"`table` column names must be SCROLL, got {name.type()}")
+        if column.type() != ARRAY_OBJ:
+            return Error(f"`table` columns must be CODEX, got {column.type()}")
+        columns[name.value] = column
+    lengths = sorted({len(column) for column in columns.values()})
+    if len(lengths) > 1:
+        return Error(f"`table` columns must all be as long, got lengths {lengths[0]} and {lengths[-1]}")
+    return Table(columns)
+
+def select(table: Table, names: List[str]) -> Object:
+    for name in names:
+        if name not in table.columns:
+            return Error(f"`select` found no column named {name}")
+    return Table({name: table.columns[name] for name in names})
+
+def numbers(column: Array) -> Optional[Sequence]:
+    """The Python values of a column of NUMBERs, the packed array itself if packed, or None if not all are"""
+    if column.packed:
+        return column.items[:len(column)]
+    elements = column.items[:len(column)]
+    if all(type(element) is Integer for element in elements):
+        return [element.value for element in elements]
+    return None
+
+def number_column(values: Sequence) -> Array:
+    try:
+        return Array.from_items(array("q", values))
+    except (OverflowError, TypeError):
+        return Array([Integer(value) for value in values])
+
+def keep(column: Array, mask: Sequence[bool]) -> Array:
+    kept = compress(column.items[:len(column)], mask)
+    return Array.from_items(array("q", kept)) if column.packed else Array(kept)
+
+def reorder(column: Array, order: Sequence[int]) -> Array:
+    taken = map(column.items.__getitem__, order)
+    return Array.from_items(array("q", taken)) if column.packed else Array(taken)
+
+def _unwrap(node: Node) -> Node:
+    while type(node) is GroupedExpression:
+        node = node.expression
+    return node
+
+def _is_column(node: Node, row: str) -> bool:
+    return (type(node) is IndexExpression and type(node.left) is Identifier and node.left.value == row
+            and type(node.index) is StringLiteral)
+
+def column_comparison(fn: Object) -> Optional[Tuple[str, str, Any]]:
+    """
+    (column, operator, number) when fn is a rune comparing one column of its
+    row with a number that does not depend on the row, such as
+    rune(row) unfold row["qty"] ascends limit fold; None otherwise.
+    """
+    if type(fn) is not Function or len(fn.parameters) != 1 or len(fn.body.statements) != 1:
+        return None
+    statement = fn.body.statements[0]
+    if type(statement) is ExpressionStatement:
+        comparison = _unwrap(statement.expression)
+    elif type(statement) is ReturnStatement:
+        comparison = _unwrap(statement.return_value)
+    else:
+        return None
+    if type(comparison) is not InfixExpression or comparison.operator not in COMPARISONS:
+        return None
+    row = fn.parameters[0].value
+    column, other, operator = _unwrap(comparison.left), _unwrap(comparison.right), comparison.operator
+    if not _is_column(column, row):
+        column, other, operator = other, column, COMPARISONS[operator]
+    if not _is_column(column, row):
+        return None
+    for node in walk(other):
+        # the number is worked out once, so it must not read the row or do anything a call might
+        if type(node) is CallExpression or (type(node) is Identifier and node.value == row):
+            return None
+    number = Eval(other, fn.env)
+    if number.type() != INTEGER_OBJ:
+        return None
+    return column.index.value, operator, number.value
+
+def comparison_mask(values: Sequence, operator: str, number) -> List[bool]:
+    compare = ELEMENTWISE_OPERATORS[operator]
+    if numpy is not None and isinstance(values, array) and (type(number) is float or PACKED_MIN <= number <= PACKED_MAX):
+        return compare(numpy.frombuffer(values, dtype=numpy.int64), number).tolist()
+    return list(map(compare, values, repeat(number)))
+
+def filter_rows(fn: Object, table: Table) -> Object:
+    """
+    The rows fn holds for. A rune that compares a column of NUMBERs with a
+    number runs as one comparison over the column; any other is called on
+    each row as a tome from column names to values.
+    """
+    mask = None
+    comparison = column_comparison(fn)
+    if comparison is not None and comparison[0] in table.columns:
+        name, operator, number = comparison
+        values = numbers(table.columns[name])
+        if values is not None:
+            mask = comparison_mask(values, operator, number)
+    if mask is None:
+        call = rune_caller(fn, 1, "filter")
+        if isinstance(call, Error):
+            return call
+        keys = [(hash_key(String(name)), String(name)) for name in table.columns]
+        columns = [column.elements() for column in table.columns.values()]
+        mask = []
+        for position in range(len(table)):
+            row = HAMT()
+            for (filed, name), column in zip(keys, columns):
+                row = row.set(filed, (name, column[position]))
+            held = call(Hash(row))
+            if is_mishap(held):
+                return held
+            mask.append(is_truthy(held))
+    return Table({name: keep(column, mask) for name, column in table.columns.items()})
+
+def sort_rows(table: Table, name: str) -> Object:
+    """The rows in order of one column, rows with equal values keeping their order"""
+    column = table.columns.get(name)
+    if column is None:
+        return Error(f"`sort` found no column named {name}")
+    values = numbers(column)
+    if values is None:
+        elements = column.elements()
+        for element in elements:
+            if element.type() not in SORTABLE_TYPES or element.type() != elements[0].type():
+                return Error(f"`sort` keys must all be NUMBER or all be SCROLL, got {element.type()}")
+        values = [element.value for element in elements]
+    if numpy is not None and isinstance(values, array):
+        order = numpy.argsort(numpy.frombuffer(values, dtype=numpy.int64), kind="stable").tolist()
+    else:
+        order = sorted(range(len(values)), key=values.__getitem__)
+    return Table({name: reorder(column, order) for name, column in table.columns.items()})
+
+def group_rows(table: Table, by: str, how: str, name: Optional[str]) -> Object:
+    """
+    One row for each distinct value of column by, in the order each is first
+    met, with the count of its rows or the sum, min or max of column name
+    over them.
+    """
+    for wanted in (by, name):
+        if wanted is not None and wanted not in table.columns:
+            return Error(f"`group` found no column named {wanted}")
+    keys = table.columns[by]
+    values = None
+    if how != "count":
+        values = numbers(table.columns[name])
+        if values is None:
+            return Error(f"`group` can only {how} a column of NUMBERs")
+    # rows are told apart by the Python values of keys all of one type, else by how a tome files them
+    if keys.packed:
+        filed = keys.items[:len(keys)]
+    else:
+        elements = keys.elements()
+        for key in elements:
+            if hash_key(key) is None:
+                return Error(f"`group` keys must be NUMBER, SCROLL or TRUTH, got {key.type()}")
+        if len({type(key) for key in elements}) == 1:
+            filed = [key.value for key in elements]
+        else:
+            filed = list(map(hash_key, elements))
+    slots: Dict[Any, int] = {}
+    groups = [slots.setdefault(filing, len(slots)) for filing in filed]
+    if keys.packed:
+        key_column = Array.from_items(array("q", slots))
+    else:
+        firsts = {}
+        for group, key in zip(groups, keys.items[:len(keys)]):
+            firsts.setdefault(group, key)
+        key_column = Array([firsts[group] for group in range(len(slots))])
+    results: List[Any] = [0 if how in ("count", "sum") else None] * len(slots)
+    if how == "count":
+        for group in groups:
+            results[group] += 1
+    elif how == "sum":
+        for group, value in zip(groups, values):
+            results[group] += value
+    else:
+        beats = ELEMENTWISE_OPERATORS["descends" if how == "min" else "ascends"]
+        for group, value in zip(groups, values):
+            best = results[group]
+            if best is None or beats(value, best):
+                results[group] = value
+    aggregate = how if how != by else f"{how} of {name or by}"
+    return Table({by: key_column, aggregate: number_column(results)})
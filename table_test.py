@@ -0,0 +1,107 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from object import Error, Table
+import table
+
+SALES = """
+manifest sales with table(tome(
+    "city" binds ["paris" knot "rome" knot "paris" knot "oslo" knot "rome"] knot
+    "qty" binds [3 knot 10 knot 7 knot 1 knot 2] knot
+    "price" binds [10 knot 4 knot 2 knot 99 knot 5 divide 2]
+)) seal
+"""
+
+def run(source: str):
+    return Eval(Parser(Lexer(SALES + source)).parse_program(), Environment())
+
+class TestTable(unittest.TestCase):
+    def test_tables(self):
+        tests = [
+            ("sales", "table(city knot price knot qty) of 5 rows"),
+            ("len(sales)", "5"),
+            ('sales["qty"]', "[3 knot 10 knot 7 knot 1 knot 2]"),
+            ('sales["nope"]', "void"),
+            ('select(sales knot ["qty" knot "city"])', "table(qty knot city) of 5 rows"),
+            ("table(tome())", "table() of 0 rows"),
+            ('sort(sales knot "qty")["city"]', "[oslo knot rome knot paris knot paris knot rome]"),
+            ('sort(sales knot "city")["qty"]', "[1 knot 3 knot 7 knot 10 knot 2]"),
+            ('sort(sales knot "price")["qty"]', "[7 knot 2 knot 10 knot 3 knot 1]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(run(input).inspect(), expected)
+
+    def test_filter(self):
+        tests = [
+            ('filter(rune(row) unfold row["qty"] ascends 2 fold knot sales)["city"]', "[paris knot rome knot paris]"),
+            ('filter(rune(row) unfold (5 descends row["qty"]) fold knot sales)["qty"]', "[10 knot 7]"),
+            ('manifest most with 2 seal filter(rune(row) unfold yield row["qty"] mirrors most seal fold knot sales)["city"]', "[rome]"),
+            ('filter(rune(row) unfold row["price"] descends 3 fold knot sales)["price"]', "[2 knot 2.5]"),
+            ('filter(rune(row) unfold row["qty"] conjoins row["price"] ascends 20 fold knot sales)["city"]', "[paris knot rome knot oslo]"),
+            ('filter(rune(row) unfold len(row["city"]) mirrors 4 fold knot sales)["city"]', "[rome knot oslo knot rome]"),
+            ('len(filter(rune(row) unfold row["qty"] ascends 100 fold knot sales))', "0"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(run(input).inspect(), expected)
+
+    def test_simple_comparisons_run_over_the_column(self):
+        env = Environment()
+        Eval(Parser(Lexer(SALES)).parse_program(), env)
+        tests = [
+            ('rune(row) unfold row["qty"] ascends 2 fold', ("qty", "ascends", 2)),
+            ('rune(row) unfold (2 ascends row["qty"]) fold', ("qty", "descends", 2)),
+            ('rune(row) unfold row["qty"] diverges 1 augments 1 fold', ("qty", "diverges", 2)),
+            ('rune(row) unfold row["qty"] ascends len("ab") fold', None),
+            ('rune(row) unfold row["qty"] ascends row["price"] fold', None),
+            ('rune(row) unfold row["qty"] augments 1 fold', None),
+            ('rune(a knot b) unfold a["qty"] ascends 2 fold', None),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                fn = Eval(Parser(Lexer(input)).parse_program(), env)
+                self.assertEqual(table.column_comparison(fn), expected)
+
+    def test_group(self):
+        tests = [
+            ('group(sales knot "city" knot "count")', "[[paris knot rome knot oslo] knot [2 knot 2 knot 1]]"),
+            ('group(sales knot "city" knot "sum" knot "qty")', "[[paris knot rome knot oslo] knot [10 knot 12 knot 1]]"),
+            ('group(sales knot "city" knot "min" knot "price")', "[[paris knot rome knot oslo] knot [2 knot 2.5 knot 99]]"),
+            ('group(sales knot "city" knot "max" knot "qty")', "[[paris knot rome knot oslo] knot [7 knot 10 knot 1]]"),
+            ('group(sales knot "qty" knot "count")', "[[3 knot 10 knot 7 knot 1 knot 2] knot [1 knot 1 knot 1 knot 1 knot 1]]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                grouped = run(input)
+                self.assertIsInstance(grouped, Table)
+                self.assertEqual(f"[{' knot '.join(column.inspect() for column in grouped.columns.values())}]", expected)
+
+    def test_errors(self):
+        tests = [
+            ('table(tome("a" binds [1] knot "b" binds [1 knot 2]))', "`table` columns must all be as long, got lengths 1 and 2"),
+            ('table(tome("a" binds 1))', "`table` columns must be CODEX, got NUMBER"),
+            ('table(tome(1 binds [1]))', "`table` column names must be SCROLL, got NUMBER"),
+            ("table([1])", "argument to `table` must be TOME, got CODEX"),
+            ('select(sales knot ["nope"])', "`select` found no column named nope"),
+            ("select(sales knot [1])", "columns given to `select` must be a CODEX of SCROLLs, got NUMBER"),
+            ('sort(sales knot "nope")', "`sort` found no column named nope"),
+            ("sort(sales)", "a TABLE is sorted by the name of one of its columns"),
+            ('group(sales knot "city" knot "sum" knot "city")', "`group` can only sum a column of NUMBERs"),
+            ('group(sales knot "city" knot "median" knot "qty")', "`group` can count, sum, min or max, not median"),
+            ('group(sales knot "city" knot "sum")', "`group` needs the column to sum"),
+            ('group(sales knot "city" knot "count" knot "qty")', "`group` counts rows, not the values of a column"),
+            ('group(sales knot "nope" knot "count")', "`group` found no column named nope"),
+            ('filter(rune(row) unfold row["nope"] ascends 1 fold knot sales)', "type mismatch: VOID ascends NUMBER"),
+            ("filter(rune(row) unfold nope fold knot sales)", "identifier not found: nope"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = run(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+import asyncio
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Set, Tuple
+from ast1 import Program
+from environment import Environment
+from object import Object, Task, Error
+from eval import (
+    Blocked,
+    Awaiting,
+    VOID,
+    io_mishap,
+    sleep_seconds,
+    command_line,
+    command_output,
+    builtin_read_file,
+    builtin_write_file,
+)
+from stepper import apply_steps, steps
+
+# Ticks eval_async runs between turns of the event loop, some milliseconds' worth
+DEFAULT_SLICE_STEPS = 1000
+
+# I/O calls that threads can be making at once for tasks
+IO_THREADS = 32
+
+_threads = ThreadPoolExecutor(IO_THREADS, thread_name_prefix="io")
+
+class Call:
+    """
+    An I/O builtin's call under way. The event loop awaits future; a wait
+    that cannot let the loop run, such as a join inside map, blocks in
+    finish until the call is over instead.
+    """
+    def __init__(self, name: str, future: asyncio.Future, finish: Callable[[], Any], made: Callable[[Any], Object] = None):
+        self.name = name
+        self.future = future
+        self.finish = finish
+        self.made = made  # makes the result from what the future gives, if it is not one already
+
+    def result(self) -> Object:
+        """What the call gave, waiting for it on the spot if it is not over, or a mishap if it failed or was cancelled"""
+        future = self.future
+        if not future.done():
+            given = self.finish()
+            future.cancel()  # the loop need not see to it any longer
+        elif future.cancelled():
+            return Error(f"`{self.name}` was cancelled")
+        elif future.exception() is not None:
+            return Error(f"`{self.name}` failed: {future.exception()}")
+        else:
+            given = future.result()
+        return self.made(given) if self.made is not None else given
+
+def finished(name: str, result: Object) -> Call:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return Call(name, future, lambda: result)
+
+def threaded(name: str, fn: Callable[..., Object], args: Tuple[Object, ...]) -> Call:
+    # the event loop has no files of its own to await, so a thread makes the call
+    work = _threads.submit(fn, *args)
+    return Call(name, asyncio.wrap_future(work), work.result)
+
+def read_file(*args: Object) -> Call:
+    return threaded("read_file", builtin_read_file, args)
+
+def write_file(*args: Object) -> Call:
+    return threaded("write_file", builtin_write_file, args)
+
+def sleep(*args: Object) -> Call:
+    seconds = sleep_seconds(args)
+    if isinstance(seconds, Error):
+        return finished("sleep", seconds)
+    until = time.monotonic() + seconds
+
+    def finish() -> Object:
+        time.sleep(max(until - time.monotonic(), 0))
+        return VOID
+    return Call("sleep", asyncio.ensure_future(asyncio.sleep(seconds, VOID)), finish)
+
+def run(*args: Object) -> Call:
+    argv = command_line(args)
+    if isinstance(argv, Error):
+        return finished("run", argv)
+    try:
+        process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return finished("run", io_mishap("run", argv[0], e))
+    work = _threads.submit(process.communicate)
+    future = asyncio.wrap_future(work)
+    # a program nothing waits for any more is killed, which also frees its thread
+    future.add_done_callback(lambda done: process.kill() if done.cancelled() else None)
+    return Call("run", future, work.result, lambda given: command_output(argv, process.returncode, *given))
+
+# What starts each of AWAITABLE_BUILTINS on the event loop
+AWAITED: Dict[str, Callable[..., Call]] = {
+    "read_file": read_file,
+    "write_file": write_file,
+    "sleep": sleep,
+    "run": run,
+}
+
+def awaited(pause: Awaiting) -> Call:
+    return AWAITED[pause.fn.name](*pause.args)
+
+class Scheduler:
+    """
+    Runs spawned tasks in turns on the one thread. A task runs until its
+    next TICK or until it blocks; blocked tasks are passed over until what
+    they wait for holds. Tasks only run while something waits on them,
+    through receive, send or join.
+    """
+    def __init__(self):
+        self.tasks: deque = deque()
+        self.io: Set[asyncio.Future] = set()  # I/O calls under way for tasks
+
+    def spawn(self, fn: Object, args: List[Object]) -> Task:
+        task = Task(apply_steps(fn, args))
+        self.tasks.append(task)
+        return task
+
+    def step(self, task: Task, on_loop: bool = False):
+        """
+        Run task up to its next pause. On the event loop, an I/O call it
+        makes is started there and the task waits for it, so that the calls
+        of many tasks overlap; otherwise the call is made on the spot, and a
+        call the loop was making for it is waited for on the spot.
+        """
+        try:
+            if task.awaited is not None:
+                call, task.awaited = task.awaited, None
+                pause = task.steps.send(call.result())
+            else:
+                pause = next(task.steps)
+            while type(pause) is Awaiting and not on_loop:
+                pause = task.steps.send(pause.fn.fn(*pause.args))
+        except StopIteration as stop:
+            task.done = True
+            task.result = stop.value
+            task.steps = None
+            return
+        if type(pause) is Awaiting:
+            call = awaited(pause)
+            self.io.add(call.future)
+            call.future.add_done_callback(self.io.discard)
+            task.awaited = call
+            pause = Blocked(pause.fn.name, call.future.done)
+        task.waiting = pause if type(pause) is Blocked else None
+
+    def run_until(self, ready: Callable[[], bool], on_loop: bool = False) -> bool:
+        """
+        Give tasks turns until ready() holds. False if it never can, because
+        every task left is blocked, or is the one waiting further up. Off
+        the event loop, which cannot run meanwhile, a task waiting for I/O
+        the loop was doing takes its turn by waiting for it then and there.
+        """
+        tasks = self.tasks
+        while not ready():
+            progressed = False
+            for _ in range(len(tasks)):
+                task = tasks.popleft()
+                blocked = task.waiting is not None and not task.waiting.ready() and (on_loop or task.awaited is None)
+                if task.steps.gi_running or blocked:
+                    tasks.append(task)
+                    continue
+                self.step(task, on_loop)
+                progressed = True
+                if not task.done:
+                    tasks.append(task)
+                if ready():
+                    return True
+            if not progressed:
+                return False
+        return True
+
+    def stop(self):
+        """
+        Stop every task and cancel the I/O calls under way for them, once the
+        script they belong to is over. Joining a stopped task gives a mishap.
+        """
+        for call in self.io:
+            call.cancel()
+        self.io.clear()
+        for task in self.tasks:
+            task.steps.close()
+            task.steps = task.waiting = task.awaited = None
+            task.done = True
+            task.result = Error("task stopped: the script that spawned it is over")
+        self.tasks.clear()
+
+SCHEDULER = Scheduler()
+
+# The scheduler of the script being evaluated: each eval_async has its own, and Eval uses SCHEDULER
+_scheduler: ContextVar[Scheduler] = ContextVar("scheduler", default=SCHEDULER)
+
+def current_scheduler() -> Scheduler:
+    return _scheduler.get()
+
+async def eval_async(program: Program, env: Environment, slice_steps: int = DEFAULT_SLICE_STEPS) -> Object:
+    """
+    Evaluate program as Eval does, handing control back to the event loop
+    after every slice_steps ticks so that other coroutines, other scripts
+    among them, take turns with it. Waiting on spawned tasks gives them
+    turns a slice at a time too, and the I/O builtins are awaited rather
+    than blocking the loop. Cancelling stops the evaluation where it last
+    paused. The tasks the program spawns are its own: when it returns or is
+    cancelled they are stopped and their I/O calls cancelled, so none are
+    left behind for later evaluations to run.
+
+    Only what the stepper evaluates itself can pause. A rune that a builtin
+    such as map, filter, reduce or sort calls, or a memoized rune, runs to
+    its end on Eval. Until it does, neither the loop nor other tasks get a
+    turn, and I/O inside it, sleep included, blocks the loop.
+    """
+    evaluation = steps(program, env)
+    scheduler = Scheduler()
+    outer = _scheduler.set(scheduler)
+    ticks = 0
+    result = None
+    try:
+        while True:
+            try:
+                pause = evaluation.send(result)
+            except StopIteration as stop:
+                return stop.value
+            result = None
+            if type(pause) is Awaiting:
+                call = awaited(pause)
+                try:
+                    await asyncio.wait((call.future,))
+                except asyncio.CancelledError:
+                    call.future.cancel()
+                    raise
+                result = call.result()
+                ticks = 0
+                continue
+            if type(pause) is Blocked:
+                while not pause.ready():
+                    turns = 0
+
+                    def waited_or_slice_over() -> bool:
+                        nonlocal turns
+                        turns += 1
+                        return pause.ready() or turns > slice_steps
+                    if scheduler.run_until(waited_or_slice_over, on_loop=True):
+                        await asyncio.sleep(0)
+                    elif scheduler.io:
+                        # every task that could go on waits for I/O
+                        await asyncio.wait(scheduler.io, return_when=asyncio.FIRST_COMPLETED)
+                    else:
+                        return pause.deadlock()
+                ticks = 0
+                continue
+            ticks += 1
+            if ticks >= slice_steps:
+                ticks = 0
+                await asyncio.sleep(0)
+    finally:
+        evaluation.close()
+        scheduler.stop()
+        _scheduler.reset(outer)
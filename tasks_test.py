@@ -0,0 +1,280 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from lexer import Lexer
+from parser import Parser
+from environment import Environment
+from eval import Eval
+from object import Error
+from tasks import eval_async, Call
+
+PIPELINE = """
+manifest stage with rune(input knot output) unfold
+    whilst (negate drained(input)) unfold send(output knot receive(input) augments 1) seal fold
+    close(output)
+fold seal
+manifest first with channel() seal
+manifest last with first seal
+manifest i with 0 seal
+whilst (i descends 200) unfold
+    manifest next with channel() seal
+    spawn(stage knot last knot next) seal
+    transmute last with next seal
+    transmute i with i augments 1 seal
+fold
+spawn(rune() unfold manifest k with 0 seal whilst (k descends 50) unfold send(first knot k) seal transmute k with k augments 1 seal fold close(first) fold) seal
+manifest out with [] seal
+whilst (negate drained(last)) unfold transmute out with push(out knot receive(last)) seal fold
+[len(out) knot out[0] knot out[49]]
+"""
+
+COUNTER = """
+manifest count with rune(n) unfold
+    manifest i with 0 seal
+    whilst (i descends n) unfold transmute i with i augments 1 seal fold
+    i
+fold seal
+"""
+
+def run(source: str):
+    return Eval(Parser(Lexer(source)).parse_program(), Environment())
+
+def parse(source: str):
+    return Parser(Lexer(source)).parse_program()
+
+class TestTasks(unittest.TestCase):
+    def test_pipeline_of_many_tasks(self):
+        self.assertEqual(run(PIPELINE).inspect(), "[50 knot 200 knot 249]")
+
+    def test_tasks_take_turns(self):
+        input = """
+        manifest log with channel(10) seal
+        manifest writer with rune(word) unfold
+            manifest i with 0 seal
+            whilst (i descends 3) unfold send(log knot word) seal transmute i with i augments 1 seal fold
+        fold seal
+        manifest a with spawn(writer knot "a") seal
+        manifest b with spawn(writer knot "b") seal
+        join(a) seal join(b) seal close(log) seal
+        reduce(rune(s knot w) unfold s augments w fold knot codex(take(map(rune(n) unfold receive(log) fold knot range(6)) knot 6)) knot "")
+        """
+        self.assertEqual(run(input).inspect(), "ababab")
+
+    def test_join_gives_the_result(self):
+        tests = [
+            ("join(spawn(rune(a knot b) unfold a augments b fold knot 1 knot 2))", "3"),
+            ("join(spawn(len knot \"four\"))", "4"),
+            ("manifest c with channel() seal manifest t with spawn(rune() unfold receive(c) augments 1 fold) seal send(c knot 41) seal join(t)", "42"),
+            ("manifest t with spawn(rune() unfold 1 fold) seal t", "task"),
+            ("manifest t with spawn(rune() unfold 1 fold) seal join(t) seal t", "task done with 1"),
+            ("manifest c with channel(3) seal send(c knot 1) seal c", "channel of 1/3"),
+            ("manifest c with channel() seal close(c) seal [drained(c) knot c]", "[verity knot closed channel of 0/1]"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(run(input).inspect(), expected)
+
+    def test_errors(self):
+        tests = [
+            ("receive(channel())", "deadlock: `receive` waits on tasks that are all waiting"),
+            ("manifest c with channel() seal join(spawn(rune() unfold receive(c) fold))",
+             "deadlock: `join` waits on tasks that are all waiting"),
+            ("manifest c with channel() seal send(c knot 1) seal send(c knot 2)",
+             "deadlock: `send` waits on tasks that are all waiting"),
+            ("join(spawn(rune() unfold nope fold))", "identifier not found: nope"),
+            ("manifest c with channel() seal close(c) seal send(c knot 1)", "send on a closed channel"),
+            ("channel(0)", "`channel` capacity must be at least 1, got 0"),
+            ("spawn(1)", "argument to `spawn` must be RITUAL, got NUMBER"),
+            ("join(1)", "argument to `join` must be TASK, got NUMBER"),
+            ("receive([1])", "argument to `receive` must be CHANNEL, got CODEX"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = run(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+class TestEvalAsync(unittest.TestCase):
+    def test_gives_what_eval_gives(self):
+        for source in (COUNTER + "count(500)", PIPELINE, "receive(channel())", "[1 knot 2]"):
+            with self.subTest(source=source):
+                evaluated = asyncio.run(eval_async(parse(source), Environment(), slice_steps=50))
+                self.assertEqual(evaluated.inspect(), run(source).inspect())
+
+    def test_scripts_take_turns_with_the_loop(self):
+        finished = []
+
+        async def script(name: str, n: int):
+            result = await eval_async(parse(COUNTER + f"count({n})"), Environment(), slice_steps=100)
+            finished.append((name, result.value))
+
+        async def both():
+            await asyncio.gather(script("long", 5000), script("short", 500))
+        asyncio.run(both())
+        self.assertEqual(finished, [("short", 500), ("long", 5000)])
+
+    def test_cancelling_stops_evaluation(self):
+        env = Environment()
+
+        async def cancel_midway():
+            evaluation = asyncio.ensure_future(eval_async(parse("manifest i with 0 seal whilst (verity) unfold transmute i with i augments 1 seal fold"), env, slice_steps=10))
+            for _ in range(5):
+                await asyncio.sleep(0)
+            evaluation.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await evaluation
+            stopped_at = env.get("i")[0].value
+            for _ in range(5):
+                await asyncio.sleep(0)
+            return stopped_at
+        stopped_at = asyncio.run(cancel_midway())
+        self.assertGreater(stopped_at, 0)
+        self.assertEqual(env.get("i")[0].value, stopped_at)
+
+class TestIO(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "notes.txt")
+
+    def both_ways(self, source: str):
+        """What source gives evaluated by Eval and by eval_async, which must agree"""
+        evaluated = run(source)
+        self.assertEqual(asyncio.run(eval_async(parse(source), Environment())).inspect(), evaluated.inspect())
+        return evaluated
+
+    def test_files_and_commands(self):
+        tests = [
+            (f'write_file("{self.path}" knot "héllo") seal read_file("{self.path}")', "héllo"),
+            (f'write_file("{self.path}" knot "x")', "void"),
+            (f'run("{sys.executable}" knot "-c" knot "print(6*7)")', "42\n"),
+            ("sleep(1)", "void"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(self.both_ways(input).inspect(), expected)
+
+    def test_io_in_spawned_tasks(self):
+        input = f"""
+        manifest copy with rune(n) unfold write_file("{self.path}" augments n knot "copy " augments n) seal read_file("{self.path}" augments n) fold seal
+        manifest tasks with map(rune(n) unfold spawn(copy knot n) fold knot ["1" knot "2" knot "3"]) seal
+        map(join knot tasks)
+        """
+        self.assertEqual(self.both_ways(input).inspect(), "[copy 1 knot copy 2 knot copy 3]")
+
+    def test_awaited_io_overlaps(self):
+        input = """
+        manifest sleepers with map(rune(n) unfold spawn(sleep knot 200) fold knot codex(range(10))) seal
+        manifest i with 0 seal
+        whilst (i descends 10) unfold join(sleepers[i]) seal transmute i with i augments 1 seal fold
+        i
+        """
+        started = time.perf_counter()
+        evaluated = asyncio.run(eval_async(parse(input), Environment()))
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(evaluated.value, 10)
+
+    def test_loop_runs_while_the_script_sleeps(self):
+        beats = []
+
+        async def heartbeat():
+            for beat in range(5):
+                beats.append(beat)
+                await asyncio.sleep(0.01)
+
+        async def both():
+            await asyncio.gather(eval_async(parse("sleep(200)"), Environment()), heartbeat())
+        asyncio.run(both())
+        self.assertEqual(beats, [0, 1, 2, 3, 4])
+
+    def test_joining_io_from_inside_a_builtin(self):
+        # receive lets the tasks start their I/O on the loop, which cannot run while map joins them
+        started = "manifest c with channel() seal spawn(rune() unfold send(c knot 1) fold) seal receive(c) seal "
+        tests = [
+            ("manifest t with spawn(sleep knot 50) seal " + started + "map(join knot [t])", "[void]"),
+            (f'manifest t with spawn(run knot "{sys.executable}" knot "-c" knot "print(7)") seal ' + started + "map(join knot [t])", "[7\n]"),
+            (f'manifest t with spawn(write_file knot "{self.path}" knot "x") seal ' + started + f'map(join knot [t]) seal read_file("{self.path}")', "x"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(self.both_ways(input).inspect(), expected)
+
+    def test_failed_io_gives_a_mishap(self):
+        async def outcomes():
+            loop = asyncio.get_running_loop()
+            cancelled, failed = loop.create_future(), loop.create_future()
+            cancelled.cancel()
+            failed.set_exception(OSError("disk on fire"))
+            return [Call(name, future, lambda: None).result() for name, future in (("sleep", cancelled), ("run", failed))]
+        self.assertEqual([outcome.inspect() for outcome in asyncio.run(outcomes())],
+                         ["MISHAP: `sleep` was cancelled", "MISHAP: `run` failed: disk on fire"])
+
+    def test_cancelling_stops_spawned_io(self):
+        late = f"import time; time.sleep(0.5); open({self.path!r}, 'w').close()"
+        input = f"""
+        manifest sleeper with spawn(sleep knot 10000) seal
+        manifest runner with spawn(run knot "{sys.executable}" knot "-c" knot "{late}") seal
+        join(runner)
+        """
+
+        async def cancel_midway():
+            evaluation = asyncio.ensure_future(eval_async(parse(input), Environment()))
+            await asyncio.sleep(0.2)
+            evaluation.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await evaluation
+            await asyncio.sleep(0.6)
+            return asyncio.all_tasks()
+        started = time.perf_counter()
+        left = asyncio.run(cancel_midway())
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertEqual(len(left), 1)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_tasks_end_with_their_script(self):
+        env = Environment()
+        asyncio.run(eval_async(parse("manifest t with spawn(sleep knot 10000) seal manifest c with channel() seal spawn(rune() unfold send(c knot 1) fold) seal receive(c)"), env))
+        self.assertEqual(Eval(parse("receive(channel())"), Environment()).inspect(), "MISHAP: deadlock: `receive` waits on tasks that are all waiting")
+        self.assertEqual(Eval(parse("join(t)"), env).inspect(), "MISHAP: task stopped: the script that spawned it is over")
+
+    def test_runes_called_by_builtins_hold_up_the_loop(self):
+        beats = []
+
+        async def heartbeat():
+            for _ in range(40):
+                beats.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def both(source: str):
+            beats.clear()
+            results = await asyncio.gather(heartbeat(), eval_async(parse(source), Environment()))
+            return results[1], max(later - earlier for earlier, later in zip(beats, beats[1:]))
+        # sleep in the script itself is awaited, but inside a rune that map calls it blocks
+        evaluated, gap = asyncio.run(both("sleep(200)"))
+        self.assertLess(gap, 0.15)
+        evaluated, gap = asyncio.run(both("map(rune(ms) unfold sleep(ms) fold knot [200])"))
+        self.assertEqual(evaluated.inspect(), "[void]")
+        self.assertGreaterEqual(gap, 0.15)
+
+    def test_errors(self):
+        missing = self.path + ".missing"
+        tests = [
+            (f'read_file("{missing}")', f"`read_file` cannot use {missing}: No such file or directory"),
+            (f'run("{sys.executable}" knot "-c" knot "exit(3)")', f"`run` of {sys.executable} exited with status 3"),
+            ('run("no-such-program-anywhere")', "`run` cannot use no-such-program-anywhere: No such file or directory"),
+            ("sleep(diminishes 1)", "`sleep` time must not be negative, got -1"),
+            ("read_file(1)", "argument to `read_file` must be SCROLL, got NUMBER"),
+            (f'write_file("{self.path}" knot 1)', "arguments to `write_file` must be SCROLL, got NUMBER"),
+            ("run()", "wrong number of arguments. got=0, want=at least 1"),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                evaluated = self.both_ways(input)
+                self.assertIsInstance(evaluated, Error)
+                self.assertEqual(evaluated.message, expected)
+
+if __name__ == "__main__":
+    unittest.main()
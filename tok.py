@@ -30,6 +30,8 @@ class TokenType(Enum):
     RPAREN = auto()
     LBRACE = auto()
     RBRACE = auto()
+    LBRACKET = auto()
+    RBRACKET = auto()
     
     # Keywords
     FUNCTION = auto()
@@ -39,6 +41,10 @@ class TokenType(Enum):
     IF = auto()
     ELSE = auto()
     RETURN = auto()
+    WHILE = auto()
+    HASH = auto()
+    COLON = auto()
+    REASSIGN = auto()
 
     # bonus datatypes
     STRING = auto()
@@ -0,0 +1,199 @@
+from typing import Dict, List, Optional, Tuple
+from ast1 import (
+    Node,
+    Program,
+    LetStatement,
+    AssignStatement,
+    ReturnStatement,
+    ExpressionStatement,
+    BlockStatement,
+    Identifier,
+    IntegerLiteral,
+    BooleanLiteral,
+    StringLiteral,
+    PrefixExpression,
+    InfixExpression,
+    IfExpression,
+    FunctionLiteral,
+    ArrayLiteral,
+    HashLiteral,
+)
+from analysis import binding_counts, local_names
+from visitor import walk, post_order
+from eval import BUILTINS
+from object import ObjectType, INTEGER_OBJ, BOOLEAN_OBJ, STRING_OBJ, FUNCTION_OBJ, ARRAY_OBJ, HASH_OBJ
+
+# Operators that only succeed on two NUMBERs
+NUMBER_OPERATORS = {"diminishes", "conjoins", "divide", "descends", "ascends"}
+COMPARISON_OPERATORS = {"mirrors", "diverges", "descends", "ascends"}
+
+def infer_types(program: Program) -> List[str]:
+    """
+    Prove the types of operands where possible and annotate the operator nodes.
+
+    A type proven for an expression is the type of its value whenever its
+    evaluation succeeds; if it fails, the MISHAP is caught before any
+    operator sees it. A name contributes a type only when it is bound
+    exactly once in the whole program by a top-level manifest, so every
+    value it can hold comes from the same expression, or when every
+    transmute of it keeps the type of that manifest. It does so only in
+    the statements after that manifest, and never when some rune binds the
+    name itself or it names a builtin, since a use could then mean those.
+
+    Returns the MISHAPs that are certain to occur if the offending
+    expression is ever evaluated, worded as the evaluator would word them.
+    """
+    counts = binding_counts(program)
+    locals_ = local_names(program)
+    rebinds: Dict[str, List[Node]] = {}
+    for node in walk(program):
+        if isinstance(node, AssignStatement) and node.name is not None and node.value is not None:
+            rebinds.setdefault(node.name.value, []).append(node.value)
+    # a name is typed from a top-level manifest, where no rune's own binding or a builtin can be what it means
+    bindings: Dict[str, Tuple[int, Node]] = {}
+    for index, stmt in enumerate(program.statements):
+        if isinstance(stmt, LetStatement) and stmt.name is not None and stmt.value is not None:
+            name = stmt.name.value
+            if (counts.get(name) == 1 + len(rebinds.get(name, ()))
+                    and name not in locals_ and name not in BUILTINS):
+                bindings[name] = (index, stmt.value)
+    # the statement each identifier is in, since a manifest is only seen by the statements after it
+    statement_of: Dict[int, int] = {}
+    for index, stmt in enumerate(program.statements):
+        for node in walk(stmt):
+            if isinstance(node, Identifier):
+                statement_of[id(node)] = index
+
+    order = post_order(program)
+    while True:
+        uses = {
+            id(node): bindings[node.value][1] for node in order
+            if isinstance(node, Identifier) and node.value in bindings
+            and statement_of.get(id(node), -1) > bindings[node.value][0]
+        }
+        types = _fixpoint(order, uses)
+        # a rebound name is assumed to keep its type, which holds only if
+        # every transmute proves to under that assumption; otherwise drop it
+        broken = {
+            name for name, (_, value) in bindings.items()
+            if types.get(id(value)) is not None
+            and any(types.get(id(rebind)) != types[id(value)] for rebind in rebinds.get(name, ()))
+        }
+        if not broken:
+            break
+        for name in broken:
+            del bindings[name]
+
+    mishaps: List[str] = []
+    for node in order:
+        if isinstance(node, InfixExpression):
+            left, right = types.get(id(node.left)), types.get(id(node.right))
+            if left is not None and left == right and _infix_result(node.operator, left, right) is not None:
+                node.operand_type = left
+            mishap = _infix_mishap(node.operator, left, right)
+        elif isinstance(node, PrefixExpression):
+            right = types.get(id(node.right))
+            if right is not None and _prefix_result(node.operator, right) is not None:
+                node.operand_type = right
+            mishap = _prefix_mishap(node.operator, right)
+        else:
+            continue
+        if mishap is not None:
+            mishaps.append(mishap)
+    return mishaps
+
+def _fixpoint(order: List[Node], uses: Dict[int, Node]) -> Dict[int, ObjectType]:
+    types: Dict[int, ObjectType] = {}
+    changed = True
+    while changed:
+        changed = False
+        for node in order:
+            if id(node) in types:
+                continue
+            # a type inferred from partial knowledge stays sound as more is proven
+            inferred = _infer(node, types, uses)
+            if inferred is not None:
+                types[id(node)] = inferred
+                changed = True
+    return types
+
+def _infer(node: Node, types: Dict[int, ObjectType], uses: Dict[int, Node]) -> Optional[ObjectType]:
+    if isinstance(node, IntegerLiteral):
+        return INTEGER_OBJ
+    if isinstance(node, StringLiteral):
+        return STRING_OBJ
+    if isinstance(node, BooleanLiteral):
+        return BOOLEAN_OBJ
+    if isinstance(node, FunctionLiteral):
+        return FUNCTION_OBJ
+    if isinstance(node, ArrayLiteral):
+        return ARRAY_OBJ
+    if isinstance(node, HashLiteral):
+        return HASH_OBJ
+    if isinstance(node, Identifier):
+        value = uses.get(id(node))
+        return types.get(id(value)) if value is not None else None
+    if isinstance(node, PrefixExpression):
+        return _prefix_result(node.operator, types.get(id(node.right)))
+    if isinstance(node, InfixExpression):
+        return _infix_result(node.operator, types.get(id(node.left)), types.get(id(node.right)))
+    if isinstance(node, IfExpression):
+        if node.alternative is None:
+            return None
+        consequence = _block_type(node.consequence, types)
+        if consequence is not None and consequence == _block_type(node.alternative, types):
+            return consequence
+    return None
+
+def _block_type(block: Optional[BlockStatement], types: Dict[int, ObjectType]) -> Optional[ObjectType]:
+    """The type of a block's value, if it always ends on an expression and never yields"""
+    if block is None or not block.statements:
+        return None
+    last = block.statements[-1]
+    if not isinstance(last, ExpressionStatement) or last.expression is None:
+        return None
+    for node in walk(block):
+        if isinstance(node, ReturnStatement):
+            return None
+    return types.get(id(last.expression))
+
+def _prefix_result(operator: str, right: Optional[ObjectType]) -> Optional[ObjectType]:
+    if operator == "negate":
+        return BOOLEAN_OBJ
+    if operator == "diminishes" and right == INTEGER_OBJ:
+        return INTEGER_OBJ
+    return None
+
+def _infix_result(operator: str, left: Optional[ObjectType], right: Optional[ObjectType]) -> Optional[ObjectType]:
+    if _infix_mishap(operator, left, right) is not None:
+        return None
+    # an operand of unknown type may be a VECTOR, which broadcasts over a NUMBER
+    if (left is None or right is None) and (left or right) in (None, INTEGER_OBJ):
+        return None
+    if operator in COMPARISON_OPERATORS:
+        return BOOLEAN_OBJ
+    if operator in NUMBER_OPERATORS:
+        return INTEGER_OBJ
+    if operator == "augments":
+        known = left or right
+        return known if known in (INTEGER_OBJ, STRING_OBJ) else None
+    return None
+
+def _prefix_mishap(operator: str, right: Optional[ObjectType]) -> Optional[str]:
+    if right is None or operator != "diminishes" or right == INTEGER_OBJ:
+        return None
+    return f"unknown operator: diminishes {right}"
+
+def _infix_mishap(operator: str, left: Optional[ObjectType], right: Optional[ObjectType]) -> Optional[str]:
+    """Mirror the checks of eval_infix_expression for proven operand types"""
+    if left is None or right is None:
+        return None
+    if left != right:
+        return f"type mismatch: {left} {operator} {right}"
+    if left == INTEGER_OBJ:
+        return None
+    if left == STRING_OBJ:
+        return None if operator == "augments" else f"unknown operator: {left} {operator} {right}"
+    if operator in ("mirrors", "diverges"):
+        return None
+    return f"unknown operator: {left} {operator} {right}"
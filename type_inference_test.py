@@ -0,0 +1,130 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from eval import Eval
+from environment import Environment
+from ast1 import InfixExpression, PrefixExpression
+from analysis import walk
+from type_inference import infer_types
+from optimizer import PassManager
+
+def parse(input):
+    l = Lexer(input)
+    p = Parser(l)
+    program = p.parse_program()
+    if p.errors:
+        raise AssertionError(f"parser errors: {p.errors}")
+    return program
+
+def operand_types(program):
+    return [
+        (node.string(), node.operand_type) for node in walk(program)
+        if isinstance(node, (InfixExpression, PrefixExpression))
+    ]
+
+class TestTypeInference(unittest.TestCase):
+    def test_annotates_proven_operands(self):
+        input = """
+        manifest n with 5 seal
+        manifest s with "mystic" seal
+        manifest f with rune(x) unfold x conjoins n augments 1 fold seal
+        s augments " one" seal
+        diminishes (n augments 2) seal
+        """
+        program = parse(input)
+        self.assertEqual(infer_types(program), [])
+        self.assertEqual(operand_types(program), [
+            # x may be a VECTOR, so the product may be one too
+            ("((x conjoins n) augments 1)", None),
+            ("(x conjoins n)", None),
+            ('(s augments  one)', "SCROLL"),
+            ("(diminishes (n augments 2))", "NUMBER"),
+            ("(n augments 2)", "NUMBER"),
+        ])
+
+    def test_rebound_names_stay_unknown(self):
+        input = """
+        manifest n with 5 seal
+        manifest n with "five" seal
+        n augments 1 seal
+        """
+        program = parse(input)
+        infer_types(program)
+        self.assertEqual(operand_types(program), [("(n augments 1)", None)])
+
+    def test_transmuted_names(self):
+        input = """
+        manifest i with 0 seal
+        manifest s with 0 seal
+        whilst (i descends 10) unfold transmute i with i augments 1 seal transmute s with "s" seal fold
+        s augments 1 seal
+        """
+        program = parse(input)
+        self.assertEqual(infer_types(program), [])
+        self.assertEqual(operand_types(program), [
+            ("(i descends 10)", "NUMBER"),
+            ("(i augments 1)", "NUMBER"),
+            ("(s augments 1)", None),
+        ])
+
+    def test_if_expressions(self):
+        input = """
+        manifest a with whence (verity) unfold 1 fold elsewise unfold 2 fold seal
+        manifest b with whence (verity) unfold 1 fold seal
+        a augments 1 seal
+        b augments 1 seal
+        """
+        program = parse(input)
+        infer_types(program)
+        self.assertEqual(operand_types(program), [("(a augments 1)", "NUMBER"), ("(b augments 1)", None)])
+
+    def test_reports_certain_mishaps(self):
+        tests = [
+            ("5 augments verity seal", ["type mismatch: NUMBER augments TRUTH"]),
+            ("verity augments fallacy", ["unknown operator: TRUTH augments TRUTH"]),
+            ('"Hello" diminishes "World"', ["unknown operator: SCROLL diminishes SCROLL"]),
+            ("diminishes verity", ["unknown operator: diminishes TRUTH"]),
+            ('manifest s with "a" seal rune() unfold s conjoins 2 fold', ["type mismatch: SCROLL conjoins NUMBER"]),
+            ("[1] augments [2]", ["unknown operator: CODEX augments CODEX"]),
+            ("rune(x) unfold x augments verity fold", []),
+            ("1 descends 2 mirrors verity", []),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                self.assertEqual(infer_types(parse(input)), expected)
+
+    def test_results_are_unchanged(self):
+        tests = [
+            ("manifest n with 5 seal manifest m with n conjoins 2 seal diminishes m augments n seal", -5),
+            ('manifest s with "ab" seal s augments "cd" seal', "abcd"),
+            ("manifest n with 7 seal n ascends 3 seal", True),
+        ]
+        for (input, expected) in tests:
+            with self.subTest(input=input):
+                program = parse(input)
+                infer_types(program)
+                self.assertEqual(Eval(program, Environment()).value, expected)
+
+    def test_names_typed_only_where_their_manifest_is_seen(self):
+        tests = [
+            "manifest f with rune() unfold manifest len with 5 seal len fold seal len augments 1 seal",
+            "manifest f with rune() unfold manifest map with 5 seal map fold seal diminishes map seal",
+            "manifest len with 5 seal len augments 1 seal",
+            "manifest f with rune(n) unfold n augments 1 fold seal manifest n with \"x\" seal f(2) seal",
+            "manifest g with rune() unfold k augments 1 fold seal manifest k with \"x\" seal g() seal",
+        ]
+        for input in tests:
+            with self.subTest(input=input):
+                plain = Eval(parse(input), Environment())
+                for level in (1, 2):
+                    program = PassManager(level).run(parse(input))
+                    self.assertEqual(Eval(program, Environment()).inspect(), plain.inspect())
+
+    def test_deep_expressions(self):
+        input = " augments ".join(["1"] * 5000)
+        program = parse(input)
+        self.assertEqual(infer_types(program), [])
+        self.assertEqual(program.statements[0].expression.operand_type, "NUMBER")
+
+if __name__ == "__main__":
+    unittest.main()
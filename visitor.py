@@ -0,0 +1,158 @@
+from typing import Iterator, List, Optional
+from ast1 import (
+    Node,
+    Program,
+    LetStatement,
+    ReturnStatement,
+    ExpressionStatement,
+    BlockStatement,
+    PrefixExpression,
+    InfixExpression,
+    IfExpression,
+    FunctionLiteral,
+    CallExpression,
+    AssignStatement,
+    WhileStatement,
+    ArrayLiteral,
+    IndexExpression,
+    HashLiteral,
+)
+
+# Child-bearing attributes of every node type, in evaluation order
+CHILD_FIELDS = {
+    Program: ("statements",),
+    LetStatement: ("name", "value"),
+    AssignStatement: ("name", "value"),
+    WhileStatement: ("condition", "body"),
+    ReturnStatement: ("return_value",),
+    ExpressionStatement: ("expression",),
+    BlockStatement: ("statements",),
+    PrefixExpression: ("right",),
+    InfixExpression: ("left", "right"),
+    IfExpression: ("condition", "consequence", "alternative"),
+    FunctionLiteral: ("parameters", "body"),
+    CallExpression: ("function", "arguments"),
+    ArrayLiteral: ("elements",),
+    IndexExpression: ("left", "index"),
+    HashLiteral: ("entries",),
+}
+
+def iter_child_nodes(node: Node) -> Iterator[Node]:
+    """Yield the direct children of a node in evaluation order"""
+    for field in CHILD_FIELDS.get(type(node), ()):
+        value = getattr(node, field)
+        if isinstance(value, list):
+            for child in value:
+                if child is not None:
+                    yield child
+        elif value is not None:
+            yield value
+
+def walk(node: Node) -> Iterator[Node]:
+    """Yield every node of a tree in pre-order without recursing"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(list(iter_child_nodes(current))))
+
+def post_order(node: Node) -> List[Node]:
+    """List the nodes of a tree with every child before its parent"""
+    out = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        out.append(current)
+        stack.extend(iter_child_nodes(current))
+    out.reverse()
+    return out
+
+def node_count(node: Node) -> int:
+    """Count the nodes of a tree"""
+    return sum(1 for _ in walk(node))
+
+class _Leave:
+    """Marks the point where a visitor is done with a node's children"""
+    def __init__(self, node: Node):
+        self.node = node
+
+class NodeVisitor:
+    """
+    Walk a tree without recursing, so that arbitrarily deep trees are fine.
+
+    Subclasses define visit_<NodeClass>(node), called before the children
+    of a node, and leave_<NodeClass>(node), called after them. Returning
+    False from a visit_ method skips the node's children (and its leave_).
+    """
+    def visit(self, root: Node):
+        stack = [root]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, _Leave):
+                getattr(self, "leave_" + type(item.node).__name__)(item.node)
+                continue
+            name = type(item).__name__
+            enter = getattr(self, "visit_" + name, None)
+            if enter is not None and enter(item) is False:
+                continue
+            if hasattr(self, "leave_" + name):
+                stack.append(_Leave(item))
+            stack.extend(reversed(list(iter_child_nodes(item))))
+
+class _FieldSlots:
+    """Index a node's single-child attributes like a list, by field name"""
+    def __init__(self, node: Node):
+        self.node = node
+
+    def __getitem__(self, field: str) -> Optional[Node]:
+        return getattr(self.node, field)
+
+    def __setitem__(self, field: str, value: Optional[Node]):
+        setattr(self.node, field, value)
+
+class NodeTransformer(NodeVisitor):
+    """
+    Rewrite a tree bottom-up without recursing.
+
+    Subclasses define transform_<NodeClass>(node), called after the node's
+    children have been transformed, returning the node that takes its
+    place. A returned node that differs from the original is transformed
+    again, children first, so rewrites that expose more opportunities are
+    followed to a fixed point; it is up to the subclass to terminate.
+    visit_<NodeClass> methods may return False to leave a subtree alone.
+    """
+    def transform(self, root: Node) -> Node:
+        box = [root]
+        stack = [(box, 0, False)]
+        while stack:
+            slots, key, children_done = stack.pop()
+            node = slots[key]
+            name = type(node).__name__
+            if not children_done:
+                enter = getattr(self, "visit_" + name, None)
+                if enter is not None and enter(node) is False:
+                    continue
+                stack.append((slots, key, True))
+                stack.extend(reversed(list(self._child_slots(node))))
+                continue
+            method = getattr(self, "transform_" + name, None)
+            if method is None:
+                continue
+            replacement = method(node)
+            if replacement is not node:
+                slots[key] = replacement
+                if replacement is not None:
+                    stack.append((slots, key, False))
+        return box[0]
+
+    @staticmethod
+    def _child_slots(node: Node):
+        fields = _FieldSlots(node)
+        for field in CHILD_FIELDS.get(type(node), ()):
+            value = getattr(node, field)
+            if isinstance(value, list):
+                for index, child in enumerate(value):
+                    if child is not None:
+                        yield (value, index, False)
+            elif value is not None:
+                yield (fields, field, False)
@@ -0,0 +1,98 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from tok import Token, TokenType
+from ast1 import IntegerLiteral, InfixExpression, Identifier
+from visitor import NodeVisitor, NodeTransformer, walk, post_order, node_count
+
+def parse(input):
+    l = Lexer(input)
+    p = Parser(l)
+    program = p.parse_program()
+    if p.errors:
+        raise AssertionError(f"parser errors: {p.errors}")
+    return program
+
+class IdentifierCollector(NodeVisitor):
+    def __init__(self):
+        self.names = []
+        self.depth = 0
+        self.max_depth = 0
+
+    def visit_FunctionLiteral(self, node):
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def leave_FunctionLiteral(self, node):
+        self.depth -= 1
+
+    def visit_LetStatement(self, node):
+        self.names.append(f"let {node.name.value}")
+
+    def visit_Identifier(self, node):
+        self.names.append(node.value)
+
+class SkipRunes(IdentifierCollector):
+    def visit_FunctionLiteral(self, node):
+        return False
+
+class SwapOperands(NodeTransformer):
+    def transform_InfixExpression(self, node):
+        if node.operator != "diminishes":
+            return node
+        return InfixExpression(node.token, node.right, "augments", node.left)
+
+class FoldSums(NodeTransformer):
+    def transform_InfixExpression(self, node):
+        if (node.operator == "augments"
+                and isinstance(node.left, IntegerLiteral)
+                and isinstance(node.right, IntegerLiteral)):
+            value = node.left.value + node.right.value
+            return IntegerLiteral(Token(TokenType.INT, str(value)), value)
+        return node
+
+class TestVisitor(unittest.TestCase):
+    def test_walk_orders(self):
+        program = parse("a augments b conjoins c seal")
+        self.assertEqual(
+            [type(node).__name__ for node in walk(program)],
+            ["Program", "ExpressionStatement", "InfixExpression", "Identifier", "InfixExpression", "Identifier", "Identifier"],
+        )
+        self.assertEqual(
+            [node.value for node in post_order(program) if isinstance(node, Identifier)],
+            ["a", "b", "c"],
+        )
+        self.assertEqual(node_count(program), 7)
+
+    def test_visitor_hooks(self):
+        input = """
+        manifest f with rune(x) unfold manifest g with rune(y) unfold x augments y fold seal g fold seal
+        f(z) seal
+        """
+        collector = IdentifierCollector()
+        collector.visit(parse(input))
+        self.assertEqual(collector.names, ["let f", "f", "x", "let g", "g", "y", "x", "y", "g", "f", "z"])
+        self.assertEqual((collector.depth, collector.max_depth), (0, 2))
+
+        skipping = SkipRunes()
+        skipping.visit(parse(input))
+        self.assertEqual(skipping.names, ["let f", "f", "f", "z"])
+
+    def test_transformer_rewrites_bottom_up(self):
+        program = parse("(1 augments 2) augments (3 augments 4) seal x diminishes 5 seal")
+        program = FoldSums().transform(program)
+        self.assertEqual(program.statements[0].string(), "10")
+        program = SwapOperands().transform(program)
+        self.assertEqual(program.statements[1].string(), "(5 augments x)")
+
+    def test_deep_trees(self):
+        depth = 100000
+        program = parse(" augments ".join(["1"] * depth))
+        self.assertEqual(node_count(program), 2 * depth + 1)
+        collector = IdentifierCollector()
+        collector.visit(program)
+        program = FoldSums().transform(program)
+        self.assertEqual(program.statements[0].expression.value, depth)
+
+if __name__ == "__main__":
+    unittest.main()